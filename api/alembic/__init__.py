@@ -1 +0,0 @@
-"""Database migrations using Alembic."""
@@ -8,7 +8,9 @@ from alembic import context
 # Import your models here to auto-generate migrations
 from app.core.config import settings
 from app.models.base import Base
+from app.models.directory import DirectoryEntry  # noqa: F401
 from app.models.item import Item  # noqa: F401
+from app.models.job import Job  # noqa: F401
 from app.models.user import User  # noqa: F401
 
 # this is the Alembic Config object
@@ -23,6 +25,19 @@ config.set_main_option("sqlalchemy.url", settings.database_url)
 
 target_metadata = Base.metadata
 
+# Full-text search objects are managed by hand-written migrations only.
+UNMANAGED = {"search_vector", "ix_items_search_vector"}
+
+
+# Nor are the partitions of items and the tables used while partitioning it
+UNMANAGED_TABLE_PREFIXES = ("items_fts", "items_p", "items_unpartitioned")
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:  # noqa: A002
+    return name not in UNMANAGED and not (
+        type_ == "table" and name.startswith(UNMANAGED_TABLE_PREFIXES)
+    )
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
@@ -30,6 +45,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -47,7 +63,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
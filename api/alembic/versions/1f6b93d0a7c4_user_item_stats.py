@@ -0,0 +1,43 @@
+"""user item stats
+
+Revision ID: 1f6b93d0a7c4
+Revises: e4a7c2f81d36
+Create Date: 2026-10-19 17:03:27.918342
+
+Per-user item counts maintained by ItemRepository, filled here from the
+existing items. Writes by app versions still running without the counts
+are not reflected: run "python -m app.core.item_stats reconcile" once the
+new version is deployed.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '1f6b93d0a7c4'
+down_revision = 'e4a7c2f81d36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_item_stats',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('active', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(
+        "INSERT INTO user_item_stats (user_id, total, active) "
+        "SELECT user_id, count(*), sum(CASE WHEN is_active THEN 1 ELSE 0 END) FROM ("
+        "SELECT user_id, is_active FROM items "
+        "UNION ALL SELECT user_id, is_active FROM items_archive"
+        ") AS all_items GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_item_stats')
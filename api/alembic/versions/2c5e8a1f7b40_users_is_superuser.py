@@ -0,0 +1,33 @@
+"""users is_superuser
+
+Revision ID: 2c5e8a1f7b40
+Revises: 3a6d6189de1e
+Create Date: 2026-10-19 17:42:18.203441
+
+Adds ``users.is_superuser`` (false for existing users), which databases
+created by Base.metadata.create_all before the admin endpoints do not
+have. Databases that already have it (created by an earlier version of
+the initial revision) are left as they are.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2c5e8a1f7b40'
+down_revision = '3a6d6189de1e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("users")}
+    if "is_superuser" not in columns:
+        op.add_column(
+            'users',
+            sa.Column('is_superuser', sa.Boolean(), server_default=sa.false(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'is_superuser')
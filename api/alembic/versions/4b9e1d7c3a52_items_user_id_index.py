@@ -0,0 +1,30 @@
+"""items user_id index
+
+Revision ID: 4b9e1d7c3a52
+Revises: 2c5e8a1f7b40
+Create Date: 2026-10-19 17:58:40.671925
+
+Indexes ``items.user_id``, which every per-user item query filters on and
+which databases created by Base.metadata.create_all do not have. The
+partition migrations rename this index, so it must exist before them.
+Databases that already have it are left as they are.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4b9e1d7c3a52'
+down_revision = '2c5e8a1f7b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("items")}
+    if "ix_items_user_id" not in indexes:
+        op.create_index(op.f('ix_items_user_id'), 'items', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_items_user_id'), table_name='items')
@@ -0,0 +1,46 @@
+"""items partitioned shadow
+
+Revision ID: 5d2f8a9c4e71
+Revises: 9c41e07d2b55
+Create Date: 2026-10-19 15:21:07.846213
+
+PostgreSQL: first half of hash-partitioning items by user_id. Creates the
+partitioned copy ``items_partitioned`` (ITEM_PARTITIONS partitions), kept
+in sync with items by a trigger. Backfill it with ``python -m
+app.core.partitioning backfill`` before upgrading further on large tables;
+see app/core/partitioning.py. Nothing to do on SQLite, or if items is
+already partitioned.
+"""
+from sqlalchemy import text
+
+from alembic import op
+from app.core.config import settings
+from app.core.partitioning import MIRROR, PROGRESS, SHADOW, is_partitioned, shadow_ddl
+
+# revision identifiers, used by Alembic.
+revision = '5d2f8a9c4e71'
+down_revision = '9c41e07d2b55'
+branch_labels = None
+depends_on = None
+
+# The columns of items at this revision, copied as they are; kept literal so
+# later changes to the model do not change this migration.
+ITEM_COLUMNS = ("user_id", "title", "description", "is_active", "id", "created_at", "updated_at")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "postgresql" or is_partitioned(conn):
+        return
+    for statement in shadow_ddl(settings.item_partitions, ITEM_COLUMNS):
+        conn.execute(text(statement))
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "postgresql":
+        return
+    op.execute(f"DROP TRIGGER IF EXISTS {MIRROR} ON items")
+    op.execute(f"DROP FUNCTION IF EXISTS {MIRROR}()")
+    op.execute(f"DROP TABLE IF EXISTS {PROGRESS}")
+    op.execute(f"DROP TABLE IF EXISTS {SHADOW}")
@@ -0,0 +1,66 @@
+"""item full text search
+
+Revision ID: 76d800f1b128
+Revises: 4b9e1d7c3a52
+Create Date: 2026-10-19 10:58:02.118392
+
+PostgreSQL: a generated ``search_vector`` tsvector column (title weighted
+above description) with a GIN index. Adding a stored generated column
+rewrites the table, so run this in a maintenance window on large tables.
+SQLite: an external-content FTS5 table kept in sync by triggers.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '76d800f1b128'
+down_revision = '4b9e1d7c3a52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE items ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'B')
+            ) STORED
+            """
+        )
+        op.execute("CREATE INDEX ix_items_search_vector ON items USING gin (search_vector)")
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE items_fts USING fts5("
+        "title, description, content='items', content_rowid='rowid', tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN "
+        "INSERT INTO items_fts(rowid, title, description) "
+        "VALUES (new.rowid, new.title, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER items_fts_delete AFTER DELETE ON items BEGIN "
+        "INSERT INTO items_fts(items_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER items_fts_update AFTER UPDATE OF title, description ON items BEGIN "
+        "INSERT INTO items_fts(items_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); "
+        "INSERT INTO items_fts(rowid, title, description) "
+        "VALUES (new.rowid, new.title, new.description); END"
+    )
+    op.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_items_search_vector")
+        op.execute("ALTER TABLE items DROP COLUMN search_vector")
+        return
+
+    for trigger in ("items_fts_insert", "items_fts_delete", "items_fts_update"):
+        op.execute(f"DROP TRIGGER {trigger}")
+    op.execute("DROP TABLE items_fts")
@@ -0,0 +1,44 @@
+"""shard directory
+
+Revision ID: 9c41e07d2b55
+Revises: 76d800f1b128
+Create Date: 2026-10-19 14:02:41.530117
+
+Global email directory and slot map for sharding by user id. Only the
+primary database (DATABASE_URL) uses them, but every shard runs the same
+migrations so any database can later serve as the primary.
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9c41e07d2b55'
+down_revision = '76d800f1b128'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_directory',
+    sa.Column('key', sa.String(length=320), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_user_directory_user_id'), 'user_directory', ['user_id'], unique=False)
+    op.create_table('shard_slots',
+    sa.Column('slot', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('frozen', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('slot')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('shard_slots')
+    op.drop_index(op.f('ix_user_directory_user_id'), table_name='user_directory')
+    op.drop_table('user_directory')
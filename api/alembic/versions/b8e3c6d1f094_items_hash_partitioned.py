@@ -0,0 +1,45 @@
+"""items hash partitioned
+
+Revision ID: b8e3c6d1f094
+Revises: 5d2f8a9c4e71
+Create Date: 2026-10-19 15:24:52.310548
+
+PostgreSQL: second half of hash-partitioning items by user_id. Blocks
+writes to items while it copies the rows the backfill has not, then swaps
+items_partitioned in; the previous table is kept as items_unpartitioned
+(drop it once the partitioned table has proven itself). Downgrading swaps
+back after bringing items_unpartitioned up to date.
+"""
+from sqlalchemy import text
+
+from alembic import op
+from app.core.partitioning import PROGRESS, catch_up_and_swap, swap_back
+
+# revision identifiers, used by Alembic.
+revision = 'b8e3c6d1f094'
+down_revision = '5d2f8a9c4e71'
+branch_labels = None
+depends_on = None
+
+# The columns of items at this revision, copied as they are; kept literal so
+# later changes to the model do not change this migration.
+ITEM_COLUMNS = ("user_id", "title", "description", "is_active", "id", "created_at", "updated_at")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    # No backfill position: not PostgreSQL, or items was partitioned already
+    if conn.dialect.name != "postgresql" or not conn.execute(
+        text("SELECT to_regclass(:name)"), {"name": PROGRESS}
+    ).scalar():
+        return
+    catch_up_and_swap(conn, ITEM_COLUMNS)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "postgresql" or not conn.execute(
+        text("SELECT to_regclass('items_unpartitioned')")
+    ).scalar():
+        return
+    swap_back(conn, ITEM_COLUMNS)
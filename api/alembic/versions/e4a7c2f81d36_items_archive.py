@@ -0,0 +1,43 @@
+"""items archive
+
+Revision ID: e4a7c2f81d36
+Revises: b8e3c6d1f094
+Create Date: 2026-10-19 16:11:08.204871
+
+Cold table for items inactive longer than archive_after_days, and a partial
+index on items finding them (on PostgreSQL it is created on every partition).
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c2f81d36'
+down_revision = 'b8e3c6d1f094'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('items_archive',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_items_archive_user_id'), 'items_archive', ['user_id'], unique=False)
+    op.create_index('ix_items_inactive_updated_at', 'items', ['updated_at'], unique=False,
+                    postgresql_where=sa.text('NOT is_active'), sqlite_where=sa.text('is_active = 0'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_items_inactive_updated_at', table_name='items',
+                  postgresql_where=sa.text('NOT is_active'), sqlite_where=sa.text('is_active = 0'))
+    op.drop_index(op.f('ix_items_archive_user_id'), table_name='items_archive')
+    op.drop_table('items_archive')
@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 
 from app.auth.security import decode_access_token
 from app.core.db import get_db
+from app.core.tracing import traced
 from app.models import User
 from app.repositories import UserRepository
 
@@ -19,6 +20,7 @@ from app.repositories import UserRepository
 security = HTTPBearer()
 
 
+@traced(layer="dependency")
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
@@ -45,15 +47,17 @@ def get_current_user(
     except (JWTError, ValueError) as err:
         raise credentials_exception from err
 
-    # Get user from database
+    # Get user from database (concurrent lookups of the same user share a query).
+    # Sharded, this also routes the request's session to the user's shard.
     user_repo = UserRepository(db)
-    user = user_repo.get_by_id(user_id)
+    user = user_repo.get_by_id_coalesced(user_id)
     if user is None:
         raise credentials_exception
 
     return user
 
 
+@traced(layer="dependency")
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -67,3 +71,18 @@ def get_current_active_user(
             status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user"
         )
     return current_user
+
+
+def get_current_superuser(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    """
+    Get the current user, requiring superuser privileges.
+
+    Dependency for admin and diagnostics routes.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough privileges"
+        )
+    return current_user
@@ -9,6 +9,7 @@ import bcrypt
 from jose import jwt
 
 from app.core.config import settings
+from app.core.tracing import traced
 
 # JWT settings from configuration
 SECRET_KEY = settings.secret_key
@@ -16,6 +17,7 @@ ALGORITHM = settings.jwt_algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 
+@traced("bcrypt.hashpw", layer="crypto")
 def hash_password(password: str) -> str:
     """
     Hash a plain text password using bcrypt.
@@ -28,6 +30,7 @@ def hash_password(password: str) -> str:
     return hashed.decode("utf-8")
 
 
+@traced("bcrypt.checkpw", layer="crypto")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain text password against a bcrypt hashed password.
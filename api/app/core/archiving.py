@@ -0,0 +1,123 @@
+"""
+Archiving: move items that stayed inactive to items_archive.
+
+``Item.is_active`` is a soft flag, so deactivated items would stay in the
+hot table for good and bloat every index a user's list query scans. This job
+moves items that are inactive and unchanged for ``archive_after_days`` to
+``items_archive``, ``archive_batch_size`` rows per transaction: each batch
+copies its rows and deletes them from ``items`` atomically, so the job can
+be stopped at any point and simply run again. On PostgreSQL a batch skips
+rows locked by a concurrent write (the next run picks them up).
+
+    python -m app.core.archiving status
+    python -m app.core.archiving run --older-than-days 90 --batch-size 1000 --pause 0.05
+
+Archived items are still served by GET /items/{id}, listed with
+?include_archived=true, and moved back by any update. With sharding every
+shard is archived in turn; a batch racing a slot move at worst leaves an
+item in the hot table of its new shard.
+"""
+
+import argparse
+import time
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Engine, delete, func, insert, select
+from sqlalchemy.engine import Connection
+
+from app.core.cache import item_cache
+from app.core.config import settings
+from app.core.db import data_engines, shard_router
+from app.models.item import Item, ItemArchive
+
+
+def archivable(cutoff: datetime) -> Any:
+    """Condition for items to archive; matches the partial index ix_items_inactive_updated_at."""
+    return (~Item.is_active) & (Item.updated_at < cutoff)
+
+
+def archive_batch(conn: Connection, cutoff: datetime, limit: int) -> tuple[int, set[uuid.UUID]]:
+    """
+    Move up to ``limit`` archivable items, oldest first, in the caller's
+    transaction; returns how many and the ids of their users.
+    """
+    rows = (
+        conn.execute(
+            select(Item.__table__)
+            .where(archivable(cutoff))
+            .order_by(Item.updated_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        .mappings()
+        .all()
+    )
+    if not rows:
+        return 0, set()
+    conn.execute(insert(ItemArchive), [dict(row) for row in rows])
+    conn.execute(delete(Item).where(Item.id.in_([row["id"] for row in rows])))
+    return len(rows), {row["user_id"] for row in rows}
+
+
+def archive(
+    engine: Engine,
+    older_than: timedelta,
+    batch_size: int = 1000,
+    pause_seconds: float = 0.0,
+    log: Callable[[str], None] = print,
+) -> int:
+    """Archive the items of one database inactive for ``older_than``; returns how many."""
+    cutoff = datetime.now(UTC) - older_than
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            count, user_ids = archive_batch(conn, cutoff, batch_size)
+        # The users' default lists lost these items (other workers' memory
+        # caches catch up within cache_ttl_seconds)
+        if item_cache is not None:
+            for user_id in user_ids:
+                item_cache.invalidate(str(user_id))
+        total += count
+        if count < batch_size:
+            return total
+        log(f"archived {total} items")
+        time.sleep(pause_seconds)
+
+
+def status(engine: Engine, older_than: timedelta) -> dict[str, Any]:
+    """Items in the hot table, how many of them are due, and archived items."""
+    cutoff = datetime.now(UTC) - older_than
+    with engine.connect() as conn:
+        hot = conn.execute(select(func.count()).select_from(Item)).scalar_one()
+        due = conn.execute(
+            select(func.count()).select_from(Item).where(archivable(cutoff))
+        ).scalar_one()
+        archived = conn.execute(select(func.count()).select_from(ItemArchive)).scalar_one()
+    return {"items": hot, "due": due, "archived": archived}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run")
+    for sub in (commands.add_parser("status"), run):
+        sub.add_argument("--older-than-days", type=float, default=settings.archive_after_days)
+    run.add_argument("--batch-size", type=int, default=settings.archive_batch_size)
+    run.add_argument("--pause", type=float, default=0.0, help="seconds between batches")
+    args = parser.parse_args()
+
+    older_than = timedelta(days=args.older_than_days)
+    for number, engine in enumerate(data_engines()):
+        name = f"shard {number}" if shard_router.enabled else "database"
+        if args.command == "status":
+            report = status(engine, older_than)
+            print(f"{name}: " + ", ".join(f"{key} {value}" for key, value in report.items()))
+        else:
+            print(f"{name}: archived {archive(engine, older_than, args.batch_size, args.pause)} items")
+
+
+if __name__ == "__main__":
+    main()
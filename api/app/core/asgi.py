@@ -0,0 +1,17 @@
+"""Small helpers shared by the raw ASGI middlewares."""
+
+from starlette.types import Scope
+
+
+def get_header(scope: Scope, name: bytes) -> str | None:
+    """Return a request header value; ``name`` must be lower-case bytes."""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def route_path(scope: Scope) -> str:
+    """Route template (e.g. ``/items/{item_id}``) once routing has run, else the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope["path"]
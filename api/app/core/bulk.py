@@ -0,0 +1,144 @@
+"""
+NDJSON and CSV encoding and decoding for bulk exports and imports.
+
+Encoders turn an iterator of row batches into an iterator of byte chunks,
+one chunk per batch, so a streamed export holds a single batch in memory.
+Values render as they do in JSON responses (UUIDs as strings, UTC datetimes
+with ``Z``); in CSV, None is an empty cell.
+
+Decoders go the other way, from an iterator of body chunks to numbered
+records, holding at most one line (or one quoted multi-line CSV record) at
+a time. A record that cannot be parsed is yielded as its error, so one bad
+line does not stop an import.
+"""
+
+import codecs
+import csv
+import io
+import uuid
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime
+from typing import Any, Literal
+
+import orjson
+
+from app.core.responses import dumps
+
+BulkFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def ndjson_chunks(batches: Iterable[Sequence[dict[str, Any]]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(dumps(row) + b"\n" for row in batch)
+
+
+def csv_chunks(
+    columns: Sequence[str], batches: Iterable[Sequence[dict[str, Any]]]
+) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_csv_value(row[column]) for column in columns] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: nothing was exported
+        yield buffer.getvalue().encode()
+
+
+def encode(
+    fmt: BulkFormat, columns: Sequence[str], batches: Iterable[Sequence[dict[str, Any]]]
+) -> Iterator[bytes]:
+    if fmt == "csv":
+        return csv_chunks(columns, batches)
+    return ndjson_chunks(batches)
+
+
+class RecordError(ValueError):
+    """A record that could not be parsed."""
+
+
+Record = tuple[int, dict[str, Any] | RecordError]
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Decode UTF-8 chunks into ``\\n``-terminated lines, across chunk boundaries.
+
+    Only ``\\n`` separates lines (``\\r`` is left for the parsers), since JSON
+    strings may contain other characters str.splitlines() would split on.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def ndjson_records(chunks: Iterable[bytes]) -> Iterator[Record]:
+    """Numbered objects of an NDJSON body (line numbers; blank lines skipped)."""
+    for number, line in enumerate(iter_lines(chunks), start=1):
+        if not line.strip():
+            continue
+        try:
+            value = orjson.loads(line)
+        except orjson.JSONDecodeError as err:
+            yield number, RecordError(f"Invalid JSON: {err}")
+            continue
+        if isinstance(value, dict):
+            yield number, value
+        else:
+            yield number, RecordError("Expected a JSON object")
+
+
+def csv_records(chunks: Iterable[bytes]) -> Iterator[Record]:
+    """Numbered rows of a CSV body with a header row; empty cells become None."""
+    reader = csv.reader(iter_lines(chunks))
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [name.strip() for name in header]
+    for number, cells in enumerate(reader, start=1):
+        if not any(cells):
+            continue
+        if len(cells) != len(columns):
+            yield number, RecordError(f"Expected {len(columns)} columns, got {len(cells)}")
+            continue
+        yield number, {column: cell or None for column, cell in zip(columns, cells, strict=True)}
+
+
+def decode(fmt: BulkFormat, chunks: Iterable[bytes]) -> Iterator[Record]:
+    if fmt == "csv":
+        return csv_records(chunks)
+    return ndjson_records(chunks)
+
+
+def format_for(content_type: str | None) -> BulkFormat | None:
+    """Bulk format named by a Content-Type header, if any."""
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
@@ -0,0 +1,282 @@
+"""
+Read-through cache for per-user data.
+
+Values are stored as MessagePack bytes under ``<namespace>:<scope>:<version>:<key>``.
+Each scope (e.g. a user id) has a random version token; invalidating a scope
+drops the token, so every entry written under the old one becomes
+unreachable at once, across workers when the backend is shared. Misses on
+the same key are loaded by one thread while the others wait for its result
+(stampede protection, via SingleFlight), and TTLs are jittered so entries filled together do
+not expire together.
+
+The in-process ``MemoryBackend`` is per worker; ``RedisBackend`` (the "cache"
+extra) is shared between workers and hosts.
+"""
+
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any, Protocol, TypeVar
+
+import msgpack
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.msgpack_codec import UUID_EXT_CODE
+from app.core.singleflight import SingleFlight
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None  # type: ignore[assignment, unused-ignore]
+
+T = TypeVar("T")
+
+DATETIME_EXT_CODE = 2
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(UUID_EXT_CODE, obj.bytes)
+    if isinstance(obj, datetime):
+        # ISO text keeps naive datetimes naive, so hits render like misses.
+        return msgpack.ExtType(DATETIME_EXT_CODE, obj.isoformat().encode())
+    raise TypeError(f"Cannot cache {type(obj).__name__}")
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == UUID_EXT_CODE:
+        return uuid.UUID(bytes=data)
+    if code == DATETIME_EXT_CODE:
+        return datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_default, use_bin_type=True)
+
+
+def loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False)
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set only if absent; returns whether the value was stored."""
+        ...
+
+    def delete(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry TTL, bounded by entry count and bytes."""
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+            }
+
+    def _store(self, key: str, value: bytes, ttl: float) -> None:
+        self._remove(key)
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(key) + len(entry[1])
+
+
+class RedisBackend:
+    """Backend shared by all workers; needs the optional ``redis`` package."""
+
+    def __init__(self, url: str) -> None:
+        if redis is None:
+            raise RuntimeError("cache_backend='redis' requires the 'cache' extra (redis)")
+        self._client = redis.Redis.from_url(url)
+        self.url = url
+
+    def get(self, key: str) -> bytes | None:
+        value = self._client.get(key)
+        return value if isinstance(value, bytes) else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._client.set(key, value, px=max(int(ttl * 1000), 1))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(self._client.set(key, value, px=max(int(ttl * 1000), 1), nx=True))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    def clear(self) -> None:
+        # Only invalidation is ever needed; never FLUSHDB a shared server.
+        pass
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "redis"}
+
+
+class Cache:
+    """Versioned read-through cache over a backend, with hit-rate metrics."""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str,
+        ttl: float = 30.0,
+        jitter: float = 0.1,
+    ) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._flight = SingleFlight(f"cache.{namespace}")
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_load(self, scope: str, key: str, loader: Callable[[], T]) -> T:
+        """
+        Return the cached value for ``key`` in ``scope``, loading it on a miss.
+
+        Concurrent misses for the same key run ``loader`` once; the other
+        callers block until it finishes and then read its result.
+        """
+        full_key = f"{self.namespace}:{scope}:{self._version(scope)}:{key}"
+        cached = self.backend.get(full_key)
+        if cached is not None:
+            self._count_hit()
+            return loads(cached)
+
+        def load() -> T:
+            self._count_miss()
+            value = loader()
+            self.backend.set(full_key, dumps(value), self._jittered_ttl())
+            return value
+
+        return self._flight.do(full_key, load)
+
+    def invalidate(self, scope: str) -> None:
+        """Make every entry of ``scope`` unreachable (call after the write commits)."""
+        self.backend.delete(self._version_key(scope))
+        metrics.inc(f"cache.{self.namespace}.invalidations")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        waits = self._flight.stats()["coalesced"]
+        lookups = hits + misses + waits
+        return {
+            "hits": hits,
+            "misses": misses,
+            "stampede_waits": waits,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "ttl_seconds": self.ttl,
+            **self.backend.stats(),
+        }
+
+    def _version_key(self, scope: str) -> str:
+        return f"{self.namespace}:{scope}:version"
+
+    def _version(self, scope: str) -> str:
+        """Current version token of a scope, creating one if it has none."""
+        version_key = self._version_key(scope)
+        version = self.backend.get(version_key)
+        if version is None:
+            # Random, not a counter: a token lost to eviction can never recur.
+            self.backend.add(version_key, uuid.uuid4().hex[:12].encode(), self.ttl * 10)
+            version = self.backend.get(version_key) or b"0"
+        return version.decode()
+
+    def _jittered_ttl(self) -> float:
+        return self.ttl * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _count_hit(self) -> None:
+        with self._lock:
+            self._hits += 1
+        metrics.inc(f"cache.{self.namespace}.hits")
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self._misses += 1
+        metrics.inc(f"cache.{self.namespace}.misses")
+
+
+def _build_backend() -> CacheBackend:
+    if settings.cache_backend == "redis":
+        return RedisBackend(settings.cache_redis_url)
+    return MemoryBackend(settings.cache_max_entries, settings.cache_max_bytes)
+
+
+item_cache: Cache | None = None
+if settings.cache_backend != "none":
+    item_cache = Cache(_build_backend(), "items", settings.cache_ttl_seconds)
+    metrics.register("item_cache", item_cache.stats)
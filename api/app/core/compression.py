@@ -0,0 +1,219 @@
+"""
+Negotiated response compression.
+
+Picks zstd, br or gzip from Accept-Encoding (brotli and zstandard are optional
+packages; gzip is always available). Small complete bodies, already encoded
+responses and non-text content types are passed through. Streaming responses
+are compressed chunk by chunk with a sync flush after each chunk, so nothing
+is buffered whole and clients see data as it is produced.
+"""
+
+import zlib
+from collections.abc import Callable
+from typing import Protocol
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.asgi import get_header
+from app.core.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None  # type: ignore[assignment, unused-ignore]
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment, unused-ignore]
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/msgpack",
+    "application/problem+json",
+)
+
+
+class Encoder(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipEncoder:
+    def __init__(self, level: int) -> None:
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int) -> None:
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int) -> None:
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encoders(levels: dict[str, int]) -> dict[str, Callable[[], Encoder]]:
+    """Encoder factories in server preference order, skipping missing packages."""
+    encoders: dict[str, Callable[[], Encoder]] = {}
+    if zstandard is not None:
+        encoders["zstd"] = lambda: ZstdEncoder(levels["zstd"])
+    if brotli is not None:
+        encoders["br"] = lambda: BrotliEncoder(levels["br"])
+    encoders["gzip"] = lambda: GzipEncoder(levels["gzip"])
+    return encoders
+
+
+def negotiate(accept_encoding: str | None, supported: list[str]) -> str | None:
+    """
+    Choose an encoding from an Accept-Encoding header.
+
+    Highest q-value wins; ties go to the earliest entry in ``supported``.
+    """
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        levels: dict[str, int] | None = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = available_encoders({"gzip": 6, "br": 4, "zstd": 3, **(levels or {})})
+        self._supported = list(self.encoders)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(get_header(scope, b"accept-encoding"), self._supported)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, coding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, coding: str, send: Send) -> None:
+        self._middleware = middleware
+        self._coding = coding
+        self._send = send
+        self._start: Message | None = None
+        self._encoder: Encoder | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                self._passthrough = True
+                await self._send(message)
+            else:
+                # Held back until the first body chunk shows whether to compress.
+                self._start = message
+            return
+
+        if self._passthrough or message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self._middleware.minimum_size:
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            self._encoder = self._middleware.encoders[self._coding]()
+            headers["Content-Encoding"] = self._coding
+            del headers["content-length"]
+            if not more_body:
+                compressed = self._encoder.compress(body) + self._encoder.finish()
+                headers["Content-Length"] = str(len(compressed))
+                _record(self._coding, len(body), len(compressed))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send(start)
+
+        assert self._encoder is not None
+        if more_body:
+            chunk = self._encoder.compress(body) + self._encoder.flush()
+        else:
+            chunk = self._encoder.compress(body) + self._encoder.finish()
+        _record(self._coding, len(body), len(chunk))
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+def _record(coding: str, raw: int, compressed: int) -> None:
+    metrics.inc(f"compression.{coding}.bytes_in", raw)
+    metrics.inc(f"compression.{coding}.bytes_out", compressed)
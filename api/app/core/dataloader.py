@@ -0,0 +1,105 @@
+"""
+Dataloader-style batching of lookups by key across concurrent requests.
+
+The first ``load`` of a window opens a batch and waits up to ``window``
+seconds (or until ``max_batch_size`` keys have joined); every ``load`` made
+meanwhile, from any request thread, joins it. The opener then resolves all
+keys with one ``fetch(keys)`` call, e.g. a ``WHERE id IN (...)`` query, and
+wakes the others. Duplicate keys share one slot. Loads of different ``group``s (e.g. shards,
+whose keys cannot be fetched by one query) are batched separately.
+Disabled, ``load`` is a direct single-key fetch.
+
+Fetch results are shared between requests, so they should be plain column
+values; ``attach`` turns one into an instance of the caller's own session.
+"""
+
+import threading
+from collections.abc import Callable, Hashable, Sequence
+from typing import Any
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.metrics import metrics
+
+
+class _Batch:
+    __slots__ = ("keys", "full", "done", "results", "error")
+
+    def __init__(self) -> None:
+        self.keys: dict[Hashable, None] = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: dict[Any, Any] = {}
+        self.error: Exception | None = None
+
+
+class BatchLoader[K: Hashable, V]:
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = True,
+        window: float = 0.002,
+        max_batch_size: int = 100,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._open: dict[Hashable, _Batch] = {}
+
+    def load(
+        self, key: K, fetch: Callable[[Sequence[K]], dict[K, V]], group: Hashable = None
+    ) -> V | None:
+        """
+        Resolve ``key`` together with the other keys loaded in this window.
+
+        ``fetch`` returns a mapping for the keys it found; missing keys resolve
+        to None. Only the batch opener's ``fetch`` runs, so it must not depend
+        on anything but the keys and a usable session. A failed fetch raises
+        in every request of the batch.
+        """
+        if not self.enabled:
+            return fetch([key]).get(key)
+
+        with self._lock:
+            batch = self._open.get(group)
+            opener = batch is None
+            if batch is None:
+                batch = self._open[group] = _Batch()
+            batch.keys[key] = None
+            if len(batch.keys) >= self.max_batch_size:
+                del self._open[group]
+                batch.full.set()
+
+        if opener:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open.get(group) is batch:
+                    del self._open[group]
+            keys: list[Any] = list(batch.keys)
+            metrics.observe(f"dataloader.{self.name}.batch_size", len(keys))
+            try:
+                batch.results = fetch(keys)
+            except Exception as err:
+                batch.error = err
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results.get(key)
+
+
+def attach[M](db: Session, model: type[M], state: dict[str, Any]) -> M:
+    """
+    Make a persistent instance of ``db`` from column values, without a query.
+
+    Used for rows fetched on behalf of other requests, so no ORM instance is
+    shared across sessions.
+    """
+    instance = model(**state)
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
@@ -1,16 +1,433 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import deque
 from collections.abc import Generator
+from typing import Any
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import Engine, create_engine, event, exc, inspect, make_url, select
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.directory import DirectoryEntry, ShardSlot
+from app.models.job import Job
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class PoolStats:
+    """Sliding window of connection checkout waits and database errors."""
+
+    def __init__(self, window_seconds: float, max_events: int = 10_000) -> None:
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._checkouts: deque[tuple[float, float]] = deque(maxlen=max_events)
+        self._errors: deque[float] = deque(maxlen=max_events)
+
+    def record_checkout(self, wait_seconds: float) -> None:
+        with self._lock:
+            self._checkouts.append((time.monotonic(), wait_seconds))
+
+    def record_error(self) -> None:
+        with self._lock:
+            self._errors.append(time.monotonic())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._checkouts.clear()
+            self._errors.clear()
+
+    def summary(self) -> dict[str, Any]:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._checkouts and self._checkouts[0][0] < cutoff:
+                self._checkouts.popleft()
+            while self._errors and self._errors[0] < cutoff:
+                self._errors.popleft()
+            waits = sorted(wait for _, wait in self._checkouts)
+            errors = len(self._errors)
+        checkouts = len(waits)
+        return {
+            "window_seconds": self.window_seconds,
+            "checkouts": checkouts,
+            "errors": errors,
+            "error_rate": errors / checkouts if checkouts else 0.0,
+            "wait_avg_ms": sum(waits) / checkouts * 1000 if checkouts else 0.0,
+            "wait_p95_ms": waits[min(int(checkouts * 0.95), checkouts - 1)] * 1000 if checkouts else 0.0,
+            "wait_max_ms": waits[-1] * 1000 if checkouts else 0.0,
+        }
+
+
+pool_stats = PoolStats(settings.readiness_window_seconds)
+
+
+class CompiledCacheStats:
+    """
+    Where the SQL of each executed statement came from: the engine's compiled
+    cache (hit), a compilation that was then cached (miss), or a compilation
+    that cannot be cached (uncached, e.g. raw driver SQL).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "uncached": 0}
+
+    def record(self, cache_hit: Any) -> None:
+        if cache_hit is CacheStats.CACHE_HIT:
+            name = "hits"
+        elif cache_hit is CacheStats.CACHE_MISS:
+            name = "misses"
+        else:
+            name = "uncached"
+        with self._lock:
+            self._counts[name] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(self._counts, 0)
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        cacheable = counts["hits"] + counts["misses"]
+        return {
+            **counts,
+            "hit_ratio": counts["hits"] / cacheable if cacheable else 0.0,
+            "cache_size": settings.db_query_cache_size,
+        }
+
+
+compiled_cache_stats = CompiledCacheStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            pool_stats.record_error()
+            raise
+        finally:
+            pool_stats.record_checkout(time.perf_counter() - start)
+
+
+def pool_limits() -> tuple[int, int]:
+    """
+    This worker's ``(pool_size, max_overflow)``.
+
+    With ``db_max_connections`` set, the configured sizes are capped so that
+    ``web_concurrency`` workers together never open more connections than
+    that: persistent connections first, overflow from what is left.
+    """
+    pool_size, max_overflow = settings.db_pool_size, settings.db_max_overflow
+    if settings.db_max_connections is None:
+        return pool_size, max_overflow
+    workers = settings.web_concurrency or 1
+    share = settings.db_max_connections // workers
+    if share < 1:
+        raise ValueError(
+            f"db_max_connections={settings.db_max_connections} is less than one "
+            f"connection for each of {workers} workers"
+        )
+    pool_size = min(pool_size, share)
+    return pool_size, min(max_overflow, share - pool_size)
+
+
+_engines: dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def engine_for(url: str) -> Engine:
+    """The process-wide engine of a database URL, created on first use."""
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = _engines[url] = _create_engine(url)
+    return engine
+
+
+def get_engine() -> Engine:
+    """
+    The primary database's engine, created on first use rather than at import.
+
+    Importing the app then loads no database driver and opens no pool, which
+    keeps cold starts (and tools that only import models) fast.
+    """
+    return engine_for(settings.database_url)
+
+
+def dispose_engines(close: bool = True) -> None:
+    """
+    Dispose of every engine created so far (primary and shards).
+
+    ``close=False`` drops the pooled connections without closing them, for a
+    forked child that must not touch its parent's sockets.
+    """
+    with _engines_lock:
+        engines = list(_engines.values())
+    for engine in engines:
+        engine.dispose(close=close)
+
+
+def _create_engine(url: str) -> Engine:
+    pool_size, max_overflow = pool_limits()
+    engine = create_engine(
+        url,
+        pool_pre_ping=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        query_cache_size=settings.db_query_cache_size,
+        connect_args=_connect_args(url),
+    )
+    event.listen(engine, "handle_error", _count_db_error)
+    event.listen(engine, "after_cursor_execute", _record_compiled_cache)
+    return engine
+
+
+def _connect_args(database_url: str) -> dict[str, Any]:
+    driver = make_url(database_url).get_driver_name()
+    # psycopg 3 prepares a statement server-side once a connection has run it
+    # prepare_threshold times; psycopg2 has no server-side prepared statements.
+    if driver == "psycopg":
+        return {"prepare_threshold": settings.db_prepare_threshold}
+    # Pooled connections are used from whichever request thread checks them out
+    if driver == "pysqlite":
+        return {"check_same_thread": False}
+    return {}
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _count_db_error(exception_context: Any) -> None:
+    # Only failures of the database itself count toward readiness: a burst of
+    # constraint violations from bad client input says nothing about its health.
+    if exception_context.is_disconnect or isinstance(
+        exception_context.sqlalchemy_exception, exc.OperationalError | exc.TimeoutError
+    ):
+        pool_stats.record_error()
+
+
+def _record_compiled_cache(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        compiled_cache_stats.record(context.cache_hit)
+
+
+def pool_status() -> dict[str, Any]:
+    """Current pool occupancy plus the recent checkout window."""
+    pool = get_engine().pool
+    pool_size, max_overflow = pool_limits()
+    capacity = pool_size + max_overflow
+    checked_out = pool.checkedout() if isinstance(pool, QueuePool) else 0
+    return {
+        "size": pool_size,
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "saturation": checked_out / capacity if capacity else 0.0,
+        **pool_stats.summary(),
+    }
+
+
+metrics.register("db_pool", pool_status)
+metrics.register("db_compiled_cache", compiled_cache_stats.summary)
+
+
+# Sharding by user id. A user id hashes to one of SHARD_SLOTS slots and each
+# slot lives on one shard; moving slots between shards (app/core/resharding.py)
+# rebalances data without rehashing anyone.
+SHARD_SLOTS = 1024
+
+# Tables that live in the primary database only, whatever the shard
+GLOBAL_TABLES = frozenset({DirectoryEntry.__table__, ShardSlot.__table__, Job.__table__})
+
+
+class ShardRoutingError(RuntimeError):
+    """User data queried before its shard was chosen, or on another user's shard."""
+
+
+class SlotFrozenError(RuntimeError):
+    """A write to user data whose slot is being moved to another shard."""
+
+
+def slot_for(user_id: uuid.UUID) -> int:
+    """Hash slot of a user id, the same in every process and deployment."""
+    digest = hashlib.blake2b(user_id.bytes, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % SHARD_SLOTS
+
+
+class ShardRouter:
+    """
+    Maps user ids to shard databases.
+
+    Slot ``s`` lives on shard ``s % len(shard_urls)`` unless the ``shard_slots``
+    table of the primary database places it elsewhere or freezes it. Workers
+    re-read that table at most every ``refresh_seconds`` (one thread reads, the
+    others keep the previous map meanwhile), so a change to it reaches every
+    worker within that time.
+    """
+
+    def __init__(self, shard_urls: list[str], primary_url: str, refresh_seconds: float) -> None:
+        self.shard_urls = list(shard_urls)
+        self.primary_url = primary_url
+        self.refresh_seconds = refresh_seconds
+        self._placements: dict[int, tuple[int, bool]] = {}
+        self._loaded_at: float | None = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.shard_urls)
+
+    def engine(self, shard: int) -> Engine:
+        return engine_for(self.shard_urls[shard])
+
+    def engines(self) -> list[Engine]:
+        return [self.engine(shard) for shard in range(len(self.shard_urls))]
+
+    def primary_engine(self) -> Engine:
+        return engine_for(self.primary_url)
+
+    def default_shard(self, slot: int) -> int:
+        return slot % len(self.shard_urls)
+
+    def placement(self, slot: int) -> tuple[int, bool]:
+        """``(shard, frozen)`` of a slot, as of the last read of the slot map."""
+        self._maybe_refresh()
+        return self._placements.get(slot, (self.default_shard(slot), False))
+
+    def shard_for(self, user_id: uuid.UUID) -> int:
+        return self.placement(slot_for(user_id))[0]
+
+    def refresh(self) -> None:
+        """Re-read the slot map from the primary database now."""
+        with self.primary_engine().connect() as conn:
+            rows = conn.execute(select(ShardSlot.slot, ShardSlot.shard, ShardSlot.frozen)).all()
+        self._placements = {slot: (shard, frozen) for slot, shard, frozen in rows}
+        self._loaded_at = time.monotonic()
+
+    def _maybe_refresh(self) -> None:
+        if self._loaded_at is None:
+            with self._refresh_lock:
+                if self._loaded_at is None:
+                    self.refresh()
+        elif (
+            time.monotonic() - self._loaded_at >= self.refresh_seconds
+            and self._refresh_lock.acquire(blocking=False)
+        ):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+    def session(self) -> "ShardedSession":
+        return ShardedSessionLocal(router=self)
+
+
+class ShardedSession(Session):
+    """
+    Request session of a sharded deployment.
+
+    Global tables go to the primary database. Everything else goes to the
+    shard of the user chosen with ``use_user`` (by get_current_user, or by a
+    directory lookup before login); a session serves a single user.
+    """
+
+    def __init__(self, router: ShardRouter, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.router = router
+        self.shard: int | None = None
+        self.slot: int | None = None
+
+    def use_user(self, user_id: uuid.UUID) -> int:
+        """Route user data to the shard of ``user_id``; returns the shard."""
+        slot = slot_for(user_id)
+        shard, _ = self.router.placement(slot)
+        if self.shard is not None and self.shard != shard:
+            raise ShardRoutingError(
+                f"Session is routed to shard {self.shard}, user {user_id} lives on shard {shard}"
+            )
+        self.shard, self.slot = shard, slot
+        return shard
+
+    def get_bind(self, mapper: Any = None, **kwargs: Any) -> Engine:
+        if mapper is not None and inspect(mapper).local_table in GLOBAL_TABLES:
+            return self.router.primary_engine()
+        if self.shard is None:
+            raise ShardRoutingError("Query of user data before the user's shard was selected")
+        return self.router.engine(self.shard)
+
+    def check_writable(self) -> None:
+        """Raise SlotFrozenError while this session's slot is being moved."""
+        if self.slot is not None and self.router.placement(self.slot)[1]:
+            raise SlotFrozenError(f"Slot {self.slot} is being moved, retry shortly")
+
+
+ShardedSessionLocal = sessionmaker(class_=ShardedSession, autoflush=False)
+
+
+@event.listens_for(ShardedSession, "before_flush")
+def _check_flush(session: ShardedSession, flush_context: UOWTransaction, instances: Any) -> None:
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(inspect(obj).mapper.local_table not in GLOBAL_TABLES for obj in changed):
+        session.check_writable()
+
+
+@event.listens_for(ShardedSession, "do_orm_execute")
+def _check_bulk_write(state: ORMExecuteState) -> None:
+    # insert()/update()/delete() statements bypass the flush
+    if state.is_insert or state.is_update or state.is_delete:
+        mapper = state.bind_mapper
+        if mapper is None or mapper.local_table not in GLOBAL_TABLES:
+            state.session.check_writable()  # type: ignore[attr-defined]
+
+
+def use_shard(db: Session, user_id: uuid.UUID) -> None:
+    """Route ``db`` to the shard of ``user_id`` (a no-op unless sharded)."""
+    if isinstance(db, ShardedSession):
+        db.use_user(user_id)
+
+
+def check_writable(db: Session) -> None:
+    """
+    Raise SlotFrozenError if ``db``'s slot is being moved (a no-op unless
+    sharded), for writes that another request's session will flush.
+    """
+    if isinstance(db, ShardedSession):
+        db.check_writable()
+
+
+def is_sharded(db: Session) -> bool:
+    return isinstance(db, ShardedSession)
+
+
+def current_shard(db: Session) -> int | None:
+    """The shard ``db`` is routed to; None when not sharded (or not yet routed)."""
+    return db.shard if isinstance(db, ShardedSession) else None
+
+
+shard_router = ShardRouter(
+    settings.shard_urls, settings.database_url, settings.shard_map_refresh_seconds
+)
+
+
+def data_engines() -> list[Engine]:
+    """Every database holding user data, for batch jobs: the shards, or just the primary."""
+    return shard_router.engines() if shard_router.enabled else [get_engine()]
 
 
 def get_db() -> Generator[Session]:
-    db = SessionLocal()
+    """
+    Request session. Sharded, it is routed once the user is known (see
+    ShardedSession); otherwise it is bound to the single database.
+    """
+    db = shard_router.session() if shard_router.enabled else SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
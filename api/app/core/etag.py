@@ -0,0 +1,73 @@
+"""
+ETag helpers for conditional requests.
+
+A resource *version* is a short hash of whatever identifies its state (for
+an item, ``id`` + ``updated_at``; for a list, a per-user watermark). The ETag
+sent to clients is the version, plus a suffix naming the representation when
+it is not the default full JSON one (``?fields=`` or MessagePack), so each
+representation keeps a distinct strong validator. If-Match preconditions
+compare versions only, since they guard resource state, not bytes.
+"""
+
+import hashlib
+from typing import Any
+
+from fastapi import HTTPException, Response, status
+
+
+def version_tag(*parts: Any) -> str:
+    """Stable short hash of the values identifying a resource state."""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def make_etag(version: str, *variant: Any) -> str:
+    """Quoted strong ETag for a version and representation variant."""
+    if any(part for part in variant):
+        return f'"{version}.{version_tag(*variant)[:8]}"'
+    return f'"{version}"'
+
+
+def _parse(header: str) -> list[str]:
+    tags = []
+    for raw in header.split(","):
+        tag = raw.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+def none_match(if_none_match: str | None, etag: str) -> bool:
+    """Whether If-None-Match matches ``etag`` (weak comparison, per RFC 9110)."""
+    if if_none_match is None:
+        return False
+    tags = _parse(if_none_match)
+    return "*" in tags or etag in tags
+
+
+def check_if_match(if_match: str | None, version: str) -> None:
+    """
+    Enforce an If-Match precondition against a resource version.
+
+    Raises:
+        HTTPException: 412 if the header is present and does not match
+    """
+    if if_match is None:
+        return
+    for raw in if_match.split(","):
+        tag = raw.strip()
+        if tag == "*" or (not tag.startswith("W/") and tag.strip('"').split(".", 1)[0] == version):
+            return
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Resource has been modified",
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
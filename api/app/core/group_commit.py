@@ -0,0 +1,103 @@
+"""
+Group commit: concurrent writes from many requests share one transaction.
+
+Like BatchLoader, the first ``submit`` of a window opens a batch and waits
+up to ``max_delay`` seconds (or until ``max_batch_size`` values have
+joined); every ``submit`` made meanwhile, from any request thread, joins it.
+The opener then writes all values with one ``write(values)`` call, e.g. a
+multi-row INSERT and a single commit, and wakes the others: the database
+pays for one commit (and fsync) per batch instead of per request. Values of
+different ``group``s (e.g. shards) are written separately. Disabled,
+``submit`` writes its value alone.
+
+``write`` returns one result per value, in order; a result that is an
+exception is raised in that value's request only, so one bad row does not
+fail its neighbours. An exception raised by ``write`` itself fails the whole
+batch. Results are shared between threads, so they should be plain column
+values (see ``attach``).
+"""
+
+import threading
+from collections.abc import Callable, Hashable, Sequence
+from typing import Any
+
+from app.core.metrics import metrics
+
+
+class _Batch:
+    __slots__ = ("values", "full", "done", "results", "error")
+
+    def __init__(self) -> None:
+        self.values: list[Any] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: Sequence[Any] = ()
+        self.error: Exception | None = None
+
+
+class GroupCommitter[T, R]:
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = True,
+        max_delay: float = 0.002,
+        max_batch_size: int = 100,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._open: dict[Hashable, _Batch] = {}
+
+    def submit(
+        self,
+        value: T,
+        write: Callable[[Sequence[T]], Sequence[R | Exception]],
+        group: Hashable = None,
+    ) -> R:
+        """
+        Write ``value`` together with the others submitted in this window and
+        return its result.
+
+        Only the batch opener's ``write`` runs, so it must not depend on
+        anything but the values and a usable session.
+        """
+        if not self.enabled:
+            return self._result(write([value])[0])
+
+        with self._lock:
+            batch = self._open.get(group)
+            opener = batch is None
+            if batch is None:
+                batch = self._open[group] = _Batch()
+            index = len(batch.values)
+            batch.values.append(value)
+            if len(batch.values) >= self.max_batch_size:
+                del self._open[group]
+                batch.full.set()
+
+        if opener:
+            batch.full.wait(self.max_delay)
+            with self._lock:
+                if self._open.get(group) is batch:
+                    del self._open[group]
+            metrics.observe(f"group_commit.{self.name}.batch_size", len(batch.values))
+            try:
+                batch.results = write(batch.values)
+            except Exception as err:
+                batch.error = err
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return self._result(batch.results[index])
+
+    @staticmethod
+    def _result(result: R | Exception) -> R:
+        if isinstance(result, Exception):
+            raise result
+        return result
@@ -0,0 +1,79 @@
+"""
+Readiness probe.
+
+Checks database connectivity and pool health, caching the result for a short
+interval so load balancer probes cost nothing under load.
+"""
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import get_engine, pool_status
+
+
+class ReadinessProbe:
+    def __init__(self, cache_seconds: float) -> None:
+        self.cache_seconds = cache_seconds
+        self._lock = threading.Lock()
+        self._result: dict[str, Any] | None = None
+        self._checked_at = 0.0
+
+    def check(self) -> dict[str, Any]:
+        """
+        Return the cached result, refreshing it when stale.
+
+        Concurrent probes during a refresh get the previous result instead of
+        queueing behind it.
+        """
+        result = self._result
+        if result is not None and time.monotonic() - self._checked_at < self.cache_seconds:
+            return result
+        if not self._lock.acquire(blocking=result is None):
+            assert result is not None
+            return result
+        try:
+            result = self._run_checks()
+            self._result = result
+            self._checked_at = time.monotonic()
+            return result
+        finally:
+            self._lock.release()
+
+    def invalidate(self) -> None:
+        self._result = None
+
+    def _run_checks(self) -> dict[str, Any]:
+        pool = pool_status()
+        reasons = []
+        if pool["saturation"] >= settings.readiness_max_pool_saturation:
+            reasons.append("pool saturated")
+        if pool["wait_p95_ms"] > settings.readiness_max_pool_wait_ms:
+            reasons.append("pool wait time high")
+        if pool["error_rate"] > settings.readiness_max_error_rate:
+            reasons.append("database error rate high")
+
+        database = "ok"
+        if pool["checked_out"] >= pool["size"] + pool["max_overflow"]:
+            # Probing would block for pool_timeout behind real requests.
+            database = "skipped"
+        else:
+            try:
+                with get_engine().connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except Exception as err:
+                database = f"unavailable: {type(err).__name__}"
+
+        if database.startswith("unavailable"):
+            status = "unavailable"
+        elif reasons:
+            status = "degraded"
+        else:
+            status = "ok"
+        return {"status": status, "database": database, "reasons": reasons, "pool": pool}
+
+
+readiness_probe = ReadinessProbe(settings.readiness_cache_seconds)
@@ -0,0 +1,135 @@
+"""
+Reconciliation of the per-user item counts in user_item_stats.
+
+ItemRepository keeps the counts exact for writes that go through it; writes
+that do not (manual SQL, restores from backup, a bug) make them drift. This
+job recounts each user's items, archived ones included, and compares: users
+in id order, ``batch_size`` per transaction, so it can run while the app
+serves traffic. A batch locks the users' stats rows before counting, so a
+concurrent write either finished before the count or adds its change on top
+of the repaired value.
+
+    python -m app.core.item_stats check
+    python -m app.core.item_stats reconcile --batch-size 1000 --pause 0.05
+"""
+
+import argparse
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from sqlalchemy import Engine, case, func, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from app.core.db import data_engines, shard_router
+from app.models import User
+from app.models.item import Item, ItemArchive, UserItemStats
+
+# Keyset start below every uuid4 (which never is all zeros)
+FIRST = uuid.UUID(int=0)
+
+Counts = tuple[int, int]
+
+
+def actual_counts(conn: Connection, user_ids: Sequence[uuid.UUID]) -> dict[uuid.UUID, Counts]:
+    """(total, active) of these users, counted from items and items_archive."""
+    rows = union_all(
+        *(
+            select(model.user_id, model.is_active).where(model.user_id.in_(user_ids))
+            for model in (Item, ItemArchive)
+        )
+    ).subquery()
+    stmt = select(
+        rows.c.user_id, func.count(), func.sum(case((rows.c.is_active, 1), else_=0))
+    ).group_by(rows.c.user_id)
+    return {user_id: (total, int(active)) for user_id, total, active in conn.execute(stmt)}
+
+
+def _set_stats(conn: Connection) -> Any:
+    stmt = (postgresql if conn.dialect.name == "postgresql" else sqlite).insert(UserItemStats)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserItemStats.user_id],
+        set_={"total": stmt.excluded.total, "active": stmt.excluded.active, "updated_at": func.now()},
+    )
+
+
+def reconcile_batch(
+    conn: Connection, after: uuid.UUID, limit: int, repair: bool = True
+) -> tuple[uuid.UUID | None, dict[uuid.UUID, tuple[Counts, Counts]]]:
+    """
+    Check the users with ids above ``after``, up to ``limit`` of them, in the
+    caller's transaction and repair their counts if ``repair``. Returns the
+    last user id (None when there are no more users) and the drifted users'
+    ``(stored, actual)`` counts.
+    """
+    user_ids = list(
+        conn.execute(select(User.id).where(User.id > after).order_by(User.id).limit(limit)).scalars()
+    )
+    if not user_ids:
+        return None, {}
+    stored: dict[uuid.UUID, Counts] = {
+        user_id: (total, active)
+        for user_id, total, active in conn.execute(
+            select(UserItemStats.user_id, UserItemStats.total, UserItemStats.active)
+            .where(UserItemStats.user_id.in_(user_ids))
+            .with_for_update()
+        )
+    }
+    actual = actual_counts(conn, user_ids)
+    drift = {
+        user_id: (stored.get(user_id, (0, 0)), actual.get(user_id, (0, 0)))
+        for user_id in user_ids
+        if stored.get(user_id, (0, 0)) != actual.get(user_id, (0, 0))
+    }
+    if repair and drift:
+        conn.execute(
+            _set_stats(conn),
+            [
+                {"user_id": user_id, "total": total, "active": active}
+                for user_id, (_, (total, active)) in drift.items()
+            ],
+        )
+    return user_ids[-1], drift
+
+
+def reconcile(
+    engine: Engine,
+    batch_size: int = 1000,
+    repair: bool = True,
+    pause_seconds: float = 0.0,
+    log: Callable[[str], None] = print,
+) -> dict[uuid.UUID, tuple[Counts, Counts]]:
+    """Check (and repair) every user of one database; returns the drifted users."""
+    after: uuid.UUID | None = FIRST
+    drifted: dict[uuid.UUID, tuple[Counts, Counts]] = {}
+    while after is not None:
+        with engine.begin() as conn:
+            after, drift = reconcile_batch(conn, after, batch_size, repair)
+        for user_id, (stored, actual) in drift.items():
+            log(f"user {user_id}: stored (total, active) {stored}, counted {actual}")
+        drifted.update(drift)
+        if after is not None:
+            time.sleep(pause_seconds)
+    return drifted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("check", "reconcile"):
+        sub = commands.add_parser(name)
+        sub.add_argument("--batch-size", type=int, default=1000)
+        sub.add_argument("--pause", type=float, default=0.0, help="seconds between batches")
+    args = parser.parse_args()
+
+    repair = args.command == "reconcile"
+    for number, engine in enumerate(data_engines()):
+        name = f"shard {number}" if shard_router.enabled else "database"
+        drifted = reconcile(engine, args.batch_size, repair, args.pause)
+        print(f"{name}: {len(drifted)} users {'repaired' if repair else 'drifted'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Background jobs: handlers, and the worker that runs queued jobs.
+
+Work too slow for a request (archiving, reconciliation, ...) is queued in
+the ``jobs`` table with ``JobRepository(db).enqueue(kind, payload)`` and run
+by worker processes, each running up to ``job_worker_concurrency`` jobs at
+once on a thread pool:
+
+    python -m app.core.jobs worker
+    python -m app.core.jobs enqueue archive_items --payload '{"older_than_days": 30}'
+    python -m app.core.jobs stats
+    python -m app.core.jobs purge --older-than-days 7
+
+A worker claims due jobs in batches (SELECT ... FOR UPDATE SKIP LOCKED, so
+any number of workers share the queue without contention) and only as many
+as it has free slots. A job that raises is retried with exponential backoff
+until it is out of attempts, then marked failed with its last error. While
+jobs run the worker refreshes their heartbeat; a job whose heartbeat is
+older than ``job_lease_seconds`` (its worker died) is queued again, so jobs
+run at least once and handlers should be idempotent. Database errors (a
+dropped connection, the jobs table not migrated yet) are logged and retried
+after ``job_poll_interval_seconds``. SIGTERM stops claiming and waits for the
+running jobs.
+
+Handlers are registered with ``@job("kind")`` and take the JSON payload.
+Workers record per-kind counters and summaries (``jobs.<kind>.wait_seconds``
+from due to start, ``jobs.<kind>.run_seconds``) and sample the queue depth
+into the ``job_queue`` collector.
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import traceback
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.archiving import archive
+from app.core.config import settings
+from app.core.db import SessionLocal, data_engines, get_engine
+from app.core.item_stats import reconcile
+from app.core.metrics import metrics
+from app.repositories.job import JobRepository
+
+Handler = Callable[[dict[str, Any]], None]
+
+handlers: dict[str, Handler] = {}
+
+
+def job(kind: str) -> Callable[[Handler], Handler]:
+    """Register the decorated function as the handler of ``kind`` jobs."""
+
+    def register(handler: Handler) -> Handler:
+        handlers[kind] = handler
+        return handler
+
+    return register
+
+
+def backoff(attempts: int, base: float, cap: float) -> float:
+    """Seconds before retrying after ``attempts`` failed attempts, jittered to spread retries."""
+    return min(cap, base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+
+def _primary_session() -> Session:
+    return SessionLocal(bind=get_engine())
+
+
+class Worker:
+    def __init__(
+        self,
+        make_session: Callable[[], Session] = _primary_session,
+        concurrency: int = settings.job_worker_concurrency,
+        batch_size: int = settings.job_claim_batch_size,
+        poll_interval: float = settings.job_poll_interval_seconds,
+        lease_seconds: float = settings.job_lease_seconds,
+        worker_id: str | None = None,
+        log: Callable[[str], None] = print,
+    ) -> None:
+        self.make_session = make_session
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.log = log
+        self.queue: dict[str, Any] = {}
+        self._pool = ThreadPoolExecutor(concurrency, thread_name_prefix="job")
+        self._running: dict[Future[None], Any] = {}
+        self._last_heartbeat = 0.0
+
+    def run(self, stop: threading.Event) -> None:
+        """Run jobs until ``stop`` is set, then wait for the running ones."""
+        metrics.register("job_queue", lambda: dict(self.queue))
+        self.log(f"worker {self.worker_id}: {self.concurrency} slots")
+        try:
+            while not stop.is_set():
+                try:
+                    self._maintain()
+                    claimed = self.run_once()
+                except SQLAlchemyError as err:
+                    metrics.inc("jobs.worker_errors")
+                    self.log(f"worker {self.worker_id}: {type(err).__name__}: {err}")
+                    stop.wait(self.poll_interval)
+                    continue
+                if self._running and (claimed < self.batch_size or self.free_slots == 0):
+                    wait(self._running, self.poll_interval, return_when=FIRST_COMPLETED)
+                elif not claimed:
+                    stop.wait(self.poll_interval)
+        finally:
+            self.drain()
+
+    @property
+    def free_slots(self) -> int:
+        return self.concurrency - len(self._running)
+
+    def run_once(self) -> int:
+        """Claim as many due jobs as there are free slots and start them; returns how many."""
+        for future in [future for future in self._running if future.done()]:
+            del self._running[future]
+        limit = min(self.batch_size, self.free_slots)
+        if limit <= 0:
+            return 0
+        with self.make_session() as db:
+            claimed = JobRepository(db).claim(self.worker_id, limit, datetime.now(UTC))
+        for each in claimed:
+            self._running[self._pool.submit(self._execute, each)] = each["id"]
+        return len(claimed)
+
+    def drain(self) -> None:
+        """Wait for the running jobs to finish."""
+        self._pool.shutdown(wait=True)
+        self._running.clear()
+
+    def _maintain(self) -> None:
+        """Every third of a lease: heartbeat the running jobs, requeue stale ones, sample the queue."""
+        if time.monotonic() - self._last_heartbeat < self.lease_seconds / 3:
+            return
+        now = datetime.now(UTC)
+        with self.make_session() as db:
+            repository = JobRepository(db)
+            repository.heartbeat(self.worker_id, list(self._running.values()), now)
+            requeued = repository.requeue_stale(now - timedelta(seconds=self.lease_seconds))
+            self.queue = repository.queue_stats(now)
+        self._last_heartbeat = time.monotonic()
+        if requeued:
+            metrics.inc("jobs.requeued_stale", requeued)
+            self.log(f"requeued {requeued} jobs of lost workers")
+
+    def _execute(self, claimed: dict[str, Any]) -> None:
+        kind, attempts = claimed["kind"], claimed["attempts"]
+        started = datetime.now(UTC)
+        metrics.observe(f"jobs.{kind}.wait_seconds", (started - claimed["run_at"]).total_seconds())
+        error = retry_at = None
+        handler = handlers.get(kind)
+        if handler is None:
+            error = f"No handler for job kind {kind!r}"
+        else:
+            try:
+                handler(claimed["payload"])
+            except Exception as err:
+                error = "".join(traceback.format_exception_only(err)).strip()
+                if attempts < claimed["max_attempts"]:
+                    delay = backoff(attempts, settings.job_retry_base_seconds, settings.job_retry_max_seconds)
+                    retry_at = datetime.now(UTC) + timedelta(seconds=delay)
+        finished = datetime.now(UTC)
+        metrics.observe(f"jobs.{kind}.run_seconds", (finished - started).total_seconds())
+        outcome = "succeeded" if error is None else "retried" if retry_at else "failed"
+        metrics.inc(f"jobs.{kind}.{outcome}")
+        if error is not None:
+            self.log(f"job {claimed['id']} ({kind}) attempt {attempts} {outcome}: {error}")
+        try:
+            with self.make_session() as db:
+                JobRepository(db).finish(claimed["id"], self.worker_id, finished, error, retry_at)
+        except SQLAlchemyError as err:
+            # The job stays running until its lease runs out and it is queued again
+            metrics.inc("jobs.worker_errors")
+            self.log(f"job {claimed['id']} ({kind}): outcome not recorded: {err}")
+
+
+@job("archive_items")
+def archive_items(payload: dict[str, Any]) -> None:
+    """Archive long-inactive items on every database (see app/core/archiving.py)."""
+    older_than = timedelta(days=payload.get("older_than_days", settings.archive_after_days))
+    for engine in data_engines():
+        archive(engine, older_than, settings.archive_batch_size, log=lambda _: None)
+
+
+@job("reconcile_item_stats")
+def reconcile_item_stats(payload: dict[str, Any]) -> None:
+    """Repair drifted item counts on every database (see app/core/item_stats.py)."""
+    for engine in data_engines():
+        reconcile(engine, payload.get("batch_size", 1000), log=lambda _: None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("worker")
+    worker.add_argument("--concurrency", type=int, default=settings.job_worker_concurrency)
+    enqueue = commands.add_parser("enqueue")
+    enqueue.add_argument("kind", choices=sorted(handlers))
+    enqueue.add_argument("--payload", type=json.loads, default={})
+    enqueue.add_argument("--delay", type=float, default=0.0, help="seconds")
+    commands.add_parser("stats")
+    purge = commands.add_parser("purge")
+    purge.add_argument("--older-than-days", type=float, default=7.0)
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+        Worker(concurrency=args.concurrency).run(stop)
+        return
+    with _primary_session() as db:
+        repository = JobRepository(db)
+        if args.command == "enqueue":
+            queued = repository.enqueue(args.kind, args.payload, args.delay)
+            print(f"queued job {queued.id}")
+        elif args.command == "stats":
+            for key, value in repository.queue_stats(datetime.now(UTC)).items():
+                print(f"{key}: {value}")
+        else:
+            before = datetime.now(UTC) - timedelta(days=args.older_than_days)
+            print(f"purged {repository.purge(before)} jobs")
+
+
+if __name__ == "__main__":
+    main()
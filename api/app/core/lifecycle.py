@@ -0,0 +1,95 @@
+"""
+Worker start-up warm-up and graceful shutdown.
+
+On start-up, pooled connections are opened before the first request instead
+of by it. On shutdown, the worker stops taking new requests (they, readiness
+probes included, get a 503 with ``Connection: close``), waits for the
+requests in flight up to a deadline, and only then disposes of the engine,
+so no request loses its connection half-way.
+"""
+
+import anyio
+from sqlalchemy import Engine, text
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.responses import FastJSONResponse
+
+
+def warm_pool(engine: Engine, connections: int) -> int:
+    """
+    Open up to ``connections`` connections and return them to the pool.
+
+    They are held at the same time, so each is a distinct connection; the
+    pool keeps at most its pool_size of them. Returns how many were opened.
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
+class RequestDrain:
+    """Counts in-flight HTTP requests and waits for them on shutdown."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.draining = False
+        self._idle: anyio.Event | None = None
+
+    def start(self) -> None:
+        """Accept requests (again: the same app may be started more than once)."""
+        self.draining = False
+        self._idle = None
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Stop accepting requests and wait up to ``timeout`` seconds for the
+        in-flight ones. Returns how many were still running at the deadline.
+        """
+        self.draining = True
+        if self.in_flight:
+            self._idle = anyio.Event()
+            with anyio.move_on_after(timeout):
+                await self._idle.wait()
+        return self.in_flight
+
+    def enter(self) -> None:
+        self.in_flight += 1
+
+    def exit(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0 and self._idle is not None:
+            self._idle.set()
+
+
+class DrainMiddleware:
+    """ASGI middleware tracking in-flight requests; rejects new ones while draining."""
+
+    def __init__(self, app: ASGIApp, drain: RequestDrain) -> None:
+        self.app = app
+        self.drain = drain
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.drain.draining:
+            response = FastJSONResponse(
+                {"detail": "Server is shutting down"},
+                status_code=503,
+                headers={"Connection": "close", "Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.drain.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.drain.exit()
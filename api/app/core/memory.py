@@ -0,0 +1,244 @@
+"""
+Memory diagnostics.
+
+Opt-in tracemalloc mode that records per-route peak allocation for a sampled
+fraction of requests and keeps a few snapshots that can be diffed by file or
+line. Process RSS and GC statistics are always reported in the metrics.
+"""
+
+import gc
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from typing import Any, Literal
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.asgi import route_path
+from app.core.config import settings
+from app.core.metrics import metrics
+
+GroupBy = Literal["filename", "lineno", "traceback"]
+
+
+class MemoryTracker:
+    """
+    Per-route peak allocation stats and tracemalloc snapshots.
+
+    tracemalloc's peak counter is process-wide, so only one request is
+    measured at a time; the figure is the peak above the traced memory at
+    the start of that request.
+    """
+
+    def __init__(
+        self, sample_rate: float = 0.0, frames: int = 1, max_snapshots: int = 5
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.frames = frames
+        self._max_snapshots = max_snapshots
+        self._measuring = threading.Lock()
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict[str, int]] = {}
+        self._snapshots: OrderedDict[str, tracemalloc.Snapshot] = OrderedDict()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and tracemalloc.is_tracing()
+
+    def start(self, frames: int | None = None) -> None:
+        if frames is not None:
+            self.frames = frames
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        """Stop tracing; also drops snapshots, which hold the traces."""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def begin(self) -> int | None:
+        """Start measuring a request; returns the baseline or None if busy."""
+        if not self._measuring.acquire(blocking=False):
+            return None
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def end(self, baseline: int, route: str) -> None:
+        peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0) if self.tracing else 0
+        self._measuring.release()
+        with self._lock:
+            stats = self._routes.setdefault(route, {"requests": 0, "peak_total": 0, "peak_max": 0})
+            stats["requests"] += 1
+            stats["peak_total"] += peak
+            stats["peak_max"] = max(stats["peak_max"], peak)
+
+    def route_stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                route: {
+                    "requests": s["requests"],
+                    "peak_avg_bytes": s["peak_total"] // s["requests"],
+                    "peak_max_bytes": s["peak_max"],
+                }
+                for route, s in self._routes.items()
+            }
+
+    def take_snapshot(self) -> str:
+        """Store a snapshot and return its id (oldest are evicted)."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        snapshot_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._snapshots[snapshot_id] = snapshot
+            while len(self._snapshots) > self._max_snapshots:
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def snapshot_ids(self) -> list[str]:
+        with self._lock:
+            return list(self._snapshots)
+
+    def top(self, snapshot_id: str, group_by: GroupBy = "lineno", limit: int = 25) -> list[dict[str, Any]] | None:
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            return None
+        return [
+            {"location": _location(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+
+    def diff(
+        self, snapshot_id: str, against_id: str, group_by: GroupBy = "lineno", limit: int = 25
+    ) -> list[dict[str, Any]] | None:
+        """Allocation growth from ``against_id`` to ``snapshot_id``, largest first."""
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+            previous = self._snapshots.get(against_id)
+        if snapshot is None or previous is None:
+            return None
+        return [
+            {
+                "location": _location(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in snapshot.compare_to(previous, group_by)[:limit]
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+def _location(traceback: tracemalloc.Traceback) -> str:
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in traceback)
+
+
+class MemoryMiddleware:
+    """ASGI middleware recording peak allocation for sampled requests."""
+
+    def __init__(self, app: ASGIApp, tracker: MemoryTracker) -> None:
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracker = self.tracker
+        if (
+            scope["type"] != "http"
+            or not tracker.enabled
+            or random.random() >= tracker.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        baseline = tracker.begin()
+        if baseline is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            tracker.end(baseline, route_path(scope))
+
+
+_gc_pause = {"collections": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+_gc_started: list[float] = []
+
+
+def _on_gc(phase: str, info: dict[str, Any]) -> None:
+    if phase == "start":
+        _gc_started.append(time.perf_counter())
+    elif _gc_started:
+        elapsed = time.perf_counter() - _gc_started.pop()
+        _gc_pause["collections"] += 1
+        _gc_pause["total_seconds"] += elapsed
+        _gc_pause["max_seconds"] = max(_gc_pause["max_seconds"], elapsed)
+
+
+def _rss_bytes() -> int | None:
+    """Current resident set size (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_bytes() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def process_memory() -> dict[str, Any]:
+    """RSS, GC and (when tracing) tracemalloc figures for this worker."""
+    result: dict[str, Any] = {
+        "rss_bytes": _rss_bytes(),
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "gc": {
+            "counts": gc.get_count(),
+            "generations": gc.get_stats(),
+            "pauses": {
+                "collections": _gc_pause["collections"],
+                "total_seconds": round(_gc_pause["total_seconds"], 6),
+                "max_seconds": round(_gc_pause["max_seconds"], 6),
+            },
+        },
+        "tracemalloc": None,
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        result["tracemalloc"] = {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "routes": memory_tracker.route_stats(),
+        }
+    return result
+
+
+memory_tracker = MemoryTracker(
+    sample_rate=settings.memory_sample_rate,
+    frames=settings.memory_traceback_frames,
+)
+
+gc.callbacks.append(_on_gc)
+metrics.register("memory", process_memory)
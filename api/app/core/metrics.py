@@ -0,0 +1,60 @@
+"""
+In-process metrics registry.
+
+Counters and summaries are updated from anywhere in the app; collectors are
+callables sampled when the metrics are read. Values are per worker process.
+"""
+
+import threading
+from collections.abc import Callable
+from typing import Any
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._summaries: dict[str, dict[str, float]] = {}
+        self._collectors: dict[str, Callable[[], dict[str, Any]]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one observation (count, sum and max are kept)."""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                self._summaries[name] = {"count": 1, "sum": value, "max": value}
+            else:
+                summary["count"] += 1
+                summary["sum"] += value
+                if value > summary["max"]:
+                    summary["max"] = value
+
+    def register(self, name: str, collector: Callable[[], dict[str, Any]]) -> None:
+        """Register a collector sampled on every snapshot."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            result: dict[str, Any] = {
+                "counters": dict(self._counters),
+                "summaries": {name: dict(s) for name, s in self._summaries.items()},
+            }
+            collectors = list(self._collectors.items())
+        for name, collector in collectors:
+            result[name] = collector()
+        return result
+
+    def reset(self) -> None:
+        """Clear counters and summaries (collectors stay registered)."""
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+metrics = Metrics()
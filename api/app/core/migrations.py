@@ -0,0 +1,75 @@
+"""
+Startup schema check against the Alembic migration history.
+
+Workers no longer run ``create_all`` on boot: that issues catalog queries for
+every table on each worker start and lets concurrent workers race to create
+the same tables. Migrations are applied once per deploy (``alembic upgrade
+head``); a worker only compares the revision stamped in the database with the
+head of ``alembic/versions``.
+
+Both sides are read directly (the revision identifiers of the scripts via
+``ast``, the stamp with one SELECT) because importing Alembic alone takes
+longer than the rest of startup.
+"""
+
+import ast
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, inspect, text
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+VERSION_TABLE = "alembic_version"
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """The database is not at the Alembic head revision."""
+
+
+def _revision_ids(path: Path) -> tuple[str, set[str]]:
+    """``revision`` and ``down_revision`` ids declared by one migration script."""
+    values: dict[str, Any] = {}
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets: list[ast.expr] = [node.target]
+            value = node.value
+        elif isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        else:
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id in ("revision", "down_revision"):
+                values[target.id] = ast.literal_eval(value)
+    down = values.get("down_revision")
+    parents = {down} if isinstance(down, str) else set(down or ())
+    return values["revision"], parents
+
+
+def head_revisions() -> set[str]:
+    """Head revision(s) of the migration scripts shipped with the app."""
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    for path in VERSIONS_DIR.glob("*.py"):
+        revision, down = _revision_ids(path)
+        revisions.add(revision)
+        parents |= down
+    return revisions - parents
+
+
+def current_revisions(engine: Engine) -> set[str]:
+    """Revision(s) stamped in the database (empty if never migrated)."""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(VERSION_TABLE):
+            return set()
+        return set(conn.execute(text(f"SELECT version_num FROM {VERSION_TABLE}")).scalars())
+
+
+def check_schema(engine: Engine) -> None:
+    """Raise SchemaOutOfDateError unless the database is at the head revision."""
+    expected = head_revisions()
+    current = current_revisions(engine)
+    if current != expected:
+        raise SchemaOutOfDateError(
+            f"Database is at revision {', '.join(sorted(current)) or '<none>'}, "
+            f"expected {', '.join(sorted(expected))}; run 'alembic upgrade head'"
+        )
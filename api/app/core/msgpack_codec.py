@@ -0,0 +1,172 @@
+"""
+MessagePack content negotiation.
+
+Routes using MsgPackRoute accept ``Content-Type: application/msgpack`` request
+bodies (validated by the same Pydantic schemas as JSON) and answer with
+MessagePack when the client sends ``Accept: application/msgpack``. UUIDs are
+packed as 16-byte ext values (type 1) and datetimes as the standard msgpack
+timestamp ext (type -1), instead of 36- and 20+-character strings. Error
+responses stay JSON.
+"""
+
+import functools
+import inspect
+import uuid
+from collections.abc import Callable
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from typing import Any
+
+import msgpack
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+UUID_EXT_CODE = 1
+
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(UUID_EXT_CODE, obj.bytes)
+    if isinstance(obj, datetime):
+        # Naive datetimes come from databases storing UTC without a zone.
+        return msgpack.Timestamp.from_datetime(obj.replace(tzinfo=UTC))
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == UUID_EXT_CODE:
+        return uuid.UUID(bytes=data)
+    return msgpack.ExtType(code, data)
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default, datetime=True, use_bin_type=True)
+
+
+def unpackb(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_ext_hook, timestamp=3, raw=False)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def _media_type(header: str | None) -> str:
+    return (header or "").split(";", 1)[0].strip().lower()
+
+
+def accepts_msgpack(accept: str | None) -> bool:
+    """Whether an Accept header asks for MessagePack (with a non-zero q)."""
+    if not accept:
+        return False
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        if media_type.strip().lower() in MSGPACK_MEDIA_TYPES:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def wants_msgpack() -> bool:
+    """Whether the current request negotiated a MessagePack response."""
+    return _wants_msgpack.get()
+
+
+async def _as_decoded_request(request: Request) -> Request:
+    """
+    Re-present a MessagePack request to FastAPI as an already parsed JSON body.
+
+    FastAPI only parses JSON content types, so the decoded body is cached on a
+    request whose content-type says JSON; validation then runs unchanged.
+    """
+    body = await request.body()
+    try:
+        decoded = unpackb(body) if body else None
+    except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid MessagePack body",
+        ) from err
+    scope = dict(request.scope)
+    scope["headers"] = [
+        (key, b"application/json" if key == b"content-type" else value)
+        for key, value in request.scope["headers"]
+    ]
+    decoded_request = Request(scope, request.receive)
+    decoded_request._body = body
+    decoded_request._json = decoded
+    return decoded_request
+
+
+class MsgPackRoute(APIRoute):
+    """APIRoute speaking MessagePack as well as JSON."""
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        self._wrap_endpoint()
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            token = _wants_msgpack.set(accepts_msgpack(request.headers.get("accept")))
+            try:
+                if _media_type(request.headers.get("content-type")) in MSGPACK_MEDIA_TYPES:
+                    request = await _as_decoded_request(request)
+                response = await handler(request)
+            finally:
+                _wants_msgpack.reset(token)
+            response.headers.append("Vary", "Accept")
+            return response
+
+        return route_handler
+
+    def _wrap_endpoint(self) -> None:
+        """
+        Make the endpoint return a MsgPackResponse when MessagePack was negotiated.
+
+        The return value is dumped with the response model in Python mode, so
+        UUIDs and datetimes reach the packer as objects rather than strings.
+        Headers and status set on an injected ``response: Response`` parameter
+        are carried over, as FastAPI does for its own responses.
+        """
+        call = self.dependant.call
+        if call is None or getattr(call, "_msgpack_wrapped", False):
+            return
+        adapter: TypeAdapter[Any] | None = (
+            TypeAdapter(self.response_model) if self.response_model else None
+        )
+        status_code = self.status_code or status.HTTP_200_OK
+        response_param = self.dependant.response_param_name
+
+        def to_response(result: Any, kwargs: dict[str, Any]) -> Any:
+            if not _wants_msgpack.get() or result is None or isinstance(result, Response):
+                return result
+            content = adapter.dump_python(result) if adapter is not None else result
+            response = MsgPackResponse(content, status_code=status_code)
+            sub_response = kwargs.get(response_param) if response_param else None
+            if sub_response is not None:
+                if sub_response.status_code:
+                    response.status_code = sub_response.status_code
+                response.headers.raw.extend(sub_response.headers.raw)
+            return response
+
+        if inspect.iscoroutinefunction(call):
+
+            @functools.wraps(call)
+            async def async_endpoint(*args: Any, **kwargs: Any) -> Any:
+                return to_response(await call(*args, **kwargs), kwargs)
+
+            wrapped: Any = async_endpoint
+        else:
+
+            @functools.wraps(call)
+            def endpoint(*args: Any, **kwargs: Any) -> Any:
+                return to_response(call(*args, **kwargs), kwargs)
+
+            wrapped = endpoint
+        wrapped._msgpack_wrapped = True
+        self.dependant.call = wrapped
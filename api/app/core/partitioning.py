@@ -0,0 +1,290 @@
+"""
+Moving an existing, unpartitioned items table to hash partitions (PostgreSQL).
+
+The copy of a large table happens while the app keeps serving it:
+
+1. ``alembic upgrade 5d2f8a9c4e71`` creates ``items_partitioned``, hash
+   partitioned by user_id into ``item_partitions`` partitions with the same
+   indexes, and a trigger mirroring every write on ``items`` into it.
+2. ``python -m app.core.partitioning backfill`` copies the existing rows in
+   id order, one short transaction per batch, recording where it is so it
+   can be stopped and resumed. Each batch locks its source rows FOR SHARE,
+   so a concurrent update or delete waits and is then mirrored on top.
+3. ``alembic upgrade head`` blocks writes to ``items``, copies what step 2
+   has not (everything, if step 2 was skipped on a small table) and swaps
+   the tables. The old table stays as ``items_unpartitioned`` for rollback
+   until it is dropped by hand.
+
+    python -m app.core.partitioning status
+    python -m app.core.partitioning backfill --batch-size 5000 --pause 0.05
+
+Databases created with ``create_all`` are partitioned from the start and
+skip all of this.
+
+Every step takes the list of columns to copy instead of reading the Item
+model: the migrations pass the columns items had when they were written,
+so later changes to the model cannot change what they do on replay, and
+the backfill reads them from the shadow table itself.
+"""
+
+import argparse
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from sqlalchemy import Connection, Engine, TextClause, text
+
+from app.core.db import get_engine
+from app.models.item import partition_ddl
+
+SHADOW = "items_partitioned"
+OLD = "items_unpartitioned"
+PROGRESS = "items_partition_backfill"
+MIRROR = "items_mirror"
+
+# Keyset start below every uuid4 (which never is all zeros)
+FIRST = uuid.UUID(int=0)
+# Progress marker of a shadow table that is already complete
+COMPLETE = uuid.UUID(int=2**128 - 1)
+
+
+def _copy_batch(columns: Sequence[str]) -> TextClause:
+    names = ", ".join(columns)
+    return text(
+        f"""
+        WITH batch AS (
+            SELECT {names} FROM items WHERE id > CAST(:after AS uuid)
+            ORDER BY id LIMIT :limit FOR SHARE
+        ), copied AS (
+            INSERT INTO {SHADOW} ({names}) SELECT {names} FROM batch ON CONFLICT DO NOTHING
+        )
+        SELECT count(*), (SELECT CAST(id AS text) FROM batch ORDER BY id DESC LIMIT 1) FROM batch
+        """
+    )
+
+
+def is_partitioned(conn: Connection, table: str = "items") -> bool:
+    kind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    ).scalar()
+    return kind == "p"
+
+
+def partitions_of(conn: Connection, table: str) -> list[str]:
+    return list(
+        conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def copied_columns(conn: Connection, table: str = SHADOW) -> list[str]:
+    """Columns of ``table`` the copy has to carry (generated ones compute themselves)."""
+    return list(
+        conn.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = :table "
+                "AND is_generated = 'NEVER' ORDER BY ordinal_position"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def mirror_ddl(columns: Sequence[str]) -> list[str]:
+    """Trigger keeping the shadow table equal to ``items`` for rows already copied."""
+    names = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{column}" for column in columns)
+    return [
+        f"""
+        CREATE FUNCTION {MIRROR}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {SHADOW} WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {SHADOW} ({names}) VALUES ({new_values}) ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        f"CREATE TRIGGER {MIRROR} AFTER INSERT OR UPDATE OR DELETE ON items "
+        f"FOR EACH ROW EXECUTE FUNCTION {MIRROR}()",
+    ]
+
+
+def shadow_ddl(partitions: int, columns: Sequence[str]) -> list[str]:
+    """The partitioned copy of ``items``, its mirror trigger and the backfill position."""
+    return [
+        f"CREATE TABLE {SHADOW} ("
+        "LIKE items INCLUDING DEFAULTS INCLUDING GENERATED, "
+        "PRIMARY KEY (id, user_id), "
+        "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+        ") PARTITION BY HASH (user_id)",
+        *partition_ddl(SHADOW, partitions),
+        f"CREATE INDEX ix_{SHADOW}_user_id ON {SHADOW} (user_id)",
+        f"CREATE INDEX ix_{SHADOW}_search_vector ON {SHADOW} USING gin (search_vector)",
+        *mirror_ddl(columns),
+        f"CREATE TABLE {PROGRESS} (id integer PRIMARY KEY, last_id uuid NOT NULL, copied bigint NOT NULL)",
+        f"INSERT INTO {PROGRESS} VALUES (1, '{FIRST}', 0)",
+    ]
+
+
+def _renames(conn: Connection, source: str, target: str) -> list[str]:
+    """Rename a table with its primary key, named indexes and partitions."""
+    statements = [
+        f"ALTER TABLE {source} RENAME TO {target}",
+        f"ALTER INDEX {source}_pkey RENAME TO {target}_pkey",
+        f"ALTER INDEX ix_{source}_user_id RENAME TO ix_{target}_user_id",
+        f"ALTER INDEX ix_{source}_search_vector RENAME TO ix_{target}_search_vector",
+        f"ALTER TABLE {target} RENAME CONSTRAINT {source}_user_id_fkey TO {target}_user_id_fkey",
+    ]
+    for partition in partitions_of(conn, source):
+        statements.append(
+            f"ALTER TABLE {partition} RENAME TO {target}{partition.removeprefix(source)}"
+        )
+    return statements
+
+
+def copy_batch(
+    conn: Connection, columns: Sequence[str], after: str, limit: int
+) -> tuple[int, str | None]:
+    """Copy up to ``limit`` rows with ids above ``after``; returns (rows, last id)."""
+    count, last_id = conn.execute(_copy_batch(columns), {"after": after, "limit": limit}).one()
+    return count, last_id
+
+
+def backfill(
+    engine: Engine,
+    batch_size: int = 5000,
+    pause_seconds: float = 0.0,
+    log: Callable[[str], None] = print,
+) -> int:
+    """Copy the rows of ``items`` the shadow table does not have yet; returns how many."""
+    with engine.connect() as conn:
+        columns = copied_columns(conn)
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            after, copied = conn.execute(
+                text(f"SELECT CAST(last_id AS text), copied FROM {PROGRESS} WHERE id = 1 FOR UPDATE")
+            ).one()
+            count, last_id = copy_batch(conn, columns, after, batch_size)
+            if count:
+                conn.execute(
+                    text(
+                        f"UPDATE {PROGRESS} SET last_id = CAST(:last_id AS uuid), copied = :copied "
+                        "WHERE id = 1"
+                    ),
+                    {"last_id": last_id, "copied": copied + count},
+                )
+        total += count
+        if count < batch_size:
+            return total
+        log(f"copied {copied + count} rows (up to id {last_id})")
+        time.sleep(pause_seconds)
+
+
+def catch_up_and_swap(conn: Connection, columns: Sequence[str]) -> int:
+    """
+    Finish the backfill with writes to ``items`` blocked, then put the
+    partitioned table in its place. Runs in the caller's transaction (the
+    migration's); returns the rows copied here.
+    """
+    conn.execute(text("LOCK TABLE items IN EXCLUSIVE MODE"))
+    after = conn.execute(
+        text(f"SELECT CAST(last_id AS text) FROM {PROGRESS} WHERE id = 1")
+    ).scalar_one()
+    total = 0
+    while after is not None:
+        count, after = copy_batch(conn, columns, after, 50_000)
+        total += count
+    for statement in [
+        f"DROP TRIGGER {MIRROR} ON items",
+        f"DROP FUNCTION {MIRROR}()",
+        *_renames(conn, "items", OLD),
+        *_renames(conn, SHADOW, "items"),
+        f"DROP TABLE {PROGRESS}",
+    ]:
+        conn.execute(text(statement))
+    return total
+
+
+def swap_back(conn: Connection, columns: Sequence[str]) -> None:
+    """
+    Undo catch_up_and_swap: bring ``items_unpartitioned`` up to date with the
+    partitioned table and swap them again, leaving the shadow table mirrored
+    and complete.
+    """
+    conn.execute(text("LOCK TABLE items IN EXCLUSIVE MODE"))
+    names = ", ".join(columns)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "id")
+    for statement in [
+        f"INSERT INTO {OLD} ({names}) SELECT {names} FROM items "
+        f"ON CONFLICT (id) DO UPDATE SET {updates}",
+        f"DELETE FROM {OLD} o WHERE NOT EXISTS (SELECT 1 FROM items i WHERE i.id = o.id)",
+        *_renames(conn, "items", SHADOW),
+        *_renames(conn, OLD, "items"),
+        *mirror_ddl(columns),
+        f"CREATE TABLE {PROGRESS} (id integer PRIMARY KEY, last_id uuid NOT NULL, copied bigint NOT NULL)",
+        f"INSERT INTO {PROGRESS} VALUES (1, '{COMPLETE}', 0)",
+    ]:
+        conn.execute(text(statement))
+
+
+def status(engine: Engine) -> dict[str, Any]:
+    """Layout of ``items`` and, mid-migration, the backfill position."""
+    with engine.connect() as conn:
+        table = "items" if is_partitioned(conn) else SHADOW
+        estimates = {
+            name: int(rows)
+            for name, rows in conn.execute(
+                text(
+                    "SELECT c.relname, c.reltuples FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+                ),
+                {"table": table},
+            )
+        }
+        progress = None
+        if conn.execute(text("SELECT to_regclass(:name)"), {"name": PROGRESS}).scalar():
+            last_id, copied = conn.execute(
+                text(f"SELECT CAST(last_id AS text), copied FROM {PROGRESS} WHERE id = 1")
+            ).one()
+            progress = {"last_id": last_id, "copied": copied}
+    return {
+        "partitioned": table == "items",
+        "shadow": table if estimates else None,
+        "partition_rows_estimate": estimates,
+        "backfill": progress,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status")
+    run = commands.add_parser("backfill")
+    run.add_argument("--batch-size", type=int, default=5000)
+    run.add_argument("--pause", type=float, default=0.0, help="seconds between batches")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        parser.error("items is only partitioned on PostgreSQL")
+    if args.command == "status":
+        for key, value in status(engine).items():
+            print(f"{key}: {value}")
+    else:
+        print(f"copied {backfill(engine, args.batch_size, args.pause)} rows")
+
+
+if __name__ == "__main__":
+    main()
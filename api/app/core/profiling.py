@@ -0,0 +1,237 @@
+"""
+On-demand request profiling.
+
+A sampled fraction of requests (or a single request carrying the profiling
+header) is run under cProfile and the stats are aggregated per route. A
+time-boxed whole-process sampler produces collapsed stacks for flame graphs.
+With no sample rate and no header token the middleware is a pass-through.
+"""
+
+import cProfile
+import pstats
+import random
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from types import FrameType
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.asgi import get_header, route_path
+from app.core.config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+SORT_KEYS = {
+    "cumulative": lambda row: row["cumtime"],
+    "tottime": lambda row: row["tottime"],
+    "calls": lambda row: row["ncalls"],
+}
+
+
+def stats_rows(stats: pstats.Stats, limit: int, sort: str = "cumulative") -> list[dict[str, Any]]:
+    """Flatten pstats into JSON-friendly rows, sorted and truncated."""
+    rows = [
+        {
+            "function": f"{filename}:{lineno}({funcname})",
+            "ncalls": nc,
+            "primitive_calls": cc,
+            "tottime": round(tt, 6),
+            "cumtime": round(ct, 6),
+        }
+        for (filename, lineno, funcname), (cc, nc, tt, ct, _) in stats.stats.items()  # type: ignore[attr-defined]
+    ]
+    rows.sort(key=SORT_KEYS[sort], reverse=True)
+    return rows[:limit]
+
+
+class RequestProfiler:
+    """
+    Collects cProfile stats for sampled requests.
+
+    Only one request is profiled at a time; requests arriving while a profile
+    is running are served unprofiled rather than queued. On Python 3.12+
+    cProfile observes every thread, so threadpool work for sync endpoints is
+    included, along with anything else the worker ran during that request.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        header_token: str | None = None,
+        max_saved_requests: int = 20,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.header_token = header_token or None
+        self._max_saved_requests = max_saved_requests
+        self._running = threading.Lock()
+        self._lock = threading.Lock()
+        self._routes: dict[str, pstats.Stats] = {}
+        self._route_counts: Counter[str] = Counter()
+        self._requests: OrderedDict[str, tuple[str, pstats.Stats]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.header_token is not None
+
+    def is_forced(self, header_value: str | None) -> bool:
+        """Whether the request header asks for this request to be profiled."""
+        if self.header_token is None or header_value is None:
+            return False
+        return secrets.compare_digest(header_value, self.header_token)
+
+    def start(self) -> cProfile.Profile | None:
+        """Start a profile, or return None if another one is running."""
+        if not self._running.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiling tool already owns the interpreter hook.
+            self._running.release()
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, route: str, profile_id: str | None) -> None:
+        """Stop a profile and fold it into the per-route aggregate."""
+        profile.disable()
+        self._running.release()
+        try:
+            stats = pstats.Stats(profile)
+        except TypeError:
+            # Nothing was recorded (pstats refuses to build empty stats).
+            return
+        with self._lock:
+            if route in self._routes:
+                self._routes[route].add(stats)
+            else:
+                self._routes[route] = stats
+            self._route_counts[route] += 1
+            if profile_id is not None:
+                self._requests[profile_id] = (route, stats)
+                while len(self._requests) > self._max_saved_requests:
+                    self._requests.popitem(last=False)
+
+    def snapshot(self, limit: int = 30, sort: str = "cumulative") -> dict[str, Any]:
+        """Aggregated call stats per route."""
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": self._route_counts[route],
+                    "functions": stats_rows(stats, limit, sort),
+                }
+                for route, stats in self._routes.items()
+            }
+            saved = list(self._requests)
+        return {
+            "sample_rate": self.sample_rate,
+            "header_enabled": self.header_token is not None,
+            "routes": routes,
+            "saved_requests": saved,
+        }
+
+    def request_profile(
+        self, profile_id: str, limit: int = 30, sort: str = "cumulative"
+    ) -> dict[str, Any] | None:
+        """Call stats for a single header-profiled request."""
+        with self._lock:
+            entry = self._requests.get(profile_id)
+            if entry is None:
+                return None
+            route, stats = entry
+            return {"id": profile_id, "route": route, "functions": stats_rows(stats, limit, sort)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._route_counts.clear()
+            self._requests.clear()
+
+
+_sampler_lock = threading.Lock()
+
+
+def sample_process(seconds: float, interval: float = 0.005) -> Counter[str] | None:
+    """
+    Sample the stacks of every thread for a fixed duration.
+
+    Returns collapsed stacks ("thread;outer;...;inner" -> sample count) in the
+    format consumed by flamegraph.pl and speedscope, or None if a sampling
+    run is already in progress.
+    """
+    if not _sampler_lock.acquire(blocking=False):
+        return None
+    try:
+        own_thread = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                frames = []
+                current: FrameType | None = frame
+                while current is not None:
+                    code = current.f_code
+                    frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    current = current.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(frames))] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _sampler_lock.release()
+
+
+def format_collapsed(stacks: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that runs selected requests under the profiler."""
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler
+        if scope["type"] != "http" or not profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        forced = profiler.is_forced(get_header(scope, PROFILE_HEADER))
+        if not forced and random.random() >= profiler.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.start()
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex if forced else None
+
+        async def send_with_id(message: Message) -> None:
+            if profile_id is not None and message["type"] == "http.response.start":
+                headers = [*message.get("headers", []), (PROFILE_ID_HEADER, profile_id.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.finish(profile, route_path(scope), profile_id)
+
+
+profiler = RequestProfiler(
+    sample_rate=settings.profiling_sample_rate,
+    header_token=settings.profiling_token,
+)
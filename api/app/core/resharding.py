@@ -0,0 +1,288 @@
+"""
+Online resharding: move hash slots between shards while the app serves traffic.
+
+    python -m app.core.resharding status
+    python -m app.core.resharding pin
+    python -m app.core.resharding move SLOT SHARD
+    python -m app.core.resharding rebalance
+    python -m app.core.resharding rebuild-directory
+
+Moving a slot copies its users, OAuth accounts and items (archived ones
+included, with their counts) to the target shard while they stay writable,
+then freezes the slot (writes to it get a 503 with Retry-After; reads go on)
+and copies again, now including deletions, so the target is exact. The slot
+map then points at the target and, once every worker has re-read the map,
+the source rows are deleted. Each step waits ``shard_map_refresh_seconds``
+plus a grace period for in-flight transactions, so the freeze only lasts as
+long as the second copy of one slot (1/1024th of the users) plus those
+waits.
+
+Adding a shard: ``pin`` the current layout first (new slots would otherwise
+be placed by ``slot % shards`` with the new count), deploy with the extra
+SHARD_URLS entry, then ``rebalance``.
+"""
+
+import argparse
+import time
+import uuid
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+from sqlalchemy import Engine, Table, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from app.core.db import SHARD_SLOTS, ShardRouter, shard_router, slot_for
+from app.models import DirectoryEntry, OAuthAccount, ShardSlot, User
+from app.models.item import Item, ItemArchive, UserItemStats
+from app.repositories.directory import email_key, oauth_key
+
+# Per-user tables, parents first (deleted in reverse order)
+USER_TABLES: list[Table] = [
+    User.__table__,  # type: ignore[list-item]
+    OAuthAccount.__table__,  # type: ignore[list-item]
+    Item.__table__,  # type: ignore[list-item]
+    ItemArchive.__table__,  # type: ignore[list-item]
+    UserItemStats.__table__,  # type: ignore[list-item]
+]
+
+CHUNK_SIZE = 500
+
+
+def _chunks(values: Sequence[Any], size: int = CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _owner(table: Table) -> Any:
+    return table.c.id if table.name == User.__tablename__ else table.c.user_id
+
+
+def _row_key(table: Table) -> Any:
+    """The column identifying a row: id, or the user id for one-row-per-user tables."""
+    return table.primary_key.columns.values()[0]
+
+
+def _upsert(conn: Connection, table: Table, key: Sequence[str]) -> Any:
+    """INSERT ... ON CONFLICT (key) DO UPDATE of all other columns."""
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(table)
+    columns = {c.name: stmt.excluded[c.name] for c in table.columns if c.name not in key}
+    return stmt.on_conflict_do_update(index_elements=list(key), set_=columns)
+
+
+def users_by_slot(engine: Engine) -> dict[int, list[uuid.UUID]]:
+    """Ids of the users stored in a database, by slot."""
+    slots: dict[int, list[uuid.UUID]] = defaultdict(list)
+    with engine.connect() as conn:
+        for user_id in conn.execute(select(User.id)).scalars():
+            slots[slot_for(user_id)].append(user_id)
+    return slots
+
+
+def copy_users(source: Engine, target: Engine, user_ids: Sequence[uuid.UUID]) -> int:
+    """
+    Make the target's rows of these users equal to the source's: upsert every
+    row, delete target rows the source no longer has. Returns rows written.
+    """
+    written = 0
+    with source.connect() as src, target.begin() as dst:
+        for table in USER_TABLES:
+            upsert = _upsert(dst, table, [column.name for column in table.primary_key])
+            for chunk in _chunks(user_ids):
+                result = src.execute(select(table).where(_owner(table).in_(chunk)))
+                rows = [dict(row) for row in result.mappings()]
+                if rows:
+                    dst.execute(upsert, rows)
+                    written += len(rows)
+        for table in reversed(USER_TABLES):
+            for chunk in _chunks(user_ids):
+                owned = _owner(table).in_(chunk)
+                key = _row_key(table)
+                kept = set(src.execute(select(key).where(owned)).scalars())
+                present = dst.execute(select(key).where(owned)).scalars()
+                stale = [row_id for row_id in present if row_id not in kept]
+                for stale_chunk in _chunks(stale):
+                    dst.execute(delete(table).where(key.in_(stale_chunk)))
+    return written
+
+
+def delete_users(engine: Engine, user_ids: Sequence[uuid.UUID]) -> None:
+    with engine.begin() as conn:
+        for table in reversed(USER_TABLES):
+            for chunk in _chunks(user_ids):
+                conn.execute(delete(table).where(_owner(table).in_(chunk)))
+
+
+def set_placement(router: ShardRouter, slot: int, shard: int, frozen: bool = False) -> None:
+    """Write a slot's placement; the default placement is stored as no row at all."""
+    with router.primary_engine().begin() as conn:
+        if shard == router.default_shard(slot) and not frozen:
+            conn.execute(delete(ShardSlot).where(ShardSlot.slot == slot))
+        else:
+            row = {"slot": slot, "shard": shard, "frozen": frozen}
+            conn.execute(_upsert(conn, ShardSlot.__table__, ["slot"]), [row])  # type: ignore[arg-type]
+    router.refresh()
+
+
+def move_slot(
+    router: ShardRouter,
+    slot: int,
+    target: int,
+    grace_seconds: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+    log: Callable[[str], None] = print,
+) -> int:
+    """Move one slot to the ``target`` shard online; returns the users moved."""
+    source, frozen = router.placement(slot)
+    if frozen:
+        raise RuntimeError(f"Slot {slot} is frozen: another move is running or was interrupted")
+    if source == target:
+        return 0
+    source_engine, target_engine = router.engine(source), router.engine(target)
+    settle = router.refresh_seconds + grace_seconds
+
+    user_ids = users_by_slot(source_engine).get(slot, [])
+    log(f"slot {slot}: copying {len(user_ids)} users from shard {source} to {target}")
+    copy_users(source_engine, target_engine, user_ids)
+
+    set_placement(router, slot, source, frozen=True)
+    try:
+        sleep(settle)  # every worker now refuses writes to the slot
+        # Users deleted since the first copy are in the first list only
+        user_ids = list(dict.fromkeys([*user_ids, *users_by_slot(source_engine).get(slot, [])]))
+        copy_users(source_engine, target_engine, user_ids)
+    except BaseException:
+        set_placement(router, slot, source)
+        raise
+    set_placement(router, slot, target)
+    log(f"slot {slot}: now on shard {target}")
+
+    sleep(settle)  # no worker reads the slot from the source any more
+    delete_users(source_engine, user_ids)
+    return len(user_ids)
+
+
+def rebalance(router: ShardRouter, **kwargs: Any) -> list[tuple[int, int, int]]:
+    """
+    Move slots from the fullest shards to the emptiest until every shard has
+    SHARD_SLOTS // shards slots (+1); returns the ``(slot, source, target)``
+    moves made.
+    """
+    shards = len(router.shard_urls)
+    placements = {slot: router.placement(slot)[0] for slot in range(SHARD_SLOTS)}
+    counts = Counter(dict.fromkeys(range(shards), 0))
+    counts.update(placements.values())
+    quota = -(-SHARD_SLOTS // shards)
+    moves = []
+    for slot, source in sorted(placements.items()):
+        if counts[source] <= quota:
+            continue
+        target = min(range(shards), key=lambda shard: counts[shard])
+        if counts[target] >= SHARD_SLOTS // shards:
+            break
+        move_slot(router, slot, target, **kwargs)
+        counts[source] -= 1
+        counts[target] += 1
+        moves.append((slot, source, target))
+    return moves
+
+
+def pin(router: ShardRouter) -> int:
+    """Store every slot's current placement explicitly; returns the slots written."""
+    rows = [
+        {"slot": slot, "shard": shard, "frozen": frozen}
+        for slot in range(SHARD_SLOTS)
+        for shard, frozen in [router.placement(slot)]
+    ]
+    with router.primary_engine().begin() as conn:
+        conn.execute(_upsert(conn, ShardSlot.__table__, ["slot"]), rows)  # type: ignore[arg-type]
+    router.refresh()
+    return len(rows)
+
+
+def rebuild_directory(router: ShardRouter) -> int:
+    """
+    Re-create the directory from the shards (e.g. when turning sharding on
+    for an existing database): add missing keys, drop keys of users that no
+    longer exist. Returns the number of keys.
+    """
+    entries: dict[str, uuid.UUID] = {}
+    for shard, engine in enumerate(router.engines()):
+        with engine.connect() as conn:
+            for user_id, email in conn.execute(select(User.id, User.email)):
+                if router.shard_for(user_id) == shard:
+                    entries[email_key(email)] = user_id
+            accounts = select(
+                OAuthAccount.user_id, OAuthAccount.provider, OAuthAccount.provider_account_id
+            )
+            for user_id, provider, account_id in conn.execute(accounts):
+                if router.shard_for(user_id) == shard:
+                    entries[oauth_key(provider, account_id)] = user_id
+    with router.primary_engine().begin() as conn:
+        existing = set(conn.execute(select(DirectoryEntry.key)).scalars())
+        for chunk in _chunks(sorted(existing - entries.keys())):
+            conn.execute(delete(DirectoryEntry).where(DirectoryEntry.key.in_(chunk)))
+        rows = [{"key": key, "user_id": user_id} for key, user_id in entries.items()]
+        for chunk in _chunks(rows):
+            conn.execute(_upsert(conn, DirectoryEntry.__table__, ["key"]), list(chunk))  # type: ignore[arg-type]
+    return len(entries)
+
+
+def status(router: ShardRouter) -> list[dict[str, Any]]:
+    """Slots (placed, frozen) and users per shard."""
+    placements = [router.placement(slot) for slot in range(SHARD_SLOTS)]
+    report = []
+    for shard, engine in enumerate(router.engines()):
+        with engine.connect() as conn:
+            users = conn.execute(select(func.count()).select_from(User)).scalar_one()
+        report.append(
+            {
+                "shard": shard,
+                "slots": sum(1 for placed, _ in placements if placed == shard),
+                "frozen": [
+                    slot
+                    for slot, (placed, frozen) in enumerate(placements)
+                    if frozen and placed == shard
+                ],
+                "users": users,
+            }
+        )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status")
+    commands.add_parser("pin")
+    move = commands.add_parser("move")
+    move.add_argument("slot", type=int)
+    move.add_argument("shard", type=int)
+    commands.add_parser("rebalance")
+    commands.add_parser("rebuild-directory")
+    for sub in (move, commands.choices["rebalance"]):
+        sub.add_argument("--grace-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if not shard_router.enabled:
+        parser.error("SHARD_URLS is not set")
+    if args.command == "status":
+        for row in status(shard_router):
+            frozen = ", ".join(map(str, row["frozen"])) or "-"
+            print(f"shard {row['shard']}: {row['slots']} slots, {row['users']} users, frozen {frozen}")
+    elif args.command == "pin":
+        print(f"pinned {pin(shard_router)} slots")
+    elif args.command == "move":
+        moved = move_slot(shard_router, args.slot, args.shard, grace_seconds=args.grace_seconds)
+        print(f"moved {moved} users")
+    elif args.command == "rebalance":
+        moves = rebalance(shard_router, grace_seconds=args.grace_seconds)
+        print(f"moved {len(moves)} slots")
+    else:
+        print(f"directory has {rebuild_directory(shard_router)} keys")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Response classes.
+
+FastJSONResponse encodes with orjson, which handles UUID and datetime natively
+and is several times faster than the stdlib encoder. Datetimes are rendered
+the way Pydantic renders them (UTC as ``Z``), so both paths produce the same
+JSON.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,44 @@
+"""
+Worker sizing for the production server (see gunicorn.conf.py).
+
+os.cpu_count() reports the host's CPUs, not what a container may use; the
+CPU quota of its cgroup (``--cpus`` in Docker, ``limits.cpu`` in Kubernetes)
+and the scheduler affinity mask are both taken into account here.
+"""
+
+import math
+import os
+from pathlib import Path
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def cgroup_cpu_quota(root: Path = CGROUP_ROOT) -> float | None:
+    """CPUs allowed by the cgroup quota (v2 ``cpu.max`` or v1 CFS), None if unlimited."""
+    try:
+        limit, period = (root / "cpu.max").read_text().split()
+        if limit == "max":
+            return None
+        return int(limit) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        cfs_quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        cfs_period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return cfs_quota / cfs_period if cfs_quota > 0 and cfs_period > 0 else None
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> float:
+    """CPUs this process can actually use (may be fractional under a quota)."""
+    cpus = float(len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+    quota = cgroup_cpu_quota(root)
+    return min(cpus, quota) if quota is not None else cpus
+
+
+def worker_count(workers_per_cpu: float = 1.0, cpus: float | None = None) -> int:
+    """Worker processes for ``cpus`` (default: available CPUs), at least one."""
+    if cpus is None:
+        cpus = available_cpus()
+    return max(1, math.ceil(cpus * workers_per_cpu))
@@ -0,0 +1,89 @@
+"""
+Single-flight call coalescing.
+
+Concurrent calls with the same key share one execution: the first caller
+(the leader) runs the function, the others wait and get its result, or its
+exception. The key is forgotten as soon as the call finishes, so later calls
+always run fresh; nothing is cached. If the leader is interrupted by a
+non-``Exception`` (e.g. KeyboardInterrupt, or cancellation of the task driving
+it) the waiting callers are not failed with it: one of them takes over.
+
+Shared results are the same object for every caller, so they must be treated
+as read-only and must not be bound to one request (e.g. ORM instances bound
+to the leader's session).
+"""
+
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "abandoned")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Exception | None = None
+        self.abandoned = False
+
+
+class SingleFlight:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._counts = {"calls": 0, "coalesced": 0, "errors": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run ``fn`` unless a call with ``key`` is in flight; then share its outcome."""
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if call is None:
+                    call = self._calls[key] = _Call()
+            if leader:
+                return self._lead(key, call, fn)
+
+            call.done.wait()
+            if call.abandoned:
+                continue
+            self._count("coalesced")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._counts, "in_flight": len(self._calls)}
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], T]) -> T:
+        self._count("calls")
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as err:
+            call.error = err
+            self._count("errors")
+            raise
+        except BaseException:
+            call.abandoned = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+        metrics.inc(f"singleflight.{self.name}.{name}")
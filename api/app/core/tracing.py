@@ -0,0 +1,467 @@
+"""
+Lightweight in-process tracing.
+
+Spans are kept in a context variable, so they follow requests across awaits
+and into the threadpool that runs sync dependencies and endpoints. The
+sampling decision is made once per request (honouring a sampled W3C
+``traceparent``); unsampled requests only pay a context variable lookup per
+instrumented call. Finished traces are handed to an exporter as a whole.
+"""
+
+import functools
+import inspect
+import json
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Protocol, TypeVar
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.asgi import get_header, route_path
+from app.core.config import settings
+
+TRACEPARENT_HEADER = b"traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+F = TypeVar("F", bound=Callable[..., Any])
+C = TypeVar("C", bound=type)
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    layer: str
+    start_ns: int
+    end_ns: int = 0
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    trace: "_Trace | None" = field(default=None, repr=False)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "layer": self.layer,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+@dataclass
+class _Trace:
+    spans: list[Span] = field(default_factory=list)
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class InMemoryExporter:
+    """Keeps the most recent traces for the admin endpoints."""
+
+    def __init__(self, max_traces: int = 200) -> None:
+        self._traces: deque[list[Span]] = deque(maxlen=max_traces)
+
+    def export(self, spans: list[Span]) -> None:
+        self._traces.append(spans)
+
+    def traces(self) -> list[list[Span]]:
+        return list(self._traces)
+
+    def clear(self) -> None:
+        self._traces.clear()
+
+
+class JsonLinesExporter:
+    """Appends one JSON object per span to a file."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+
+    def export(self, spans: list[Span]) -> None:
+        with open(self._path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OTLPHttpExporter:
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str = "api", timeout: float = 5.0) -> None:
+        self._url = endpoint.rstrip("/") + "/v1/traces"
+        self._service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: list[Span]) -> None:
+        self._client.post(self._url, json=self._payload(spans))
+
+    def _payload(self, spans: list[Span]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": self._service_name}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "app"}, "spans": [_otlp_span(s) for s in spans]}
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    attributes = {"app.layer": span.layer, **span.attributes}
+    result: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 2 if span.parent_id is None else 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            {"key": key, "value": {"stringValue": str(value)}} for key, value in attributes.items()
+        ],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id is not None:
+        result["parentSpanId"] = span.parent_id
+    return result
+
+
+class BackgroundExporter:
+    """
+    Runs a slow exporter on a daemon thread so requests never wait on I/O.
+
+    The thread starts on the first export, not at import: threads do not
+    survive fork, so one started in a preloading server master would be
+    missing in every worker.
+    """
+
+    def __init__(self, exporter: SpanExporter, max_queue: int = 1000) -> None:
+        self._exporter = exporter
+        self._queue: queue.Queue[list[Span]] = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+
+    def export(self, spans: list[Span]) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                self._exporter.export(spans)
+            except Exception:  # exporting must never kill the thread
+                self.dropped += 1
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Tracer:
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        sample_rate: float = 0.0,
+        respect_parent: bool = True,
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.respect_parent = respect_parent
+
+    def should_sample(self, parent_sampled: bool | None) -> bool:
+        if parent_sampled is not None and self.respect_parent:
+            return parent_sampled
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def start_trace(
+        self, name: str, trace_id: str | None = None, parent_id: str | None = None
+    ) -> Iterator[Span]:
+        """Start a sampled root span; the trace is exported when it ends."""
+        span = Span(
+            trace_id=trace_id or _new_id(128),
+            span_id=_new_id(64),
+            parent_id=parent_id,
+            name=name,
+            layer="http",
+            start_ns=time.time_ns(),
+            trace=_Trace(),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = type(exc).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            assert span.trace is not None
+            span.trace.spans.append(span)
+            self.exporter.export(span.trace.spans)
+
+    def start_child(self, name: str, layer: str, attributes: dict[str, Any] | None = None) -> Span | None:
+        """Open a child of the current span, or None when not tracing."""
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        return Span(
+            trace_id=parent.trace_id,
+            span_id=_new_id(64),
+            parent_id=parent.span_id,
+            name=name,
+            layer=layer,
+            start_ns=time.time_ns(),
+            attributes=attributes or {},
+            trace=parent.trace,
+        )
+
+    @staticmethod
+    def finish(span: Span, error: BaseException | None = None) -> None:
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = type(error).__name__
+        if span.trace is not None:
+            span.trace.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, layer: str, **attributes: Any) -> Iterator[Span | None]:
+        """Child span context manager; a no-op outside a sampled trace."""
+        span = self.start_child(name, layer, attributes)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            self.finish(span, exc)
+            raise
+        else:
+            self.finish(span)
+        finally:
+            _current_span.reset(token)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def format_traceparent(span: Span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """Parse a W3C traceparent into (trace_id, parent_span_id, sampled)."""
+    if value is None:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def traced(name: str | None = None, layer: str = "app") -> Callable[[F], F]:
+    """Decorator wrapping a sync or async function in a child span."""
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with tracer.span(span_name, layer):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, layer):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def trace_methods(layer: str) -> Callable[[C], C]:
+    """Class decorator tracing every public method defined on the class."""
+
+    def decorator(cls: C) -> C:
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.isfunction(value):
+                setattr(cls, attr, traced(f"{cls.__name__}.{attr}", layer)(value))
+        return cls
+
+    return decorator
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of each sampled request."""
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracer = self.tracer
+        parent = parse_traceparent(get_header(scope, TRACEPARENT_HEADER))
+        if not tracer.should_sample(parent[2] if parent else None):
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = (parent[0], parent[1]) if parent else (None, None)
+        with tracer.start_trace(f"{scope['method']} {scope['path']}", trace_id, parent_id) as span:
+            status_code = 500
+
+            async def send_with_status(message: Any) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = route_path(scope)
+                span.name = f"{scope['method']} {route}"
+                span.attributes.update(
+                    {"http.method": scope["method"], "http.route": route, "http.status_code": status_code}
+                )
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """httpx transport that spans outbound requests and propagates traceparent."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        span = tracer.start_child(
+            f"{request.method} {request.url.host}",
+            "http.client",
+            {"http.method": request.method, "http.url": str(request.url.copy_with(query=None))},
+        )
+        if span is None:
+            return await self._transport.handle_async_request(request)
+        request.headers["traceparent"] = format_traceparent(span)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException as exc:
+            tracer.finish(span, exc)
+            raise
+        span.attributes["http.status_code"] = response.status_code
+        tracer.finish(span)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    span = tracer.start_child(
+        statement.split(None, 1)[0].upper() if statement else "SQL",
+        "db",
+        {"db.statement": statement[:500], "db.executemany": executemany},
+    )
+    if span is not None:
+        conn.info.setdefault("trace_spans", []).append(span)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    spans = conn.info.get("trace_spans")
+    if spans:
+        tracer.finish(spans.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        tracer.finish(spans.pop(), exception_context.original_exception)
+
+
+def layer_summary(traces: list[list[Span]]) -> dict[str, dict[str, float]]:
+    """Total and average time per layer over the given traces."""
+    summary: dict[str, dict[str, float]] = {}
+    for spans in traces:
+        for span in spans:
+            entry = summary.setdefault(span.layer, {"spans": 0, "total_ms": 0.0})
+            entry["spans"] += 1
+            entry["total_ms"] += span.duration_ms
+    for entry in summary.values():
+        entry["total_ms"] = round(entry["total_ms"], 3)
+        entry["avg_ms"] = round(entry["total_ms"] / entry["spans"], 3)
+    return summary
+
+
+def _build_exporter() -> SpanExporter:
+    if settings.tracing_exporter == "jsonl":
+        return BackgroundExporter(JsonLinesExporter(settings.tracing_jsonl_path))
+    if settings.tracing_exporter == "otlp":
+        return BackgroundExporter(
+            OTLPHttpExporter(settings.tracing_otlp_endpoint, settings.tracing_service_name)
+        )
+    return InMemoryExporter()
+
+
+tracer = Tracer(
+    exporter=_build_exporter(),
+    sample_rate=settings.tracing_sample_rate,
+    respect_parent=settings.tracing_respect_parent,
+)
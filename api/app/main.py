@@ -1,49 +1,38 @@
 """
 Boilerplate API - Main FastAPI application.
+
+Run with ``uvicorn --factory app.main:create_app``; ``app.main:app`` still
+works and builds the app on first access.
 """
 
+import math
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.db import engine
-from app.models.base import Base
-from app.routers import auth, health, items
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Lifespan context manager to create tables on startup."""
-    # Create tables on startup
-    Base.metadata.create_all(bind=engine)
-    yield
-
-
-# Create FastAPI app
-app = FastAPI(
-    title="Boilerplate API",
-    description="Production-ready full-stack boilerplate API",
-    version="1.0.0",
-    lifespan=lifespan,
-)
-
-# CORS middleware - Allow requests from frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost", "http://api:8000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+from app.core.compression import CompressionMiddleware
+from app.core.config import Settings, get_settings
+from app.core.db import (
+    SessionLocal,
+    SlotFrozenError,
+    dispose_engines,
+    get_engine,
+    pool_limits,
+    shard_router,
 )
-
-# Include routers
-app.include_router(health.router)
-app.include_router(auth.router)
-app.include_router(items.router)
+from app.core.lifecycle import DrainMiddleware, RequestDrain, warm_pool
+from app.core.memory import MemoryMiddleware, memory_tracker
+from app.core.migrations import check_schema
+from app.core.profiling import ProfilingMiddleware, profiler
+from app.core.responses import FastJSONResponse
+from app.core.tracing import TracingMiddleware, tracer
+from app.models.base import Base
+from app.repositories.warmup import warm_up_statements
+from app.routers import admin, auth, health, items
 
 
-@app.get("/")
 def root() -> dict[str, str]:
     """API root endpoint."""
     return {
@@ -51,3 +40,115 @@ def root() -> dict[str, str]:
         "docs": "/docs",
         "openapi": "/openapi.json",
     }
+
+
+def slot_frozen(request: Request, exc: Exception) -> FastJSONResponse:
+    """A write to a user whose data is being moved between shards: retry shortly."""
+    return FastJSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(shard_router.refresh_seconds) + 1)},
+    )
+
+
+def create_app(startup_settings: Settings | None = None) -> FastAPI:
+    """
+    Build the application.
+
+    ``startup_settings`` (default: the process settings) only controls how
+    the app is assembled and started: the startup schema check, warm-up,
+    memory tracing, the shutdown drain and which middleware are installed.
+    Everything that runs per request (routers, services, repositories and
+    their group-commit and cache singletons, the database engines) reads
+    the process settings from ``app.core.config``, so override those through
+    the environment, not here.
+    """
+    settings = startup_settings or get_settings()
+    drain = RequestDrain()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        """
+        Verify (or, in development, create) the schema and warm up on startup,
+        on the primary database and every shard; drain in-flight requests and
+        close all connections on shutdown.
+        """
+        engines = list(dict.fromkeys([get_engine(), *shard_router.engines()]))
+        for engine in engines:
+            if settings.db_startup == "check":
+                check_schema(engine)
+            elif settings.db_startup == "create_all":
+                Base.metadata.create_all(bind=engine)
+            if settings.warmup_connections:
+                warm_pool(engine, min(settings.warmup_connections, pool_limits()[0]))
+            if settings.warmup_statements:
+                with SessionLocal(bind=engine) as db:
+                    warm_up_statements(db)
+        if shard_router.enabled:
+            shard_router.refresh()
+        if settings.memory_tracing:
+            memory_tracker.start()
+        drain.start()
+        yield
+        await drain.drain(settings.shutdown_drain_seconds)
+        dispose_engines()
+
+    app = FastAPI(
+        title="Boilerplate API",
+        description="Production-ready full-stack boilerplate API",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+    )
+
+    # CORS middleware - Allow requests from frontend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://localhost", "http://api:8000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Request profiling - pass-through unless sampling or the X-Profile header is enabled
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    # Per-route peak allocation - pass-through unless tracemalloc tracing is on
+    app.add_middleware(MemoryMiddleware, tracker=memory_tracker)
+
+    # Response compression - negotiated zstd/br/gzip, skips small and binary bodies
+    if settings.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            levels={
+                "gzip": settings.compression_gzip_level,
+                "br": settings.compression_brotli_quality,
+                "zstd": settings.compression_zstd_level,
+            },
+        )
+
+    # Tracing - root span per sampled request
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
+    # In-flight request tracking for graceful shutdown (added last so it wraps everything)
+    app.add_middleware(DrainMiddleware, drain=drain)
+    app.state.request_drain = drain
+
+    # Include routers
+    app.include_router(health.router)
+    app.include_router(auth.router)
+    app.include_router(items.router)
+    app.include_router(admin.router)
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_exception_handler(SlotFrozenError, slot_frozen)
+
+    return app
+
+
+def __getattr__(name: str) -> FastAPI:
+    # Lazy module attribute (PEP 562) so importing this module builds nothing
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
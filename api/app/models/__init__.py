@@ -4,6 +4,8 @@ All models inherit from Base, UUIDMixin, and TimestampMixin for consistency.
 """
 
 from app.models.base import Base, TimestampMixin, UUIDMixin
+from app.models.directory import DirectoryEntry, ShardSlot
+from app.models.job import Job, JobStatus
 from app.models.user import OAuthAccount, User
 
 __all__ = [
@@ -12,4 +14,8 @@ __all__ = [
     "TimestampMixin",
     "User",
     "OAuthAccount",
+    "DirectoryEntry",
+    "ShardSlot",
+    "Job",
+    "JobStatus",
 ]
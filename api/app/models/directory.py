@@ -0,0 +1,37 @@
+"""
+Global tables of a sharded deployment, kept in the primary database.
+
+Users and everything they own live on the shard their id hashes to; these two
+tables answer the questions that come without a user id (who has this email?)
+and where each hash slot currently lives.
+"""
+
+import uuid
+
+from sqlalchemy import Boolean, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin
+
+
+class DirectoryEntry(Base, TimestampMixin):
+    """Lookup key (``email:...``, ``oauth:<provider>:<id>``) to the owning user."""
+
+    __tablename__ = "user_directory"
+
+    key: Mapped[str] = mapped_column(String(320), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+
+
+class ShardSlot(Base, TimestampMixin):
+    """
+    Placement of one hash slot that differs from the default (slot % shards),
+    or that is frozen for writes while it is being moved.
+    """
+
+    __tablename__ = "shard_slots"
+
+    slot: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    shard: Mapped[int] = mapped_column(Integer, nullable=False)
+    frozen: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
@@ -4,11 +4,27 @@ Replace this with your domain entity (Product, Post, Todo, etc.)
 """
 
 import uuid
+from datetime import datetime
+from typing import Any
 
-from sqlalchemy import Boolean, ForeignKey, String, Text
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    event,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column
 
+from app.core.config import settings
 from app.models.base import Base, TimestampMixin, UUIDMixin
 
 
@@ -16,13 +32,138 @@ class Item(Base, UUIDMixin, TimestampMixin):
     """
     Simple item model to demonstrate CRUD patterns.
     This is an example - replace with your domain entity.
+
+    On PostgreSQL the table is hash-partitioned by user_id, so every per-user
+    query touches one partition. A partitioned table's primary key must contain
+    the partition key, hence (id, user_id); the ORM still identifies items by id.
+
+    Items inactive for archive_after_days are moved to ItemArchive (see
+    app/core/archiving.py); the partial index finds them without a scan
+    (its condition is what each dialect renders for ``~Item.is_active``).
     """
 
     __tablename__ = "items"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "user_id"),
+        Index(
+            "ix_items_inactive_updated_at",
+            "updated_at",
+            postgresql_where=text("NOT is_active"),
+            sqlite_where=text("is_active = 0"),
+        ),
+        {"postgresql_partition_by": "HASH (user_id)"},
+    )
+
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict[str, Any]:  # noqa: N805
+        return {"primary_key": [cls.__table__.c.id]}
 
     user_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        nullable=False,
+        index=True,
     )
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+
+
+class ItemArchive(Base, UUIDMixin, TimestampMixin):
+    """
+    Cold storage for items that stayed inactive, so they stop bloating the
+    indexes of the hot table. Same columns as Item plus when it was archived;
+    rows are copied as they were, timestamps included.
+    """
+
+    __tablename__ = "items_archive"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class UserItemStats(Base, TimestampMixin):
+    """
+    Item counts per user, archived items included, kept up to date by
+    ItemRepository in the transaction of each write so dashboards read one
+    row instead of counting. ``python -m app.core.item_stats reconcile``
+    repairs drift (e.g. from writes that bypassed the repository).
+    """
+
+    __tablename__ = "user_item_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    active: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+# Partitions of the hash-partitioned table (PostgreSQL). Indexes created on
+# the parent (user_id, search_vector) are created on each partition as well.
+PARTITION_PREFIX = "items_p"
+
+
+def partition_ddl(table: str, partitions: int) -> list[str]:
+    """CREATE TABLE statements of the hash partitions of ``table``."""
+    return [
+        f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+        f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        for remainder in range(partitions)
+    ]
+
+
+for _statement in partition_ddl("items", settings.item_partitions):
+    event.listen(Item.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+# Full-text search over title and description (see migration 76d800f1b128).
+# Not mapped: PostgreSQL maintains a generated tsvector column with a GIN
+# index, SQLite an external-content FTS5 table synced by triggers. The same
+# DDL runs on create_all so tests and local databases can search too.
+SEARCH_CONFIG = "english"
+FTS_TABLE = "items_fts"
+
+_search_ddl = {
+    "postgresql": [
+        f"""ALTER TABLE items ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+        ) STORED""",
+        "CREATE INDEX ix_items_search_vector ON items USING gin (search_vector)",
+    ],
+    "sqlite": [
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "title, description, content='items', content_rowid='rowid', tokenize='porter unicode61')",
+        f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON items BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+        "VALUES (new.rowid, new.title, new.description); END",
+        f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON items BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); END",
+        f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, description ON items BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+        "VALUES (new.rowid, new.title, new.description); END",
+    ],
+}
+for _dialect, _statements in _search_ddl.items():
+    for _statement in _statements:
+        event.listen(Item.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+# The triggers go with the table; the FTS5 table has to be dropped explicitly.
+event.listen(
+    Item.__table__,
+    "after_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
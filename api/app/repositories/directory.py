@@ -0,0 +1,42 @@
+"""
+Global directory of lookup keys to user ids (sharded deployments only).
+
+Logins arrive with an email (or an OAuth account id) rather than a user id,
+so before the user's shard is known one primary-key read here says which
+user, and therefore which shard, to ask.
+"""
+
+import uuid
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from app.core.tracing import trace_methods
+from app.models import DirectoryEntry
+from app.models.enums import OAuthProvider
+
+_ENTRY_USER_ID = select(DirectoryEntry.user_id).where(DirectoryEntry.key == bindparam("key"))
+
+
+def email_key(email: str) -> str:
+    return f"email:{email}"
+
+
+def oauth_key(provider: str, provider_account_id: str) -> str:
+    return f"oauth:{OAuthProvider(provider).value}:{provider_account_id}"
+
+
+@trace_methods("repository")
+class DirectoryRepository:
+    def __init__(self, db: Session) -> None:
+        self._db = db
+
+    def get(self, key: str) -> uuid.UUID | None:
+        return self._db.execute(_ENTRY_USER_ID, {"key": key}).scalar_one_or_none()
+
+    def add(self, key: str, user_id: uuid.UUID) -> None:
+        """
+        Claim ``key`` for ``user_id`` in the caller's transaction; the primary
+        key makes a second claim of the same key fail on flush.
+        """
+        self._db.add(DirectoryEntry(key=key, user_id=user_id))
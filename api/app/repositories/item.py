@@ -3,36 +3,406 @@ Item repository - Example CRUD repository.
 This demonstrates the repository pattern for any entity.
 """
 
+import csv
+import functools
+import io
+import re
 import uuid
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime
+from typing import Any
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    table,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, load_only
 
-from app.models.item import Item
+from app.core.config import settings
+from app.core.dataloader import BatchLoader, attach
+from app.core.db import check_writable, current_shard
+from app.core.group_commit import GroupCommitter
+from app.core.tracing import trace_methods
+from app.models.item import FTS_TABLE, SEARCH_CONFIG, Item, ItemArchive, UserItemStats
 
+# Full-row lookups by id from concurrent requests can share one IN query.
+item_loader: BatchLoader[uuid.UUID, dict[str, Any]] = BatchLoader(
+    "items",
+    enabled=settings.batch_loads_enabled,
+    window=settings.batch_window_ms / 1000,
+    max_batch_size=settings.batch_max_size,
+)
 
+# Creates from concurrent requests can share one INSERT and one commit.
+item_writer: GroupCommitter[dict[str, Any], dict[str, Any]] = GroupCommitter(
+    "items",
+    enabled=settings.group_commit_enabled,
+    max_delay=settings.group_commit_max_delay_ms / 1000,
+    max_batch_size=settings.group_commit_max_batch_size,
+)
+
+
+# Hot reads execute statements built once per shape, with bound parameters:
+# building a select() and generating its cache key on every call costs more
+# than the compiled-cache lookup it is for (benchmarks/bench_statements.py).
+# Field subsets are validated, so the number of shapes is bounded.
+
+
+@functools.lru_cache(maxsize=256)
+def _item_by_id(fields: tuple[str, ...]) -> Select[tuple[Item]]:
+    stmt = select(Item).where(Item.id == bindparam("item_id"))
+    if fields:
+        stmt = stmt.options(load_only(*(getattr(Item, field) for field in fields)))
+    return stmt
+
+
+@functools.lru_cache(maxsize=256)
+def _items_for_user(fields: tuple[str, ...]) -> Select[tuple[Item]]:
+    stmt = select(Item).where(Item.user_id == bindparam("user_id")).order_by(Item.created_at.desc())
+    if fields:
+        stmt = stmt.options(load_only(*(getattr(Item, field) for field in fields)))
+    return stmt
+
+
+@functools.lru_cache(maxsize=256)
+def _archived_item_by_id(fields: tuple[str, ...]) -> Select[tuple[ItemArchive]]:
+    stmt = select(ItemArchive).where(ItemArchive.id == bindparam("item_id"))
+    if fields:
+        stmt = stmt.options(load_only(*(getattr(ItemArchive, field) for field in fields)))
+    return stmt
+
+
+@functools.lru_cache(maxsize=256)
+def _item_rows_for_user(columns: tuple[str, ...], include_archived: bool = False) -> Select[Any]:
+    if not include_archived:
+        return (
+            select(*(getattr(Item, column) for column in columns))
+            .where(Item.user_id == bindparam("user_id"))
+            .order_by(Item.created_at.desc())
+        )
+    rows = union_all(
+        *(
+            select(*(getattr(model, column) for column in columns), model.created_at.label("sort_key"))
+            .where(model.user_id == bindparam("user_id"))
+            for model in (Item, ItemArchive)
+        )
+    ).subquery()
+    return select(*(rows.c[column] for column in columns)).order_by(rows.c.sort_key.desc())
+
+
+_ITEM_STATES = select(Item.__table__).where(Item.id.in_(bindparam("item_ids", expanding=True)))
+_ITEM_WATERMARK = select(func.count(), func.max(Item.updated_at)).where(
+    Item.user_id == bindparam("user_id")
+)
+# Archiving moves a row without changing it: the combined count and latest
+# updated_at stay the same, as does the list including archived items.
+_ALL_UPDATES = union_all(
+    *(
+        select(model.updated_at).where(model.user_id == bindparam("user_id"))
+        for model in (Item, ItemArchive)
+    )
+).subquery()
+_ALL_ITEMS_WATERMARK = select(func.count(), func.max(_ALL_UPDATES.c.updated_at))
+_INSERT_ITEMS = insert(Item.__table__).returning(  # type: ignore[arg-type]
+    *Item.__table__.columns, sort_by_parameter_order=True
+)
+_USER_STATS = select(UserItemStats.total, UserItemStats.active).where(
+    UserItemStats.user_id == bindparam("user_id")
+)
+
+
+def copy_rows(
+    cursor: Any, driver: str, table_name: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]
+) -> bool:
+    """
+    COPY ``rows`` into a PostgreSQL table through a DBAPI cursor; returns
+    False, having done nothing, if ``driver`` has no COPY support.
+    """
+    statement = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN"
+    if driver == "psycopg":
+        # psycopg 3 adapts each value itself
+        with cursor.copy(statement) as copy:
+            for row in rows:
+                copy.write_row(row)
+        return True
+    if driver == "psycopg2":
+        buffer = io.StringIO()
+        # Quote everything but None, so COPY tells NULL from an empty string.
+        csv.writer(buffer, quoting=csv.QUOTE_NOTNULL).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(f"{statement} WITH (FORMAT csv)", buffer)
+        return True
+    return False
+
+
+@functools.cache
+def _add_to_stats(dialect: str) -> Any:
+    """Upsert adding to a user's item counts (PostgreSQL and SQLite syntax are the same)."""
+    stmt = (postgresql if dialect == "postgresql" else sqlite).insert(UserItemStats).values(
+        user_id=bindparam("user_id"), total=bindparam("total"), active=bindparam("active")
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserItemStats.user_id],
+        set_={
+            "total": UserItemStats.total + stmt.excluded.total,
+            "active": UserItemStats.active + stmt.excluded.active,
+            "updated_at": func.now(),
+        },
+    )
+
+
+@trace_methods("repository")
 class ItemRepository:
     def __init__(self, db: Session) -> None:
         self._db = db
 
-    def get_all_for_user(self, user_id: uuid.UUID) -> list[Item]:
-        """Get all items for a user."""
-        stmt = select(Item).where(Item.user_id == user_id).order_by(Item.created_at.desc())
-        return list(self._db.execute(stmt).scalars().all())
+    def get_all_for_user(
+        self, user_id: uuid.UUID, fields: Sequence[str] | None = None
+    ) -> list[Item]:
+        """Get all items for a user, loading only ``fields`` (plus the key) if given."""
+        stmt = _items_for_user(tuple(fields or ()))
+        return list(self._db.execute(stmt, {"user_id": user_id}).scalars().all())
+
+    def get_rows_for_user(
+        self, user_id: uuid.UUID, columns: Sequence[str], include_archived: bool = False
+    ) -> list[Row[Any]]:
+        """
+        Get column tuples for a user's items, without building ORM objects.
+
+        With ``include_archived`` the user's archived items are merged in.
+        """
+        stmt = _item_rows_for_user(tuple(columns), include_archived)
+        return list(self._db.execute(stmt, {"user_id": user_id}).all())
+
+    def iter_rows_for_user(
+        self,
+        user_id: uuid.UUID,
+        columns: Sequence[str],
+        batch_size: int,
+        include_archived: bool = False,
+    ) -> Iterator[Sequence[Row[Any]]]:
+        """
+        Stream a user's item column tuples in batches of ``batch_size``.
 
-    def get_by_id(self, item_id: uuid.UUID) -> Item | None:
-        """Get item by ID."""
-        stmt = select(Item).where(Item.id == item_id)
-        return self._db.execute(stmt).scalar_one_or_none()
+        Uses a server-side cursor (yield_per) where the driver supports one,
+        so memory is bounded by the batch size, not the number of items.
+        """
+        result = self._db.execute(
+            _item_rows_for_user(tuple(columns), include_archived),
+            {"user_id": user_id},
+            execution_options={"yield_per": batch_size},
+        )
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    def get_watermark_for_user(
+        self, user_id: uuid.UUID, include_archived: bool = False
+    ) -> tuple[int, datetime | None]:
+        """Get the item count and latest updated_at for a user (one aggregate query)."""
+        stmt = _ALL_ITEMS_WATERMARK if include_archived else _ITEM_WATERMARK
+        count, latest = self._db.execute(stmt, {"user_id": user_id}).one()
+        return count, latest
+
+    def search_for_user(
+        self, user_id: uuid.UUID, query: str, limit: int, offset: int = 0
+    ) -> list[Item]:
+        """
+        Full-text search of a user's items by title and description, best first.
+
+        PostgreSQL matches the GIN-indexed search_vector with a web-search style
+        query ("quoted phrases", -excluded, or); SQLite matches the FTS5 table
+        with all words of the query. Title matches rank above description ones.
+        """
+        if self._db.get_bind().dialect.name == "postgresql":
+            tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+            vector: ColumnElement[Any] = literal_column("items.search_vector")
+            stmt = (
+                select(Item)
+                .where(Item.user_id == user_id, vector.op("@@")(tsquery))
+                .order_by(func.ts_rank_cd(vector, tsquery).desc(), Item.created_at.desc())
+            )
+        else:
+            terms = re.findall(r"\w+", query)
+            if not terms:
+                return []
+            fts = table(FTS_TABLE, column("rowid"))
+            stmt = (
+                select(Item)
+                .join(fts, fts.c.rowid == literal_column("items.rowid"))
+                .where(
+                    Item.user_id == user_id,
+                    literal_column(FTS_TABLE).op("MATCH")(" ".join(f'"{term}"' for term in terms)),
+                )
+                # bm25 is lower for better matches; columns weighted title, description
+                .order_by(func.bm25(literal_column(FTS_TABLE), 4.0, 1.0), Item.created_at.desc())
+            )
+        return list(self._db.execute(stmt.limit(limit).offset(offset)).scalars().all())
+
+    def get_by_id(self, item_id: uuid.UUID, fields: Sequence[str] | None = None) -> Item | None:
+        """
+        Get item by ID, loading only ``fields`` (plus the key) if given.
+
+        Full-row lookups go through the batch loader when it is enabled.
+        """
+        if not fields and item_loader.enabled:
+            state = item_loader.load(item_id, self.get_states, group=current_shard(self._db))
+            return attach(self._db, Item, state) if state is not None else None
+        stmt = _item_by_id(tuple(fields or ()))
+        return self._db.execute(stmt, {"item_id": item_id}).scalar_one_or_none()
+
+    def get_stats_for_user(self, user_id: uuid.UUID) -> tuple[int, int]:
+        """Get a user's total and active item counts (one primary key lookup)."""
+        row = self._db.execute(_USER_STATS, {"user_id": user_id}).one_or_none()
+        return (row.total, row.active) if row is not None else (0, 0)
+
+    def _add_to_stats(self, user_id: uuid.UUID, total: int, active: int) -> None:
+        """Adjust a user's counts in the current transaction (not committed)."""
+        stmt = _add_to_stats(self._db.get_bind().dialect.name)
+        self._db.execute(stmt, {"user_id": user_id, "total": total, "active": active})
+
+    def get_archived(
+        self, item_id: uuid.UUID, fields: Sequence[str] | None = None
+    ) -> ItemArchive | None:
+        """Get an archived item by ID, loading only ``fields`` (plus the key) if given."""
+        stmt = _archived_item_by_id(tuple(fields or ()))
+        return self._db.execute(stmt, {"item_id": item_id}).scalar_one_or_none()
+
+    def restore(self, archived: ItemArchive) -> Item:
+        """
+        Move an archived item back to the items table, unchanged; flushed, not
+        committed, so a following update() bumps its updated_at.
+        """
+        item = Item(**{column.key: getattr(archived, column.key) for column in Item.__table__.columns})
+        self._db.delete(archived)
+        self._db.add(item)
+        self._db.flush()
+        return item
+
+    def get_states(self, item_ids: Sequence[uuid.UUID]) -> dict[uuid.UUID, dict[str, Any]]:
+        """Column values of the given items, by id (one query)."""
+        result = self._db.execute(_ITEM_STATES, {"item_ids": list(item_ids)})
+        return {row["id"]: dict(row) for row in result.mappings()}
 
     def create(self, user_id: uuid.UUID, title: str, description: str | None = None) -> Item:
-        """Create a new item."""
+        """
+        Create a new item.
+
+        With group commit enabled, the insert and commit are shared with the
+        creates of concurrent requests (see item_writer).
+        """
+        if item_writer.enabled:
+            check_writable(self._db)
+            row = {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "title": title,
+                "description": description,
+                "is_active": True,
+            }
+            state = item_writer.submit(row, self.insert_rows, group=current_shard(self._db))
+            return attach(self._db, Item, state)
         item = Item(user_id=user_id, title=title, description=description)
         self._db.add(item)
+        self._add_to_stats(user_id, 1, 1)
         self._db.commit()
         self._db.refresh(item)
         return item
 
+    def insert_rows(self, rows: Sequence[dict[str, Any]]) -> list[dict[str, Any] | Exception]:
+        """
+        Insert items of any users with one multi-row INSERT and commit.
+
+        Returns each row's stored column values, in order. If the batch fails,
+        the rows are retried one transaction each, and a row that fails alone
+        gets its error in place of its values.
+        """
+        try:
+            return list(self._insert_and_commit(rows))
+        except SQLAlchemyError:
+            self._db.rollback()
+            if len(rows) == 1:
+                raise
+        results: list[dict[str, Any] | Exception] = []
+        for row in rows:
+            try:
+                results.extend(self._insert_and_commit([row]))
+            except SQLAlchemyError as err:
+                self._db.rollback()
+                results.append(err)
+        return results
+
+    def _insert_and_commit(self, rows: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
+        stored = self._db.execute(_INSERT_ITEMS, list(rows)).mappings().all()
+        counts = Counter(row["user_id"] for row in rows)
+        stmt = _add_to_stats(self._db.get_bind().dialect.name)
+        # In a fixed order, so concurrent batches lock the stats rows alike
+        self._db.execute(
+            stmt,
+            [
+                {"user_id": user_id, "total": count, "active": count}
+                for user_id, count in sorted(counts.items())
+            ],
+        )
+        self._db.commit()
+        return [dict(row) for row in stored]
+
+    def bulk_create(self, user_id: uuid.UUID, rows: Sequence[dict[str, Any]]) -> None:
+        """
+        Insert many items for a user and commit, without loading them back.
+
+        PostgreSQL gets a single COPY (with psycopg or psycopg2); other
+        databases and drivers a multi-row INSERT.
+        """
+        values = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "title": row["title"],
+                "description": row.get("description"),
+                "is_active": True,
+            }
+            for row in rows
+        ]
+        if not self._copy(values):
+            self._db.execute(insert(Item), values)
+        self._add_to_stats(user_id, len(values), len(values))
+        self._db.commit()
+
+    def _copy(self, values: list[dict[str, Any]]) -> bool:
+        dialect = self._db.get_bind().dialect
+        if dialect.name != "postgresql":
+            return False
+        columns = ("id", "user_id", "title", "description", "is_active")
+        dbapi_connection = self._db.connection().connection.dbapi_connection
+        assert dbapi_connection is not None
+        cursor: Any = dbapi_connection.cursor()
+        try:
+            return copy_rows(
+                cursor,
+                dialect.driver,
+                Item.__tablename__,
+                columns,
+                ([value[column] for column in columns] for value in values),
+            )
+        finally:
+            cursor.close()
+
     def update(
         self,
         item: Item,
@@ -45,13 +415,27 @@ class ItemRepository:
             item.title = title
         if description is not None:
             item.description = description
-        if is_active is not None:
-            item.is_active = is_active
+        if is_active is not None and is_active != item.is_active:
+            # Conditional, so concurrent identical updates count once
+            result = self._db.execute(
+                update(Item)
+                .where(Item.id == item.id, Item.is_active == item.is_active)
+                .values(is_active=is_active)
+            )
+            if result.rowcount:  # type: ignore[attr-defined]
+                self._add_to_stats(item.user_id, 0, 1 if is_active else -1)
         self._db.commit()
         self._db.refresh(item)
         return item
 
-    def delete(self, item: Item) -> None:
-        """Delete an item."""
-        self._db.delete(item)
+    def delete(self, item: Item | ItemArchive) -> None:
+        """Delete an item (archived or not)."""
+        model = type(item)
+        user_id = item.user_id
+        # Only the request that actually deleted the row counts it
+        was_active = self._db.execute(
+            delete(model).where(model.id == item.id).returning(model.is_active)
+        ).scalar_one_or_none()
+        if was_active is not None:
+            self._add_to_stats(user_id, -1, -1 if was_active else 0)
         self._db.commit()
@@ -0,0 +1,185 @@
+"""
+Job repository - the database side of the background job queue.
+
+Services enqueue work with ``JobRepository(db).enqueue(kind, payload)``;
+the worker (app/core/jobs.py) claims, heartbeats and finishes jobs here.
+"""
+
+import uuid
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tracing import trace_methods
+from app.models import Job, JobStatus
+
+# Columns a claimed job is handed to the worker with
+CLAIMED = (Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts, Job.run_at)
+
+
+def aware(value: datetime) -> datetime:
+    """SQLite returns naive datetimes; every timestamp here is UTC."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+
+
+@trace_methods("repository")
+class JobRepository:
+    def __init__(self, db: Session) -> None:
+        self._db = db
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: dict[str, Any] | None = None,
+        delay_seconds: float = 0.0,
+        max_attempts: int | None = None,
+    ) -> Job:
+        """
+        Queue a job to run once ``delay_seconds`` have passed, and commit.
+
+        Jobs run at least once: a job whose worker dies mid-way runs again, so
+        handlers should be idempotent.
+        """
+        job = Job(
+            kind=kind,
+            payload=payload or {},
+            status=JobStatus.QUEUED,
+            max_attempts=max_attempts or settings.job_max_attempts,
+            run_at=datetime.now(UTC) + timedelta(seconds=delay_seconds),
+        )
+        self._db.add(job)
+        self._db.commit()
+        self._db.refresh(job)
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Job | None:
+        return self._db.get(Job, job_id)
+
+    def claim(self, worker_id: str, limit: int, now: datetime) -> list[dict[str, Any]]:
+        """
+        Mark up to ``limit`` due jobs as running for ``worker_id`` and commit;
+        returns them as plain values, oldest first.
+
+        One statement: the due jobs are selected FOR UPDATE SKIP LOCKED, so
+        concurrent workers claim disjoint jobs without waiting on each other
+        (SQLite runs the statement alone, which is as good).
+        """
+        due = (
+            select(Job.id)
+            .where(Job.status == JobStatus.QUEUED, Job.run_at <= now)
+            .order_by(Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id.in_(due.scalar_subquery()), Job.status == JobStatus.QUEUED)
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=Job.attempts + 1,
+                started_at=now,
+                heartbeat_at=now,
+                locked_by=worker_id,
+            )
+            .returning(*CLAIMED)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = [dict(row) for row in self._db.execute(stmt).mappings()]
+        self._db.commit()
+        for job in jobs:
+            job["run_at"] = aware(job["run_at"])
+        return sorted(jobs, key=lambda job: job["run_at"])
+
+    def heartbeat(self, worker_id: str, job_ids: Sequence[uuid.UUID], now: datetime) -> None:
+        """Record that ``worker_id`` is still running these jobs, and commit."""
+        if job_ids:
+            self._db.execute(
+                update(Job)
+                .where(Job.id.in_(job_ids), Job.locked_by == worker_id)
+                .values(heartbeat_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            self._db.commit()
+
+    def finish(
+        self,
+        job_id: uuid.UUID,
+        worker_id: str,
+        now: datetime,
+        error: str | None = None,
+        retry_at: datetime | None = None,
+    ) -> bool:
+        """
+        Record the outcome of an attempt and commit: succeeded without
+        ``error``; otherwise queued again for ``retry_at`` or, without one,
+        failed. Returns False if the job was no longer this worker's (its
+        lease ran out and it was queued again).
+        """
+        values: dict[str, Any] = {"locked_by": None, "heartbeat_at": None}
+        if error is None:
+            values.update(status=JobStatus.SUCCEEDED, finished_at=now)
+        elif retry_at is not None:
+            values.update(status=JobStatus.QUEUED, run_at=retry_at, last_error=error)
+        else:
+            values.update(status=JobStatus.FAILED, finished_at=now, last_error=error)
+        result = self._db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        self._db.commit()
+        return bool(result.rowcount)  # type: ignore[attr-defined]
+
+    def requeue_stale(self, before: datetime) -> int:
+        """
+        Queue again the running jobs without a heartbeat since ``before``
+        (their worker died), or fail those out of attempts; commits and
+        returns how many.
+        """
+        stale = (Job.status == JobStatus.RUNNING) & (Job.heartbeat_at < before)
+        total = 0
+        outcomes: list[tuple[Any, dict[str, Any]]] = [
+            (
+                Job.attempts >= Job.max_attempts,
+                {"status": JobStatus.FAILED, "finished_at": before, "last_error": "worker lost"},
+            ),
+            (Job.attempts < Job.max_attempts, {"status": JobStatus.QUEUED}),
+        ]
+        for condition, values in outcomes:
+            result = self._db.execute(
+                update(Job)
+                .where(stale, condition)
+                .values(locked_by=None, heartbeat_at=None, **values)
+                .execution_options(synchronize_session=False)
+            )
+            total += result.rowcount  # type: ignore[attr-defined]
+        self._db.commit()
+        return total
+
+    def purge(self, before: datetime) -> int:
+        """Delete succeeded and failed jobs finished before ``before``; commits."""
+        result = self._db.execute(
+            delete(Job)
+            .where(Job.status.in_([JobStatus.SUCCEEDED, JobStatus.FAILED]), Job.finished_at < before)
+            .execution_options(synchronize_session=False)
+        )
+        self._db.commit()
+        return result.rowcount  # type: ignore[attr-defined]
+
+    def queue_stats(self, now: datetime) -> dict[str, Any]:
+        """Jobs per status, due jobs and how long the oldest due job has waited."""
+        stats: dict[str, Any] = dict.fromkeys(JobStatus, 0)
+        stats.update(self._db.execute(select(Job.status, func.count()).group_by(Job.status)).tuples().all())
+        due, oldest = self._db.execute(
+            select(func.count(), func.min(Job.run_at)).where(
+                Job.status == JobStatus.QUEUED, Job.run_at <= now
+            )
+        ).one()
+        stats["due"] = due
+        stats["oldest_due_seconds"] = (now - aware(oldest)).total_seconds() if oldest else 0.0
+        return {str(key): value for key, value in stats.items()}
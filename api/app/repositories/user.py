@@ -1,22 +1,75 @@
 import uuid
+from collections.abc import Sequence
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.dataloader import BatchLoader, attach
+from app.core.db import current_shard, is_sharded, use_shard
+from app.core.singleflight import SingleFlight
+from app.core.tracing import trace_methods
 from app.models import OAuthAccount, User
+from app.repositories.directory import DirectoryRepository, email_key, oauth_key
 
+# Concurrent lookups of one user (e.g. a reconnect storm) share one query,
+# and lookups of different users can be batched into one IN query.
+user_lookups = SingleFlight("user_lookups")
+user_loader: BatchLoader[uuid.UUID, dict[str, Any]] = BatchLoader(
+    "users",
+    enabled=settings.batch_loads_enabled,
+    window=settings.batch_window_ms / 1000,
+    max_batch_size=settings.batch_max_size,
+)
 
+# Built once, with bound parameters (see the note in repositories/item.py)
+_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_USER_STATES = select(User.__table__).where(User.id.in_(bindparam("user_ids", expanding=True)))
+_OAUTH_ACCOUNT = select(OAuthAccount).where(
+    OAuthAccount.provider == bindparam("provider"),
+    OAuthAccount.provider_account_id == bindparam("provider_account_id"),
+)
+
+
+@trace_methods("repository")
 class UserRepository:
     def __init__(self, db: Session) -> None:
         self._db = db
 
     def get_by_id(self, user_id: uuid.UUID) -> User | None:
-        stmt = select(User).where(User.id == user_id)
-        return self._db.execute(stmt).scalar_one_or_none()
+        use_shard(self._db, user_id)
+        return self._db.execute(_USER_BY_ID, {"user_id": user_id}).scalar_one_or_none()
+
+    def get_by_id_coalesced(self, user_id: uuid.UUID) -> User | None:
+        """
+        get_by_id, sharing one query among concurrent lookups of the same id.
+
+        With batch loading enabled, lookups of different ids made within the
+        batch window are resolved by one IN query as well. Only the column
+        values are shared; each caller gets its own User instance attached to
+        its own session, without another query. Sharded, batches never mix
+        users of different shards.
+        """
+        use_shard(self._db, user_id)
+        group = current_shard(self._db)
+        state = user_lookups.do(
+            user_id, lambda: user_loader.load(user_id, self.get_states, group=group)
+        )
+        return attach(self._db, User, state) if state is not None else None
+
+    def get_states(self, user_ids: Sequence[uuid.UUID]) -> dict[uuid.UUID, dict[str, Any]]:
+        """Column values of the given users, by id (one query)."""
+        result = self._db.execute(_USER_STATES, {"user_ids": list(user_ids)})
+        return {row["id"]: dict(row) for row in result.mappings()}
 
     def get_by_email(self, email: str) -> User | None:
-        stmt = select(User).where(User.email == email)
-        return self._db.execute(stmt).scalar_one_or_none()
+        """Sharded, the email is resolved to a user id by the global directory first."""
+        if is_sharded(self._db):
+            user_id = DirectoryRepository(self._db).get(email_key(email))
+            return self.get_by_id(user_id) if user_id is not None else None
+        return self._db.execute(_USER_BY_EMAIL, {"email": email}).scalar_one_or_none()
 
     def create(
         self,
@@ -26,11 +79,16 @@ class UserRepository:
         avatar_url: str | None = None,
     ) -> User:
         user = User(
+            id=uuid.uuid4(),
             email=email,
             name=name,
             hashed_password=hashed_password,
             avatar_url=avatar_url,
         )
+        if is_sharded(self._db):
+            # The id picks the shard; the directory entry is committed with the user
+            use_shard(self._db, user.id)
+            DirectoryRepository(self._db).add(email_key(email), user.id)
         self._db.add(user)
         self._db.commit()
         self._db.refresh(user)
@@ -51,6 +109,7 @@ class UserRepository:
         return user
 
 
+@trace_methods("repository")
 class OAuthAccountRepository:
     def __init__(self, db: Session) -> None:
         self._db = db
@@ -58,11 +117,13 @@ class OAuthAccountRepository:
     def get_by_provider_and_account_id(
         self, provider: str, provider_account_id: str
     ) -> OAuthAccount | None:
-        stmt = select(OAuthAccount).where(
-            OAuthAccount.provider == provider,
-            OAuthAccount.provider_account_id == provider_account_id,
-        )
-        return self._db.execute(stmt).scalar_one_or_none()
+        if is_sharded(self._db):
+            user_id = DirectoryRepository(self._db).get(oauth_key(provider, provider_account_id))
+            if user_id is None:
+                return None
+            use_shard(self._db, user_id)
+        params = {"provider": provider, "provider_account_id": provider_account_id}
+        return self._db.execute(_OAUTH_ACCOUNT, params).scalar_one_or_none()
 
     def create(
         self,
@@ -79,6 +140,9 @@ class OAuthAccountRepository:
             access_token=access_token,
             refresh_token=refresh_token,
         )
+        if is_sharded(self._db):
+            use_shard(self._db, user_id)
+            DirectoryRepository(self._db).add(oauth_key(provider, provider_account_id), user_id)
         self._db.add(oauth_account)
         self._db.commit()
         self._db.refresh(oauth_account)
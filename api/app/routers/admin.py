@@ -0,0 +1,226 @@
+"""
+Admin diagnostics API routes.
+All routes require a superuser; none of them touch the database.
+"""
+
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.auth.dependencies import get_current_superuser
+from app.core.config import settings
+from app.core.memory import GroupBy, memory_tracker
+from app.core.metrics import metrics
+from app.core.profiling import format_collapsed, profiler, sample_process
+from app.core.tracing import InMemoryExporter, layer_summary, tracer
+from app.schemas.admin import MemoryConfig, ProfilingConfig, TracingConfig
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_current_superuser)],
+)
+
+SortKey = Literal["cumulative", "tottime", "calls"]
+
+
+@router.get("/metrics")
+def get_metrics() -> dict[str, Any]:
+    """
+    Get this worker's counters, summaries and process stats (RSS, GC).
+    """
+    return metrics.snapshot()
+
+
+@router.get("/profiling")
+def get_profiling_stats(
+    limit: int = Query(30, ge=1, le=500),
+    sort: SortKey = "cumulative",
+) -> dict[str, Any]:
+    """
+    Get aggregated cProfile stats per route for profiled requests.
+    """
+    return profiler.snapshot(limit=limit, sort=sort)
+
+
+@router.put("/profiling")
+def configure_profiling(data: ProfilingConfig) -> dict[str, Any]:
+    """
+    Change the request sample rate on this worker (0 disables sampling).
+    """
+    profiler.sample_rate = data.sample_rate
+    return {"sample_rate": profiler.sample_rate, "header_enabled": profiler.header_token is not None}
+
+
+@router.delete("/profiling", status_code=status.HTTP_204_NO_CONTENT)
+def reset_profiling() -> None:
+    """
+    Discard collected profiling stats.
+    """
+    profiler.reset()
+
+
+@router.get("/profiling/requests/{profile_id}")
+def get_request_profile(
+    profile_id: str,
+    limit: int = Query(30, ge=1, le=500),
+    sort: SortKey = "cumulative",
+) -> dict[str, Any]:
+    """
+    Get call stats for a request profiled via the X-Profile header.
+
+    The id is returned in the X-Profile-Id response header.
+    """
+    result = profiler.request_profile(profile_id, limit=limit, sort=sort)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+    return result
+
+
+@router.get("/profiling/sample", response_class=PlainTextResponse)
+def sample_worker(
+    seconds: float = Query(5.0, gt=0, le=settings.profiling_max_sample_seconds),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+) -> str:
+    """
+    Sample every thread of this worker for a fixed duration.
+
+    Returns collapsed stacks, one "frame;frame;frame count" line per stack,
+    ready for flamegraph.pl or speedscope.
+    """
+    stacks = sample_process(seconds, interval_ms / 1000)
+    if stacks is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A sampling run is already in progress",
+        )
+    return format_collapsed(stacks)
+
+
+def _memory_status() -> dict[str, Any]:
+    return {
+        "tracing": memory_tracker.tracing,
+        "sample_rate": memory_tracker.sample_rate,
+        "frames": memory_tracker.frames,
+        "routes": memory_tracker.route_stats(),
+        "snapshots": memory_tracker.snapshot_ids(),
+    }
+
+
+@router.get("/memory")
+def get_memory_stats() -> dict[str, Any]:
+    """
+    Get per-route peak allocation stats and stored snapshot ids.
+    """
+    return _memory_status()
+
+
+@router.put("/memory")
+def configure_memory(data: MemoryConfig) -> dict[str, Any]:
+    """
+    Start or stop tracemalloc tracing on this worker.
+
+    Tracing slows allocation-heavy code noticeably; leave it off by default.
+    """
+    if data.sample_rate is not None:
+        memory_tracker.sample_rate = data.sample_rate
+    if data.tracing:
+        memory_tracker.start(frames=data.frames)
+    else:
+        memory_tracker.stop()
+    return _memory_status()
+
+
+@router.delete("/memory", status_code=status.HTTP_204_NO_CONTENT)
+def reset_memory_stats() -> None:
+    """
+    Discard per-route peak allocation stats.
+    """
+    memory_tracker.reset()
+
+
+@router.post("/memory/snapshots", status_code=status.HTTP_201_CREATED)
+def take_memory_snapshot(
+    group_by: GroupBy = "lineno",
+    limit: int = Query(25, ge=1, le=500),
+) -> dict[str, Any]:
+    """
+    Take a tracemalloc snapshot and return its largest allocation sites.
+    """
+    if not memory_tracker.tracing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Memory tracing is not enabled",
+        )
+    snapshot_id = memory_tracker.take_snapshot()
+    return {"id": snapshot_id, "top": memory_tracker.top(snapshot_id, group_by, limit)}
+
+
+@router.get("/memory/snapshots/{snapshot_id}")
+def get_memory_snapshot(
+    snapshot_id: str,
+    against: str | None = None,
+    group_by: GroupBy = "lineno",
+    limit: int = Query(25, ge=1, le=500),
+) -> dict[str, Any]:
+    """
+    Get a snapshot's largest allocation sites, or its growth since ``against``.
+    """
+    if against is None:
+        result = memory_tracker.top(snapshot_id, group_by, limit)
+    else:
+        result = memory_tracker.diff(snapshot_id, against, group_by, limit)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found",
+        )
+    return {"id": snapshot_id, "against": against, "stats": result}
+
+
+def _memory_exporter() -> InMemoryExporter:
+    if not isinstance(tracer.exporter, InMemoryExporter):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Traces are exported externally; set TRACING_EXPORTER=memory to read them here",
+        )
+    return tracer.exporter
+
+
+@router.put("/tracing")
+def configure_tracing(data: TracingConfig) -> dict[str, Any]:
+    """
+    Change the trace sample rate on this worker (0 disables local sampling).
+    """
+    tracer.sample_rate = data.sample_rate
+    return {"sample_rate": tracer.sample_rate, "respect_parent": tracer.respect_parent}
+
+
+@router.get("/traces")
+def get_traces(limit: int = Query(20, ge=1, le=200)) -> list[list[dict[str, Any]]]:
+    """
+    Get the most recent sampled traces, newest first.
+    """
+    traces = _memory_exporter().traces()[-limit:]
+    return [[span.to_dict() for span in spans] for spans in reversed(traces)]
+
+
+@router.get("/traces/summary")
+def get_trace_summary() -> dict[str, Any]:
+    """
+    Get how time splits across layers (http, dependency, service, repository, db, ...).
+    """
+    traces = _memory_exporter().traces()
+    return {"traces": len(traces), "layers": layer_summary(traces)}
+
+
+@router.delete("/traces", status_code=status.HTTP_204_NO_CONTENT)
+def clear_traces() -> None:
+    """
+    Discard stored traces.
+    """
+    _memory_exporter().clear()
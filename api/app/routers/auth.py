@@ -3,28 +3,33 @@ Authentication API routes.
 Follows strict layering: uses AuthService, not repositories directly.
 """
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Response, status
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_active_user
 from app.core.config import settings
 from app.core.db import get_db
+from app.core.etag import make_etag, none_match, not_modified, version_tag
+from app.core.msgpack_codec import MsgPackRoute, wants_msgpack
+from app.core.tracing import traced
 from app.models import User
 from app.repositories.user import OAuthAccountRepository, UserRepository
 from app.schemas.user import TokenResponse, UserLogin, UserRegister, UserResponse, UserUpdate
 from app.services.auth import AuthService
 from app.services.oauth import OAuthService
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=MsgPackRoute)
 
 
+@traced(layer="dependency")
 def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
     """Dependency to get AuthService instance."""
     user_repository = UserRepository(db)
     return AuthService(user_repository)
 
 
+@traced(layer="dependency")
 def get_oauth_service(db: Session = Depends(get_db)) -> OAuthService:
     """Dependency to get OAuthService instance."""
     user_repository = UserRepository(db)
@@ -74,13 +79,20 @@ def login(
 
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(
+    response: Response,
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(get_current_active_user),
-) -> UserResponse:
+) -> UserResponse | Response:
     """
     Get current authenticated user information.
 
+    Returns 304 when If-None-Match carries the current ETag.
     Requires valid JWT token in Authorization header.
     """
+    etag = make_etag(version_tag(current_user.id, current_user.updated_at), wants_msgpack())
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return UserResponse.model_validate(current_user)
 
 
@@ -1,6 +1,10 @@
-"""Health check endpoint."""
+"""Health check endpoints."""
 
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Response, status
+
+from app.core.health import readiness_probe
 
 router = APIRouter(tags=["health"])
 
@@ -13,3 +17,27 @@ def health_check() -> dict[str, str]:
     Returns status ok if server is running.
     """
     return {"status": "ok"}
+
+
+@router.get("/health/live")
+def liveness_check() -> dict[str, str]:
+    """
+    Liveness probe.
+
+    Returns status ok if the process can serve requests; never touches the database.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+def readiness_check(response: Response) -> dict[str, Any]:
+    """
+    Readiness probe.
+
+    Checks database connectivity and pool health (cached for a short interval).
+    Returns 503 when the database is unavailable or the pool is degraded.
+    """
+    result = readiness_probe.check()
+    if result["status"] != "ok":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
@@ -4,43 +4,251 @@ Replace 'items' with your domain entity routes.
 """
 
 import uuid
+from collections.abc import Iterator
+from typing import Any
 
-from fastapi import APIRouter, Depends, status
+import anyio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_active_user
+from app.core.bulk import MEDIA_TYPES, BulkFormat, decode, encode, format_for
+from app.core.cache import item_cache
+from app.core.config import settings
 from app.core.db import get_db
+from app.core.etag import make_etag, none_match, not_modified
+from app.core.msgpack_codec import MsgPackResponse, MsgPackRoute, wants_msgpack
+from app.core.responses import FastJSONResponse
+from app.core.tracing import traced
 from app.models import User
+from app.models.item import Item, ItemArchive
 from app.repositories.item import ItemRepository
-from app.schemas.item import ItemCreate, ItemResponse, ItemUpdate
+from app.schemas.item import (
+    ITEM_RESPONSE_FIELDS,
+    ImportSummary,
+    ItemCreate,
+    ItemResponse,
+    ItemStats,
+    ItemUpdate,
+)
 from app.services.item import ItemService
 
-router = APIRouter(prefix="/items", tags=["items"])
+router = APIRouter(prefix="/items", tags=["items"], route_class=MsgPackRoute)
 
 
+@traced(layer="dependency")
 def get_item_service(db: Session = Depends(get_db)) -> ItemService:
     """Dependency to get ItemService instance."""
     repository = ItemRepository(db)
-    return ItemService(repository)
+    return ItemService(repository, item_cache)
+
+
+def get_item_fields(
+    fields: str | None = Query(
+        None,
+        description=f"Comma-separated subset of item fields to return: {', '.join(ITEM_RESPONSE_FIELDS)}",
+    ),
+) -> tuple[str, ...] | None:
+    """Dependency parsing and validating a sparse fieldset."""
+    if fields is None:
+        return None
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in ITEM_RESPONSE_FIELDS]
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown or empty fields: {', '.join(unknown) or fields!r}",
+        )
+    return requested
+
+
+def _raw_response(content: Any, etag: str) -> Response:
+    """Render already-typed content without response_model validation."""
+    response_class = MsgPackResponse if wants_msgpack() else FastJSONResponse
+    return response_class(content, headers={"ETag": etag})
+
+
+def _etag(version: str, fields: tuple[str, ...] | None = None) -> str:
+    """ETag of a version in the representation negotiated for this request."""
+    return make_etag(version, ",".join(fields or ()), wants_msgpack())
+
+
+def _partial(item: Item | ItemArchive, fields: tuple[str, ...]) -> dict[str, Any]:
+    return {field: getattr(item, field) for field in fields}
 
 
 @router.get("", response_model=list[ItemResponse])
 def list_items(
+    response: Response,
+    fields: tuple[str, ...] | None = Depends(get_item_fields),
+    include_archived: bool = Query(False, description="Also return archived items"),
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(get_current_active_user),
     service: ItemService = Depends(get_item_service),
-) -> list[ItemResponse]:
+) -> list[ItemResponse] | Response:
     """
     Get all items for the current user.
 
+    Pass ?fields=id,title to select (and load) only those columns.
+    Items inactive for a long time are archived and left out unless
+    ?include_archived=true (newest first across both).
+    Send the ETag back in If-None-Match to get a 304 when nothing changed;
+    the check costs one aggregate query and skips loading the items.
     Requires authentication.
     """
-    items = service.get_user_items(current_user.id)
+    version = service.get_user_items_version(current_user.id, include_archived)
+    etag = _etag(version, fields)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+
+    # Archived items are only read as rows. Keyed by the version, cached rows
+    # can never be sent under an ETag newer than they are.
+    if settings.fast_list_responses or include_archived:
+        rows = service.get_user_item_rows(current_user.id, fields, include_archived, version)
+        return _raw_response(rows, etag)
+
+    items = service.get_user_items(current_user.id, fields)
+    if fields is not None:
+        return _raw_response([_partial(item, fields) for item in items], etag)
+    response.headers["ETag"] = etag
     return [ItemResponse.model_validate(item) for item in items]
 
 
+def _closing(chunks: Iterator[bytes], db: Session) -> Iterator[bytes]:
+    """
+    Close the request session once a streamed body is done.
+
+    get_db closes the session before the body is sent; streaming reuses it
+    (a closed Session can be used again), so it is closed again at the end.
+    """
+    try:
+        yield from chunks
+    finally:
+        db.close()
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}},
+)
+def export_items(
+    format: BulkFormat = Query("ndjson"),
+    fields: tuple[str, ...] | None = Depends(get_item_fields),
+    include_archived: bool = Query(False, description="Also export archived items"),
+    current_user: User = Depends(get_current_active_user),
+    service: ItemService = Depends(get_item_service),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """
+    Export all items of the current user as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and sent one batch at a time;
+    the next batch is only fetched after the previous one was handed to the
+    server, so memory stays flat for any number of items and a slow client
+    slows the query down instead of filling buffers. Compressed when the
+    client sends Accept-Encoding.
+    Requires authentication.
+    """
+    columns = fields or ITEM_RESPONSE_FIELDS
+    batches = service.iter_user_item_rows(
+        current_user.id, fields, settings.export_batch_size, include_archived
+    )
+    return StreamingResponse(
+        _closing(encode(format, columns, batches), db),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="items.{format}"'},
+    )
+
+
+@router.get("/stats", response_model=ItemStats)
+def get_item_stats(
+    current_user: User = Depends(get_current_active_user),
+    service: ItemService = Depends(get_item_service),
+) -> ItemStats:
+    """
+    Total, active and inactive item counts of the current user.
+
+    Reads one row of counts maintained on every write, however many items
+    the user has. Archived items are included.
+    Requires authentication.
+    """
+    return service.get_user_item_stats(current_user.id)
+
+
+@router.get("/search", response_model=list[ItemResponse])
+def search_items(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_user),
+    service: ItemService = Depends(get_item_service),
+) -> list[ItemResponse]:
+    """
+    Full-text search over the current user's item titles and descriptions.
+
+    Results are ranked (title matches first) and paginated with limit/offset.
+    Requires authentication.
+    """
+    items = service.search_items(current_user.id, q, limit, offset)
+    return [ItemResponse.model_validate(item) for item in items]
+
+
+def _iter_body(request: Request) -> Iterator[bytes]:
+    """Request body chunks, pulled from the event loop by a worker thread."""
+    stream = request.stream()
+    while True:
+        try:
+            yield anyio.from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+@router.post(
+    "/import",
+    response_model=ImportSummary,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {media_type: {} for media_type in MEDIA_TYPES.values()},
+        }
+    },
+)
+async def import_items(
+    request: Request,
+    format: BulkFormat | None = Query(None, description="Defaults to the body's Content-Type"),
+    current_user: User = Depends(get_current_active_user),
+    service: ItemService = Depends(get_item_service),
+) -> ImportSummary:
+    """
+    Bulk-create items from an NDJSON or CSV (with header) body.
+
+    The body is parsed as it arrives and inserted in chunks, with multi-row
+    INSERTs (COPY on PostgreSQL); only one chunk is held in memory. Rows that
+    fail validation are skipped and reported by row number.
+    Requires authentication.
+    """
+    fmt = format or format_for(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=",
+        )
+    return await run_in_threadpool(
+        service.import_items,
+        current_user.id,
+        decode(fmt, _iter_body(request)),
+        settings.import_chunk_size,
+        settings.import_max_errors,
+    )
+
+
 @router.post("", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
 def create_item(
     data: ItemCreate,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
     service: ItemService = Depends(get_item_service),
 ) -> ItemResponse:
@@ -50,21 +258,33 @@ def create_item(
     Requires authentication.
     """
     item = service.create_item(current_user.id, data)
+    response.headers["ETag"] = _etag(service.item_version(item))
     return ItemResponse.model_validate(item)
 
 
 @router.get("/{item_id}", response_model=ItemResponse)
 def get_item(
     item_id: uuid.UUID,
+    response: Response,
+    fields: tuple[str, ...] | None = Depends(get_item_fields),
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(get_current_active_user),
     service: ItemService = Depends(get_item_service),
-) -> ItemResponse:
+) -> ItemResponse | Response:
     """
-    Get a single item by ID.
+    Get a single item by ID, archived or not.
 
+    Pass ?fields=id,title to select (and load) only those columns.
+    Send the ETag back in If-None-Match to get a 304 when it is unchanged.
     Requires authentication and authorization (user owns the item).
     """
-    item = service.get_item(item_id, current_user.id)
+    item = service.get_item(item_id, current_user.id, fields)
+    etag = _etag(service.item_version(item), fields)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    if fields is not None:
+        return _raw_response(_partial(item, fields), etag)
+    response.headers["ETag"] = etag
     return ItemResponse.model_validate(item)
 
 
@@ -72,27 +292,34 @@ def get_item(
 def update_item(
     item_id: uuid.UUID,
     data: ItemUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     current_user: User = Depends(get_current_active_user),
     service: ItemService = Depends(get_item_service),
 ) -> ItemResponse:
     """
     Update an item.
 
+    Send the item's ETag in If-Match to fail with 412 instead of overwriting
+    a concurrent change.
     Requires authentication and authorization (user owns the item).
     """
-    item = service.update_item(item_id, current_user.id, data)
+    item = service.update_item(item_id, current_user.id, data, if_match)
+    response.headers["ETag"] = _etag(service.item_version(item))
     return ItemResponse.model_validate(item)
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_item(
     item_id: uuid.UUID,
+    if_match: str | None = Header(None),
     current_user: User = Depends(get_current_active_user),
     service: ItemService = Depends(get_item_service),
 ) -> None:
     """
     Delete an item.
 
+    Send the item's ETag in If-Match to fail with 412 if it changed meanwhile.
     Requires authentication and authorization (user owns the item).
     """
-    service.delete_item(item_id, current_user.id)
+    service.delete_item(item_id, current_user.id, if_match)
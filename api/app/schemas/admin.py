@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+
+
+class ProfilingConfig(BaseModel):
+    sample_rate: float = Field(..., ge=0.0, le=1.0)
+
+
+class MemoryConfig(BaseModel):
+    tracing: bool
+    sample_rate: float | None = Field(None, ge=0.0, le=1.0)
+    frames: int | None = Field(None, ge=1, le=100)
+
+
+class TracingConfig(BaseModel):
+    sample_rate: float = Field(..., ge=0.0, le=1.0)
@@ -25,3 +25,25 @@ class ItemResponse(BaseModel):
     is_active: bool
     created_at: datetime
     updated_at: datetime
+
+
+# Fields clients may select with ?fields= (sparse fieldsets)
+ITEM_RESPONSE_FIELDS: tuple[str, ...] = tuple(ItemResponse.model_fields)
+
+
+class ItemStats(BaseModel):
+    total: int
+    active: int
+    inactive: int
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+
+class ImportSummary(BaseModel):
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+    errors_truncated: bool = False
@@ -10,11 +10,13 @@ from app.auth.security import (
     hash_password,
     verify_password,
 )
+from app.core.tracing import trace_methods
 from app.models import User
 from app.repositories import UserRepository
 from app.schemas.user import UserLogin, UserRegister, UserUpdate
 
 
+@trace_methods("service")
 class AuthService:
     def __init__(self, user_repository: UserRepository) -> None:
         self._user_repository = user_repository
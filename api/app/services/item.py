@@ -4,25 +4,145 @@ Demonstrates the service pattern for any domain entity.
 """
 
 import uuid
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
 
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 
-from app.models.item import Item
+from app.core.bulk import Record, RecordError
+from app.core.cache import Cache
+from app.core.etag import check_if_match, version_tag
+from app.core.singleflight import SingleFlight
+from app.core.tracing import trace_methods
+from app.models.item import Item, ItemArchive
 from app.repositories.item import ItemRepository
-from app.schemas.item import ItemCreate, ItemUpdate
+from app.schemas.item import (
+    ITEM_RESPONSE_FIELDS,
+    ImportRowError,
+    ImportSummary,
+    ItemCreate,
+    ItemStats,
+    ItemUpdate,
+)
 
+# Identical concurrent list reads (e.g. a reconnect storm) share one query.
+item_list_reads = SingleFlight("item_lists")
 
+
+@trace_methods("service")
 class ItemService:
-    def __init__(self, repository: ItemRepository) -> None:
+    def __init__(self, repository: ItemRepository, cache: Cache | None = None) -> None:
         self._repository = repository
+        self._cache = cache
+
+    def get_user_items(
+        self, user_id: uuid.UUID, fields: Sequence[str] | None = None
+    ) -> list[Item]:
+        """Get all items for a user (only ``fields`` are loaded if given)."""
+        return self._repository.get_all_for_user(user_id, fields)
+
+    def get_user_item_rows(
+        self,
+        user_id: uuid.UUID,
+        fields: Sequence[str] | None = None,
+        include_archived: bool = False,
+        version: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get all items for a user as plain dicts shaped like ItemResponse.
+
+        Only ``fields`` are selected if given; archived items are included if
+        ``include_archived``. Values come straight from typed columns, so they
+        are not re-validated. Served from the cache when one is configured;
+        writes through this service invalidate the user's lists. Pass the
+        list's current ``version`` (get_user_items_version) to also miss after
+        writes this process did not see: other workers with a per-worker
+        cache, the archiving job, direct SQL. Identical concurrent calls
+        share one query either way.
+        """
+        columns = tuple(fields) if fields else ITEM_RESPONSE_FIELDS
+        if self._cache is None:
+            return item_list_reads.do(
+                (user_id, columns, include_archived),
+                lambda: self._load_rows(user_id, columns, include_archived),
+            )
+        # The cache coalesces concurrent misses itself.
+        return self._cache.get_or_load(
+            str(user_id),
+            ",".join(columns)
+            + (";archived" if include_archived else "")
+            + (f";{version}" if version else ""),
+            lambda: self._load_rows(user_id, columns, include_archived),
+        )
+
+    def iter_user_item_rows(
+        self,
+        user_id: uuid.UUID,
+        fields: Sequence[str] | None = None,
+        batch_size: int = 1000,
+        include_archived: bool = False,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Stream all items of a user as batches of dicts shaped like ItemResponse.
+
+        Reads through a server-side cursor and bypasses the cache, for exports
+        of any size.
+        """
+        columns = tuple(fields) if fields else ITEM_RESPONSE_FIELDS
+        for rows in self._repository.iter_rows_for_user(
+            user_id, columns, batch_size, include_archived
+        ):
+            yield [dict(zip(columns, row, strict=True)) for row in rows]
+
+    def _load_rows(
+        self, user_id: uuid.UUID, columns: tuple[str, ...], include_archived: bool = False
+    ) -> list[dict[str, Any]]:
+        rows = self._repository.get_rows_for_user(user_id, columns, include_archived)
+        return [dict(zip(columns, row, strict=True)) for row in rows]
+
+    def _invalidate(self, user_id: uuid.UUID) -> None:
+        if self._cache is not None:
+            self._cache.invalidate(str(user_id))
+
+    def search_items(
+        self, user_id: uuid.UUID, query: str, limit: int = 20, offset: int = 0
+    ) -> list[Item]:
+        """Search a user's items by title and description, best matches first."""
+        return self._repository.search_for_user(user_id, query, limit, offset)
+
+    def get_user_items_version(self, user_id: uuid.UUID, include_archived: bool = False) -> str:
+        """
+        Version of a user's item list, from a count + max(updated_at) watermark.
 
-    def get_user_items(self, user_id: uuid.UUID) -> list[Item]:
-        """Get all items for a user."""
-        return self._repository.get_all_for_user(user_id)
+        Any create, update or delete changes it, without loading the items.
+        """
+        count, latest = self._repository.get_watermark_for_user(user_id, include_archived)
+        return version_tag(user_id, count, latest)
 
-    def get_item(self, item_id: uuid.UUID, user_id: uuid.UUID) -> Item:
-        """Get single item by ID, with authorization check."""
-        item = self._repository.get_by_id(item_id)
+    def get_user_item_stats(self, user_id: uuid.UUID) -> ItemStats:
+        """A user's item counts, archived items included, from the maintained totals."""
+        total, active = self._repository.get_stats_for_user(user_id)
+        return ItemStats(total=total, active=active, inactive=total - active)
+
+    @staticmethod
+    def item_version(item: Item | ItemArchive) -> str:
+        """Version of a single item, from its id and updated_at."""
+        return version_tag(item.id, item.updated_at)
+
+    def get_item(
+        self, item_id: uuid.UUID, user_id: uuid.UUID, fields: Sequence[str] | None = None
+    ) -> Item | ItemArchive:
+        """
+        Get single item by ID, with authorization check (only ``fields`` loaded if given).
+
+        Items no longer in the hot table are looked up in the archive.
+        """
+        # user_id for the ownership check, updated_at for the item's ETag
+        load = (*fields, "user_id", "updated_at") if fields else None
+        item: Item | ItemArchive | None = self._repository.get_by_id(item_id, load)
+        if item is None:
+            item = self._repository.get_archived(item_id, load)
         if item is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -40,25 +160,95 @@ class ItemService:
 
     def create_item(self, user_id: uuid.UUID, data: ItemCreate) -> Item:
         """Create a new item for user."""
-        return self._repository.create(
+        item = self._repository.create(
             user_id=user_id,
             title=data.title,
             description=data.description,
         )
+        self._invalidate(user_id)
+        return item
+
+    def import_items(
+        self,
+        user_id: uuid.UUID,
+        records: Iterable[Record],
+        chunk_size: int = 1000,
+        max_errors: int = 100,
+    ) -> ImportSummary:
+        """
+        Validate records with ItemCreate and insert the valid ones in chunks.
+
+        Records are consumed lazily and each chunk is inserted and committed
+        on its own, so memory is bounded by the chunk size and an import that
+        fails part-way keeps the chunks before the failure. Invalid records
+        are counted and the first ``max_errors`` reported; the rest go in.
+        """
+        imported = failed = 0
+        errors: list[ImportRowError] = []
+        chunk: list[dict[str, Any]] = []
+
+        def flush() -> None:
+            nonlocal imported
+            if chunk:
+                self._repository.bulk_create(user_id, chunk)
+                self._invalidate(user_id)
+                imported += len(chunk)
+                chunk.clear()
+
+        for number, record in records:
+            problems: list[str] = []
+            if isinstance(record, RecordError):
+                problems.append(str(record))
+            else:
+                try:
+                    chunk.append(ItemCreate.model_validate(record).model_dump())
+                except ValidationError as err:
+                    problems.extend(
+                        f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}"
+                        for error in err.errors()
+                    )
+            if problems:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append(ImportRowError(row=number, errors=problems))
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+
+        return ImportSummary(
+            imported=imported,
+            failed=failed,
+            errors=errors,
+            errors_truncated=failed > len(errors),
+        )
 
     def update_item(
-        self, item_id: uuid.UUID, user_id: uuid.UUID, data: ItemUpdate
+        self,
+        item_id: uuid.UUID,
+        user_id: uuid.UUID,
+        data: ItemUpdate,
+        if_match: str | None = None,
     ) -> Item:
-        """Update an item, with authorization check."""
+        """Update an item, with authorization and If-Match precondition checks."""
         item = self.get_item(item_id, user_id)  # Validates ownership
-        return self._repository.update(
+        check_if_match(if_match, self.item_version(item))
+        if isinstance(item, ItemArchive):
+            # An archived item that is written to is hot again
+            item = self._repository.restore(item)
+        item = self._repository.update(
             item=item,
             title=data.title,
             description=data.description,
             is_active=data.is_active,
         )
+        self._invalidate(user_id)
+        return item
 
-    def delete_item(self, item_id: uuid.UUID, user_id: uuid.UUID) -> None:
-        """Delete an item, with authorization check."""
+    def delete_item(
+        self, item_id: uuid.UUID, user_id: uuid.UUID, if_match: str | None = None
+    ) -> None:
+        """Delete an item, with authorization and If-Match precondition checks."""
         item = self.get_item(item_id, user_id)  # Validates ownership
+        check_if_match(if_match, self.item_version(item))
         self._repository.delete(item)
+        self._invalidate(user_id)
@@ -11,11 +11,13 @@ import httpx
 from fastapi import HTTPException, status
 
 from app.core.config import settings
+from app.core.tracing import TracingTransport, trace_methods
 from app.models import User
 from app.models.enums import OAuthProvider
 from app.repositories.user import OAuthAccountRepository, UserRepository
 
 
+@trace_methods("service")
 class OAuthService:
     """
     Service for handling OAuth authentication flow.
@@ -107,7 +109,7 @@ class OAuthService:
 
     async def _exchange_code_for_token(self, code: str) -> dict[str, Any]:
         """Exchange authorization code for access token."""
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(transport=TracingTransport()) as client:
             response = await client.post(
                 self.GOOGLE_TOKEN_URL,
                 data={
@@ -129,7 +131,7 @@ class OAuthService:
 
     async def _fetch_google_user_info(self, access_token: str) -> dict[str, Any]:
         """Fetch user information from Google."""
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(transport=TracingTransport()) as client:
             response = await client.get(
                 self.GOOGLE_USERINFO_URL,
                 headers={"Authorization": f"Bearer {access_token}"},
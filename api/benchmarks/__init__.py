@@ -0,0 +1 @@
+"""Micro-benchmarks. Run from api/ with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,83 @@
+"""
+Authenticated-request user lookups: one query each vs. batched IN queries.
+
+Runs ``--requests`` lookups of distinct users over a pool of ``--threads``
+worker threads (AnyIO's default request threadpool is 40), each with its own
+session, as get_current_user does. SQLite has no network round trip, so
+``--latency-ms`` adds a sleep per statement to stand in for one.
+
+    python -m benchmarks.bench_batch_loader --requests 1000 --latency-ms 0.5
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.user import User
+from app.repositories.user import UserRepository, user_loader
+from benchmarks.common import report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=0.5)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{Path(tmp) / 'bench.db'}",
+            connect_args={"check_same_thread": False},
+            pool_size=args.threads,
+        )
+        Base.metadata.create_all(engine)
+        user_ids = [uuid.uuid4() for _ in range(args.requests)]
+        with engine.begin() as conn:
+            conn.execute(
+                insert(User),
+                [{"id": uid, "email": f"u{i}@example.com", "name": f"U{i}"} for i, uid in enumerate(user_ids)],
+            )
+
+        queries = 0
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count(*_: object) -> None:
+            nonlocal queries
+            queries += 1
+            time.sleep(args.latency_ms / 1000)
+
+        make_session = sessionmaker(bind=engine)
+
+        def lookup(user_id: uuid.UUID) -> None:
+            with make_session() as session:
+                assert UserRepository(session).get_by_id_coalesced(user_id) is not None
+
+        print(
+            f"{args.requests} lookups, {args.threads} threads, "
+            f"{args.latency_ms} ms/statement simulated latency"
+        )
+        user_loader.window = args.window_ms / 1000
+        user_loader.max_batch_size = args.max_batch
+        for name, enabled in [("one query per lookup", False), ("batched (dataloader)", True)]:
+            user_loader.enabled = enabled
+            queries = 0
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.threads) as pool:
+                list(pool.map(lookup, user_ids))
+            elapsed = time.perf_counter() - start
+            report(name, elapsed, extra=f"{queries:5d} queries  {args.requests / elapsed:8.0f} lookups/s")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+CPU cost vs bytes saved for compressing a GET /items payload.
+
+    python -m benchmarks.bench_compression --items 1000
+"""
+
+import argparse
+
+from app.core.compression import BrotliEncoder, Encoder, GzipEncoder, ZstdEncoder, brotli, zstandard
+from app.core.responses import dumps
+from app.repositories.item import ItemRepository
+from app.services.item import ItemService
+from benchmarks.common import bench, report, seeded_session
+
+LEVELS: dict[str, tuple[type, list[int]]] = {
+    "gzip": (GzipEncoder, [1, 6, 9]),
+    "br": (BrotliEncoder, [1, 4, 6, 11]),
+    "zstd": (ZstdEncoder, [1, 3, 9, 19]),
+}
+
+
+def compress(encoder: Encoder, payload: bytes) -> bytes:
+    return encoder.compress(payload) + encoder.finish()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    session, user_id = seeded_session(args.items)
+    payload = dumps(ItemService(ItemRepository(session)).get_user_item_rows(user_id))
+    print(f"GET /items payload: {args.items} items, {len(payload)} bytes (median of {args.repeat})")
+
+    available = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    for coding, (encoder_cls, levels) in LEVELS.items():
+        if not available[coding]:
+            print(f"{coding}: not installed")
+            continue
+        for level in levels:
+            size = len(compress(encoder_cls(level), payload))
+            seconds = bench(lambda: compress(encoder_cls(level), payload), args.repeat)  # noqa: B023
+            throughput = len(payload) / seconds / 1e6
+            report(
+                f"{coding} level {level}",
+                seconds,
+                extra=f"{size:>9} bytes  ratio {len(payload) / size:5.1f}x  {throughput:7.1f} MB/s",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Peak memory and time of a full export: buffered list vs. streamed batches.
+
+    python -m benchmarks.bench_export --items 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from app.core.bulk import BulkFormat, encode
+from app.core.responses import dumps
+from app.repositories.item import ItemRepository
+from app.schemas.item import ITEM_RESPONSE_FIELDS
+from app.services.item import ItemService
+from benchmarks.common import report, seeded_session
+
+
+def measure(func: Callable[[], int]) -> tuple[float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    session, user_id = seeded_session(args.items)
+    service = ItemService(ItemRepository(session))
+
+    def buffered() -> int:
+        return len(dumps(service.get_user_item_rows(user_id)))
+
+    def streamed(fmt: BulkFormat) -> Callable[[], int]:
+        def run() -> int:
+            batches = service.iter_user_item_rows(user_id, batch_size=args.batch_size)
+            return sum(len(chunk) for chunk in encode(fmt, ITEM_RESPONSE_FIELDS, batches))
+
+        return run
+
+    print(f"Export of {args.items} items (peak traced memory)")
+    for name, func in [
+        ("GET /items (buffered JSON)", buffered),
+        ("GET /items/export ndjson", streamed("ndjson")),
+        ("GET /items/export csv", streamed("csv")),
+    ]:
+        elapsed, peak, size = measure(func)
+        extra = f"peak {peak / 2**20:7.1f} MiB  body {size / 2**20:6.1f} MiB"
+        report(name, elapsed, per=args.items, extra=extra)
+
+
+if __name__ == "__main__":
+    main()
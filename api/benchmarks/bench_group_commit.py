@@ -0,0 +1,110 @@
+"""
+Item creates: one transaction each vs. group commit, at several concurrency levels.
+
+Each of ``--threads`` worker threads (AnyIO's default request threadpool is
+40) creates items through ItemRepository.create with its own session, as
+POST /items does, until ``--creates`` items exist. A file-backed SQLite
+database in WAL mode with synchronous=FULL syncs on every commit; pass
+``--url`` to run against PostgreSQL instead. ``--commit-latency-ms`` adds a
+sleep per commit to stand in for a network round trip and a slower disk.
+
+    python -m benchmarks.bench_group_commit --creates 2000 --threads 1,8,32,64
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.item import Item, UserItemStats
+from app.models.user import User
+from app.repositories.item import ItemRepository, item_writer
+from benchmarks.common import report
+
+
+def make_engine(url: str, threads: int) -> Engine:
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=threads, max_overflow=0)
+    engine = create_engine(
+        url, connect_args={"check_same_thread": False, "timeout": 60}, pool_size=threads
+    )
+
+    @event.listens_for(engine, "connect")
+    def durable(dbapi_connection: Any, _: object) -> None:
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        dbapi_connection.execute("PRAGMA synchronous=FULL")
+
+    return engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--creates", type=int, default=2000)
+    parser.add_argument("--threads", default="1,8,32,64", help="comma-separated levels")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--commit-latency-ms", type=float, default=0.0)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--url", help="database to use instead of a temporary SQLite file")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.threads.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = make_engine(url, max(levels))
+        Base.metadata.create_all(engine)
+        user_ids = [uuid.uuid4() for _ in range(args.users)]
+        with engine.begin() as conn:
+            conn.execute(
+                insert(User),
+                [{"id": uid, "email": f"{uid}@example.com", "name": "B"} for uid in user_ids],
+            )
+
+        commits = 0
+
+        @event.listens_for(engine, "commit")
+        def count(_: object) -> None:
+            nonlocal commits
+            commits += 1
+            time.sleep(args.commit_latency_ms / 1000)
+
+        make_session = sessionmaker(bind=engine)
+
+        def create(index: int) -> None:
+            with make_session() as session:
+                ItemRepository(session).create(user_ids[index % len(user_ids)], f"Item {index}")
+
+        print(
+            f"{args.creates} creates, {args.commit_latency_ms} ms/commit simulated latency, "
+            f"group commit window {args.max_delay_ms} ms / {args.max_batch} rows"
+        )
+        item_writer.max_delay = args.max_delay_ms / 1000
+        item_writer.max_batch_size = args.max_batch
+        for threads in levels:
+            for name, enabled in [("one commit per create", False), ("group commit", True)]:
+                item_writer.enabled = enabled
+                commits = 0
+                start = time.perf_counter()
+                with ThreadPoolExecutor(threads) as pool:
+                    list(pool.map(create, range(args.creates)))
+                elapsed = time.perf_counter() - start
+                report(
+                    f"{threads:3d} threads, {name}",
+                    elapsed,
+                    extra=f"{commits:5d} commits  {args.creates / elapsed:8.0f} creates/s",
+                )
+                with engine.begin() as conn:
+                    conn.execute(text(f"DELETE FROM {Item.__tablename__}"))
+                    conn.execute(text(f"DELETE FROM {UserItemStats.__tablename__}"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Item import throughput: one create (commit + refresh) per row vs. chunked bulk import.
+
+    python -m benchmarks.bench_import --rows 20000
+"""
+
+import argparse
+import time
+
+from app.core.bulk import ndjson_records
+from app.core.responses import dumps
+from app.repositories.item import ItemRepository
+from app.schemas.item import ItemCreate
+from app.services.item import ItemService
+from benchmarks.common import report, seeded_session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = [{"title": f"Imported {i}", "description": "lorem ipsum " * 8} for i in range(args.rows)]
+    body = b"".join(dumps(row) + b"\n" for row in rows)
+    chunks = [body[i : i + 64 * 1024] for i in range(0, len(body), 64 * 1024)]
+
+    print(f"Import of {args.rows} rows ({len(body) / 2**20:.1f} MiB NDJSON)")
+
+    session, user_id = seeded_session(0)
+    service = ItemService(ItemRepository(session))
+    start = time.perf_counter()
+    for row in rows:
+        service.create_item(user_id, ItemCreate.model_validate(row))
+    report("create_item per row", time.perf_counter() - start, per=args.rows)
+
+    session, user_id = seeded_session(0)
+    service = ItemService(ItemRepository(session))
+    start = time.perf_counter()
+    summary = service.import_items(user_id, ndjson_records(chunks), chunk_size=args.chunk_size)
+    assert summary.imported == args.rows
+    report(f"import_items (chunks of {args.chunk_size})", time.perf_counter() - start, per=args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Per-item cost of rendering GET /items.
+
+Compares the validated path (ORM objects -> ItemResponse -> response_model
+re-validation -> stdlib json) with orjson on the same objects and with the
+fast path (column tuples -> dicts -> orjson).
+
+    python -m benchmarks.bench_item_serialization --items 10000
+"""
+
+import argparse
+import json
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.responses import dumps
+from app.repositories.item import ItemRepository
+from app.schemas.item import ItemResponse
+from app.services.item import ItemService
+from benchmarks.common import bench, report, seeded_session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    session, user_id = seeded_session(args.items)
+    service = ItemService(ItemRepository(session))
+    adapter = TypeAdapter(list[ItemResponse])
+
+    def validated_stdlib() -> bytes:
+        session.expunge_all()
+        items = [ItemResponse.model_validate(i) for i in service.get_user_items(user_id)]
+        content = jsonable_encoder(adapter.validate_python(items, from_attributes=True))
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def validated_orjson() -> bytes:
+        session.expunge_all()
+        items = [ItemResponse.model_validate(i) for i in service.get_user_items(user_id)]
+        return dumps([item.model_dump() for item in items])
+
+    def fast_rows() -> bytes:
+        return dumps(service.get_user_item_rows(user_id))
+
+    print(f"GET /items rendering, {args.items} items (median of {args.repeat})")
+    for name, func in [
+        ("ORM + double validation + json", validated_stdlib),
+        ("ORM + single validation + orjson", validated_orjson),
+        ("column tuples + orjson (fast path)", fast_rows),
+    ]:
+        report(name, bench(func, args.repeat), per=args.items, extra=f"{len(func())} bytes")
+
+
+if __name__ == "__main__":
+    main()
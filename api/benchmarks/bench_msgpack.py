@@ -0,0 +1,46 @@
+"""
+Payload size and encode/decode throughput: JSON vs MessagePack for GET /items.
+
+    python -m benchmarks.bench_msgpack --items 1000
+"""
+
+import argparse
+import json
+
+import orjson
+
+from app.core.msgpack_codec import packb, unpackb
+from app.core.responses import dumps
+from app.repositories.item import ItemRepository
+from app.services.item import ItemService
+from benchmarks.common import bench, report, seeded_session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--description-size", type=int, default=40)
+    args = parser.parse_args()
+
+    session, user_id = seeded_session(args.items, description_size=args.description_size)
+    rows = ItemService(ItemRepository(session)).get_user_item_rows(user_id)
+    json_body = dumps(rows)
+    msgpack_body = packb(rows)
+
+    print(f"GET /items, {args.items} items (median of {args.repeat})")
+    print(f"JSON      {len(json_body):>9} bytes")
+    print(f"msgpack   {len(msgpack_body):>9} bytes  ({len(msgpack_body) / len(json_body):.0%} of JSON)")
+    for name, func in [
+        ("encode: stdlib json", lambda: json.dumps(rows, default=str)),
+        ("encode: orjson", lambda: dumps(rows)),
+        ("encode: msgpack", lambda: packb(rows)),
+        ("decode: stdlib json", lambda: json.loads(json_body)),
+        ("decode: orjson", lambda: orjson.loads(json_body)),
+        ("decode: msgpack (typed UUID/datetime)", lambda: unpackb(msgpack_body)),
+    ]:
+        report(name, bench(func, args.repeat), per=args.items)
+
+
+if __name__ == "__main__":
+    main()
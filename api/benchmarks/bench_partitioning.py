@@ -0,0 +1,156 @@
+"""
+items as one table vs. hash-partitioned by user_id (PostgreSQL only).
+
+Builds both layouts side by side in scratch schemas of the configured
+database (``bench_plain``: the pre-partitioning schema, ``bench_partitioned``:
+the current model), loads the same users and items into each, and times
+ItemRepository.get_all_for_user on random users plus insert throughput,
+both bulk (executemany) and one committed row at a time. Also prints how many
+partitions the get_all_for_user plan scans. The schemas are dropped at the end.
+
+The partition count is ITEM_PARTITIONS, as for the app.
+
+    DATABASE_URL=postgresql://... ITEM_PARTITIONS=16 \\
+        python -m benchmarks.bench_partitioning --users 2000 --items-per-user 500
+"""
+
+import argparse
+import random
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import Engine, create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.base import Base
+from app.models.item import Item
+from app.models.user import User
+from app.repositories.item import ItemRepository
+from benchmarks.common import bench, report
+
+PLAIN, PARTITIONED = "bench_plain", "bench_partitioned"
+
+# The items table as it was before partitioning (migration 76d800f1b128)
+PLAIN_DDL = [
+    f"CREATE TABLE {PLAIN}.users (LIKE {PARTITIONED}.users INCLUDING ALL)",
+    f"CREATE TABLE {PLAIN}.items (LIKE {PARTITIONED}.items INCLUDING DEFAULTS INCLUDING GENERATED)",
+    f"ALTER TABLE {PLAIN}.items ADD PRIMARY KEY (id), "
+    f"ADD FOREIGN KEY (user_id) REFERENCES {PLAIN}.users (id) ON DELETE CASCADE",
+    f"CREATE INDEX ON {PLAIN}.items (user_id)",
+    f"CREATE INDEX ON {PLAIN}.items USING gin (search_vector)",
+]
+
+
+def schema_engine(url: str, schema: str) -> Engine:
+    return create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+
+
+@contextmanager
+def scratch_schemas(url: str) -> Iterator[tuple[Engine, Engine]]:
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        for schema in (PLAIN, PARTITIONED):
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+    partitioned = schema_engine(url, PARTITIONED)
+    with partitioned.begin() as conn:
+        Base.metadata.create_all(conn, tables=[User.__table__, Item.__table__])  # type: ignore[list-item]
+    with admin.begin() as conn:
+        for statement in PLAIN_DDL:
+            conn.execute(text(statement))
+    plain = schema_engine(url, PLAIN)
+    try:
+        yield plain, partitioned
+    finally:
+        plain.dispose()
+        partitioned.dispose()
+        with admin.begin() as conn:
+            for schema in (PLAIN, PARTITIONED):
+                conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+
+def seed(engine: Engine, user_ids: list[uuid.UUID], items_per_user: int, batch: int) -> float:
+    """Bulk-insert the users and their items; returns items per second."""
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [{"id": user_id, "email": f"{user_id}@example.com", "name": "B"} for user_id in user_ids],
+        )
+    rows = [
+        {"id": uuid.uuid4(), "user_id": user_id, "title": f"Item {i}", "description": "lorem " * 20}
+        for user_id in user_ids
+        for i in range(items_per_user)
+    ]
+    random.Random(1).shuffle(rows)  # arrive interleaved, as in production
+    start = time.perf_counter()
+    for offset in range(0, len(rows), batch):
+        with engine.begin() as conn:
+            conn.execute(insert(Item), rows[offset : offset + batch])
+    elapsed = time.perf_counter() - start
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return len(rows) / elapsed
+
+
+def partitions_scanned(engine: Engine, user_id: uuid.UUID) -> int:
+    with engine.connect() as conn:
+        plan = conn.execute(
+            text(f"EXPLAIN (COSTS OFF) SELECT * FROM items WHERE user_id = '{user_id}'")
+        ).scalars().all()
+    return sum(1 for line in plan if " on items" in line) or 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--items-per-user", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--single-inserts", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not settings.database_url.startswith("postgresql"):
+        parser.error("needs a PostgreSQL DATABASE_URL")
+    rng = random.Random(42)
+    user_ids = [uuid.uuid4() for _ in range(args.users)]
+    total = args.users * args.items_per_user
+    print(f"{args.users} users x {args.items_per_user} items = {total} items")
+
+    with scratch_schemas(settings.database_url) as (plain, partitioned):
+        layouts = [("plain", plain), (f"{settings.item_partitions} partitions", partitioned)]
+        for name, engine in layouts:
+            rate = seed(engine, user_ids, args.items_per_user, args.batch)
+            scanned = partitions_scanned(engine, user_ids[0])
+            print(f"\n[{name}] bulk insert: {rate:,.0f} items/s, query scans {scanned} table(s)")
+            with Session(engine) as session:
+                repository = ItemRepository(session)
+                sample = [rng.choice(user_ids) for _ in range(args.queries)]
+
+                def get_all(
+                    repository: ItemRepository = repository,
+                    session: Session = session,
+                    sample: list[uuid.UUID] = sample,
+                ) -> None:
+                    for user_id in sample:
+                        repository.get_all_for_user(user_id)
+                        session.expunge_all()
+
+                seconds = bench(get_all, args.repeat)
+                per_query = f"{seconds / args.queries * 1e6:8.1f} us/query"
+                report(f"get_all_for_user x{args.queries}", seconds, extra=per_query)
+
+                start = time.perf_counter()
+                for _ in range(args.single_inserts):
+                    repository.create(rng.choice(user_ids), "single")
+                elapsed = time.perf_counter() - start
+                rate = args.single_inserts / elapsed
+                report(f"create x{args.single_inserts}", elapsed, extra=f"{rate:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
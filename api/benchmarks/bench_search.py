@@ -0,0 +1,82 @@
+"""
+Item search: ILIKE scan vs. full-text index, on a synthetic corpus.
+
+All items belong to one user, the worst case for the per-user ILIKE scan.
+Runs on SQLite (FTS5); on PostgreSQL the same comparison applies to the GIN
+indexed tsvector.
+
+    python -m benchmarks.bench_search --items 1000000
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from sqlalchemy import insert, or_, select
+
+from app.models.item import Item
+from app.repositories.item import ItemRepository
+from benchmarks.common import bench, report, seeded_session
+
+VOCABULARY_SIZE = 20_000
+
+
+def words(rng: random.Random, count: int) -> str:
+    return " ".join(f"w{rng.randrange(VOCABULARY_SIZE)}" for _ in range(count))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    session, user_id = seeded_session(0)
+    start = time.perf_counter()
+    for offset in range(0, args.items, args.batch):
+        session.execute(
+            insert(Item),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "title": words(rng, 3),
+                    "description": words(rng, 25),
+                }
+                for _ in range(min(args.batch, args.items - offset))
+            ],
+        )
+    session.commit()
+    print(f"Seeded {args.items} items in {time.perf_counter() - start:.1f} s (incl. FTS maintenance)")
+
+    repository = ItemRepository(session)
+    term = "w1234"
+
+    def ilike() -> list[Item]:
+        pattern = f"%{term} %"
+        stmt = (
+            select(Item)
+            .where(
+                Item.user_id == user_id,
+                or_(Item.title.ilike(pattern), Item.description.ilike(pattern)),
+            )
+            .order_by(Item.created_at.desc())
+            .limit(20)
+        )
+        return list(session.execute(stmt).scalars())
+
+    matches = len(repository.search_for_user(user_id, term, limit=args.items))
+    print(f"'{term}' matches {matches} items (~{matches / args.items:.2%})")
+    for name, func in [
+        ("ILIKE '%term%' (first page)", ilike),
+        ("full-text search (first page, ranked)", lambda: repository.search_for_user(user_id, term, 20)),
+        ("full-text search (two words)", lambda: repository.search_for_user(user_id, "w1234 w42", 20)),
+    ]:
+        report(name, bench(func, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Cold start: import time, app construction and lifespan startup, per process.
+
+Each run is a fresh interpreter, as for a new worker or autoscaled replica.
+The database is a temporary SQLite file migrated with ``alembic upgrade
+head``, so both startup modes run against the same schema. Exits non-zero
+when the median import of ``app.main`` exceeds ``--budget-ms`` (for CI).
+
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 1000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.core.config import settings
+application = app.main.create_app(settings.model_copy(update={"db_startup": %r}))
+created = time.perf_counter()
+
+async def lifespan():
+    async with application.router.lifespan_context(application):
+        pass
+
+asyncio.run(lifespan())
+started = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "lifespan_ms": (started - created) * 1000,
+}))
+"""
+
+
+def run(args: list[str], env: dict[str, str]) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(args, cwd=API_DIR, env=env, capture_output=True, text=True, check=True)
+
+
+def import_profile(env: dict[str, str], top: int) -> list[tuple[int, str]]:
+    """Slowest modules imported directly by app.main (cumulative us, ``-X importtime``)."""
+    stderr = run([sys.executable, "-X", "importtime", "-c", "import app.main"], env).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if len(name) - len(name.lstrip()) == 3:  # one level below app.main
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{Path(tmp) / 'startup.db'}"}
+        run([sys.executable, "-m", "alembic", "upgrade", "head"], env)
+
+        print(f"Median of {args.runs} fresh processes (ms)")
+        print(f"{'startup mode':<14}{'process':>10}{'import':>10}{'create_app':>12}{'lifespan':>10}")
+        import_ms = []
+        for mode in ("check", "create_all"):
+            samples = []
+            for _ in range(args.runs):
+                result = run([sys.executable, "-c", CHILD % mode], env)
+                samples.append(json.loads(result.stdout))
+            median = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+            import_ms += [s["import_ms"] for s in samples]
+            process = sum(median.values())
+            print(
+                f"{mode:<14}{process:10.1f}{median['import_ms']:10.1f}"
+                f"{median['create_app_ms']:12.1f}{median['lifespan_ms']:10.1f}"
+            )
+
+        print("\nSlowest imports of app.main (cumulative ms, -X importtime)")
+        for cumulative, name in import_profile(env, args.top):
+            print(f"  {cumulative / 1000:8.1f}  {name}")
+
+    median_import = statistics.median(import_ms)
+    if median_import > args.budget_ms:
+        print(f"\nFAIL: import app.main {median_import:.0f} ms > budget {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"\nOK: import app.main {median_import:.0f} ms <= budget {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Python overhead per query of the hot repository lookups.
+
+Compares building the select() on every call (as the repositories did) with
+executing the statements they now build once, plus a lambda_stmt variant.
+In-memory SQLite keeps the database's share small, so the difference is the
+statement construction and cache-key generation saved per query.
+
+    python -m benchmarks.bench_statements --calls 20000
+"""
+
+import argparse
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import event, lambda_stmt, select
+
+from app.core.db import CompiledCacheStats
+from app.models.item import Item
+from app.models.user import User
+from app.repositories.item import ItemRepository
+from app.repositories.user import UserRepository
+from benchmarks.common import bench, report, seeded_session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    session, user_id = seeded_session(args.items)
+    item_id = session.execute(select(Item.id)).scalars().first()
+    email = "bench@example.com"
+    users = UserRepository(session)
+    items = ItemRepository(session)
+    stats = CompiledCacheStats()
+    event.listen(
+        session.get_bind(), "after_cursor_execute", lambda *event_args: stats.record(event_args[4].cache_hit)
+    )
+
+    def rebuilt_user_by_id() -> Any:
+        return session.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
+
+    def rebuilt_user_by_email() -> Any:
+        return session.execute(select(User).where(User.email == email)).scalar_one_or_none()
+
+    def rebuilt_item_by_id() -> Any:
+        return session.execute(select(Item).where(Item.id == item_id)).scalar_one_or_none()
+
+    def lambda_item_by_id() -> Any:
+        stmt = lambda_stmt(lambda: select(Item).where(Item.id == item_id))
+        return session.execute(stmt).scalar_one_or_none()
+
+    def rebuilt_items_for_user() -> Any:
+        stmt = select(Item).where(Item.user_id == user_id).order_by(Item.created_at.desc())
+        return session.execute(stmt).scalars().all()
+
+    cases: list[tuple[str, Callable[[], Any]]] = [
+        ("UserRepository.get_by_id, rebuilt", rebuilt_user_by_id),
+        ("UserRepository.get_by_id, prebuilt", lambda: users.get_by_id(user_id)),
+        ("UserRepository.get_by_email, rebuilt", rebuilt_user_by_email),
+        ("UserRepository.get_by_email, prebuilt", lambda: users.get_by_email(email)),
+        ("ItemRepository.get_by_id, rebuilt", rebuilt_item_by_id),
+        ("ItemRepository.get_by_id, lambda_stmt", lambda_item_by_id),
+        ("ItemRepository.get_by_id, prebuilt", lambda: items.get_by_id(item_id or uuid.uuid4())),
+        (f"get_all_for_user ({args.items} items), rebuilt", rebuilt_items_for_user),
+        (f"get_all_for_user ({args.items} items), prebuilt", lambda: items.get_all_for_user(user_id)),
+    ]
+    print(f"{args.calls} calls each, in-memory SQLite")
+    for name, func in cases:
+        func()  # compile once, load the identity map
+
+        def run(func: Callable[[], Any] = func) -> None:
+            for _ in range(args.calls):
+                func()
+
+        stats.clear()
+        seconds = bench(run, args.repeat)
+        report(name, seconds, extra=f"{seconds / args.calls * 1e6:8.2f} us/query")
+    summary = stats.summary()
+    print(f"\ncompiled cache (last case): {summary['hits']} hits, {summary['misses']} misses")
+
+
+if __name__ == "__main__":
+    main()
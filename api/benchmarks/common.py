@@ -0,0 +1,62 @@
+"""Shared helpers for the benchmarks: a seeded in-memory database and a timer."""
+
+import statistics
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.models.item import Item
+from app.models.user import User
+
+
+def seeded_session(items: int, description_size: int = 200) -> tuple[Session, uuid.UUID]:
+    """In-memory SQLite session holding one user with ``items`` items."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    user = User(email="bench@example.com", name="Bench")
+    session.add(user)
+    session.commit()
+    description = ("lorem ipsum dolor sit amet " * (description_size // 27 + 1))[:description_size]
+    if not items:
+        return session, user.id
+    session.execute(
+        insert(Item),
+        [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user.id,
+                "title": f"Item {i}",
+                "description": description,
+                "is_active": i % 7 != 0,
+            }
+            for i in range(items)
+        ],
+    )
+    session.commit()
+    return session, user.id
+
+
+def bench(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Median wall time of ``repeat`` runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def report(name: str, seconds: float, per: int | None = None, extra: str = "") -> None:
+    line = f"{name:<44} {seconds * 1000:9.2f} ms"
+    if per:
+        line += f"  {seconds / per * 1e6:8.2f} us/item"
+    print(line + (f"  {extra}" if extra else ""))
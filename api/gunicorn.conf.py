@@ -0,0 +1,58 @@
+"""
+Gunicorn configuration for production: ``gunicorn -c gunicorn.conf.py``.
+
+Runs the ASGI app in Uvicorn workers, one per available CPU by default (see
+app.core.server), all tunable through the same environment variables / .env
+as the app (WEB_CONCURRENCY, WORKERS_PER_CPU, MAX_REQUESTS, ...). Gunicorn's
+own GUNICORN_CMD_ARGS and command line flags still take precedence.
+
+With PRELOAD_APP the app is imported once in the master and forked, so the
+workers share its memory copy-on-write. Nothing opens a database connection
+or starts a thread at import time, and post_fork discards any engine the
+master did create, so no socket is ever shared between processes.
+"""
+
+import gc
+
+from app.core.config import settings
+from app.core.db import dispose_engines, pool_limits
+from app.core.server import available_cpus, worker_count
+
+wsgi_app = "app.main:create_app()"
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = settings.server_bind
+
+workers = settings.web_concurrency or worker_count(settings.workers_per_cpu)
+# Every worker (forked from this process) sizes its pool for this many workers
+settings.web_concurrency = workers
+
+preload_app = settings.preload_app
+max_requests = settings.max_requests
+max_requests_jitter = settings.max_requests_jitter
+timeout = settings.worker_timeout
+graceful_timeout = settings.graceful_timeout
+keepalive = 5
+accesslog = "-"
+
+
+def on_starting(server) -> None:
+    pool_size, max_overflow = pool_limits()  # fails fast if the budget is too small
+    server.log.info(
+        "%d workers for %.2g CPUs; DB pool per worker %d + %d overflow (%d total, budget %s)",
+        workers,
+        available_cpus(),
+        pool_size,
+        max_overflow,
+        workers * (pool_size + max_overflow),
+        settings.db_max_connections or "none",
+    )
+
+
+def pre_fork(server, worker) -> None:
+    # Keep the preloaded objects out of the collector's reach: a collection in
+    # a worker would otherwise write to (and so copy) every page they live on.
+    gc.freeze()
+
+
+def post_fork(server, worker) -> None:
+    dispose_engines(close=False)
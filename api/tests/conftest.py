@@ -7,14 +7,24 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.auth.security import hash_password
+from app.core.cache import item_cache
+from app.core.config import settings
 from app.core.db import get_db
-from app.main import app
+from app.main import create_app
 from app.models.base import Base
 from app.models.user import User
 
 # Use in-memory SQLite for testing
 TEST_SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
+# The fixtures below create the test schema (on their own engine): there is no
+# Alembic stamp to check and nothing to warm up
+app = create_app(
+    settings.model_copy(
+        update={"db_startup": "off", "warmup_connections": 0, "warmup_statements": False}
+    )
+)
+
 
 @pytest.fixture(scope="session")
 def test_db_engine():
@@ -58,6 +68,8 @@ def client(test_db: Session) -> Generator[TestClient]:
         yield test_db
 
     app.dependency_overrides[get_db] = override_get_db
+    if item_cache is not None:
+        item_cache.clear()
 
     with TestClient(app) as test_client:
         yield test_client
@@ -89,3 +101,30 @@ def auth_headers(client: TestClient, test_user: User) -> dict[str, str]:
     )
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_user(test_db: Session) -> User:
+    """Create superuser."""
+    user = User(
+        email="admin@example.com",
+        name="Admin User",
+        hashed_password=hash_password("adminpassword123"),
+        is_active=True,
+        is_superuser=True,
+    )
+    test_db.add(user)
+    test_db.commit()
+    test_db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def admin_headers(client: TestClient, admin_user: User) -> dict[str, str]:
+    """Get authorization headers for superuser."""
+    response = client.post(
+        "/auth/login",
+        json={"email": admin_user.email, "password": "adminpassword123"},
+    )
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,120 @@
+"""Tests for archiving inactive items and reading them back."""
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.archiving import archive_batch
+from app.core.cache import item_cache
+from app.models.item import Item, ItemArchive
+
+LONG_AGO = datetime(2020, 1, 1, tzinfo=UTC)
+
+
+def create(client: TestClient, headers: dict[str, str], title: str, active: bool = True) -> str:
+    item_id = client.post("/items", headers=headers, json={"title": title}).json()["id"]
+    if not active:
+        client.patch(f"/items/{item_id}", headers=headers, json={"is_active": False})
+    return item_id
+
+
+def archive_all(db: Session, limit: int = 100) -> int:
+    """Archive everything inactive since LONG_AGO, as the job would after that long."""
+    db.execute(update(Item).where(~Item.is_active).values(updated_at=LONG_AGO))
+    count, _ = archive_batch(db.connection(), datetime.now(UTC) - timedelta(days=1), limit)
+    db.commit()
+    if item_cache is not None:
+        item_cache.clear()
+    return count
+
+
+def test_archive_moves_only_old_inactive_items(
+    client: TestClient, auth_headers: dict[str, str], test_db: Session
+):
+    """Test inactive items past the cutoff move in batches; active and recent ones stay."""
+    kept = create(client, auth_headers, "active")
+    archived = {create(client, auth_headers, f"old {i}", active=False) for i in range(3)}
+
+    assert archive_all(test_db, limit=2) == 2
+    assert archive_all(test_db, limit=2) == 1
+    assert archive_all(test_db, limit=2) == 0
+    hot = {str(item_id) for item_id in test_db.execute(select(Item.id)).scalars()}
+    cold = {str(item_id) for item_id in test_db.execute(select(ItemArchive.id)).scalars()}
+    assert hot == {kept}
+    assert cold == archived
+    recent = create(client, auth_headers, "recent", active=False)
+    count, _ = archive_batch(test_db.connection(), datetime.now(UTC) - timedelta(days=1), 10)
+    assert count == 0
+    assert test_db.get(Item, uuid.UUID(recent)) is not None
+
+
+def test_get_archived_item_reads_through(
+    client: TestClient, auth_headers: dict[str, str], test_db: Session
+):
+    """Test GET /items/{id} serves an archived item as before, with the same ETag."""
+    item_id = create(client, auth_headers, "cold", active=False)
+    test_db.execute(update(Item).values(updated_at=LONG_AGO))
+    test_db.commit()
+    before = client.get(f"/items/{item_id}", headers=auth_headers)
+    archive_all(test_db)
+
+    after = client.get(f"/items/{item_id}", headers=auth_headers)
+    partial = client.get(f"/items/{item_id}?fields=title", headers=auth_headers)
+
+    assert after.status_code == 200
+    assert after.json() == before.json()
+    assert after.headers["etag"] == before.headers["etag"]
+    assert partial.json() == {"title": "cold"}
+    assert client.get(f"/items/{uuid.uuid4()}", headers=auth_headers).status_code == 404
+
+
+def test_list_includes_archived_on_request(
+    client: TestClient, auth_headers: dict[str, str], test_db: Session
+):
+    """Test lists leave archived items out unless include_archived is set."""
+    create(client, auth_headers, "hot")
+    create(client, auth_headers, "cold", active=False)
+    combined = client.get("/items?include_archived=true", headers=auth_headers)
+    archive_all(test_db)
+
+    default = client.get("/items", headers=auth_headers)
+    included = client.get("/items?include_archived=true", headers=auth_headers)
+    titles = client.get("/items?include_archived=true&fields=title", headers=auth_headers)
+
+    assert [item["title"] for item in default.json()] == ["hot"]
+    assert sorted(item["title"] for item in included.json()) == ["cold", "hot"]
+    assert sorted(item["title"] for item in titles.json()) == ["cold", "hot"]
+    # Archiving moved an item without changing the combined list
+    assert included.headers["etag"] == combined.headers["etag"]
+    assert default.headers["etag"] != included.headers["etag"]
+
+
+def test_update_restores_archived_item(
+    client: TestClient, auth_headers: dict[str, str], test_db: Session
+):
+    """Test updating an archived item moves it back to the hot table."""
+    item_id = create(client, auth_headers, "cold", active=False)
+    archive_all(test_db)
+
+    response = client.patch(f"/items/{item_id}", headers=auth_headers, json={"is_active": True})
+
+    assert response.status_code == 200
+    assert response.json()["is_active"] is True
+    assert test_db.execute(select(func.count()).select_from(ItemArchive)).scalar_one() == 0
+    assert [item["id"] for item in client.get("/items", headers=auth_headers).json()] == [item_id]
+
+
+def test_delete_archived_item(
+    client: TestClient, auth_headers: dict[str, str], test_db: Session
+):
+    """Test an archived item can be deleted like any other."""
+    item_id = create(client, auth_headers, "cold", active=False)
+    archive_all(test_db)
+    counted = client.get("/items/stats", headers=auth_headers).json()
+
+    assert client.delete(f"/items/{item_id}", headers=auth_headers).status_code == 204
+    assert client.get(f"/items/{item_id}", headers=auth_headers).status_code == 404
+    assert counted == {"total": 1, "active": 0, "inactive": 1}
+    assert client.get("/items/stats", headers=auth_headers).json()["total"] == 0
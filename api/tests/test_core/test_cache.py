@@ -0,0 +1,90 @@
+"""Tests for the read-through cache."""
+import threading
+import time
+import uuid
+from datetime import UTC, datetime
+
+from app.core.cache import Cache, MemoryBackend, dumps, loads
+
+
+def test_round_trip_keeps_types():
+    """Test UUIDs and naive/aware datetimes survive serialization unchanged."""
+    value = [
+        {
+            "id": uuid.uuid4(),
+            "naive": datetime(2024, 1, 2, 3, 4, 5),
+            "aware": datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=UTC),
+            "title": None,
+        }
+    ]
+
+    assert loads(dumps(value)) == value
+
+
+def test_memory_backend_bounds():
+    """Test LRU eviction by entry count and by bytes, and TTL expiry."""
+    backend = MemoryBackend(max_entries=2, max_bytes=1000)
+    backend.set("a", b"1", 60)
+    backend.set("b", b"2", 60)
+    backend.get("a")
+    backend.set("c", b"3", 60)
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+    backend.set("big", b"x" * 600, 60)
+    backend.set("bigger", b"x" * 600, 60)
+    assert backend.get("big") is None
+    assert backend.stats()["bytes"] <= 1000
+
+    backend.set("short", b"1", 0.01)
+    time.sleep(0.02)
+    assert backend.get("short") is None
+
+
+def test_get_or_load_and_invalidate():
+    """Test hits skip the loader and invalidation covers every key of a scope."""
+    cache = Cache(MemoryBackend(), "test", ttl=60)
+    calls: list[str] = []
+
+    def loader(key: str) -> list[str]:
+        calls.append(key)
+        return [key]
+
+    assert cache.get_or_load("user", "a", lambda: loader("a")) == ["a"]
+    assert cache.get_or_load("user", "a", lambda: loader("a")) == ["a"]
+    cache.get_or_load("user", "b", lambda: loader("b"))
+    cache.get_or_load("other", "a", lambda: loader("a"))
+    assert calls == ["a", "b", "a"]
+
+    cache.invalidate("user")
+    cache.get_or_load("user", "a", lambda: loader("a"))
+    cache.get_or_load("user", "b", lambda: loader("b"))
+    cache.get_or_load("other", "a", lambda: loader("a"))
+
+    assert calls == ["a", "b", "a", "a", "b"]
+    assert cache.stats()["hit_rate"] == round(2 / 7, 4)
+
+
+def test_concurrent_misses_load_once():
+    """Test a stampede of misses on one key runs the loader once."""
+    cache = Cache(MemoryBackend(), "test", ttl=60)
+    calls = 0
+
+    def loader() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return 42
+
+    results: list[int] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("u", "k", loader)))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42] * 10
+    assert calls == 1
@@ -0,0 +1,98 @@
+"""Tests for the compression middleware."""
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate
+
+BODY = "item " * 1000
+
+
+@pytest.fixture
+def compressed_client() -> TestClient:
+    """Client for a bare app wrapped in the compression middleware."""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/text")
+    def text() -> PlainTextResponse:
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    def small() -> PlainTextResponse:
+        return PlainTextResponse("ok")
+
+    @app.get("/binary")
+    def binary() -> Response:
+        return Response(BODY.encode(), media_type="image/png")
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        return StreamingResponse((f"line {i}\n" for i in range(500)), media_type="text/plain")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, None),
+        ("gzip", "gzip"),
+        ("gzip, br, zstd", "zstd"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("identity", None),
+        ("*", "zstd"),
+        ("*;q=0.1, gzip;q=0.5", "gzip"),
+    ],
+)
+def test_negotiate(header: str | None, expected: str | None):
+    """Test Accept-Encoding negotiation honours q-values and server preference."""
+    assert negotiate(header, ["zstd", "br", "gzip"]) == expected
+
+
+def test_compresses_large_text(compressed_client: TestClient):
+    """Test large text bodies are compressed with a correct Content-Length."""
+    response = compressed_client.get("/text", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.text == BODY
+
+
+def test_skips_small_and_binary_bodies(compressed_client: TestClient):
+    """Test small bodies and non-text content types are left alone."""
+    small = compressed_client.get("/small", headers={"Accept-Encoding": "gzip"})
+    binary = compressed_client.get("/binary", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in binary.headers
+
+
+def test_streams_compressed_chunks(compressed_client: TestClient):
+    """Test streaming responses are compressed incrementally."""
+    with compressed_client.stream(
+        "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+
+    assert gzip.decompress(raw).decode() == "".join(f"line {i}\n" for i in range(500))
+
+
+@pytest.mark.parametrize("coding", ["br", "zstd"])
+def test_optional_encodings(compressed_client: TestClient, coding: str):
+    """Test brotli and zstd when their packages are installed."""
+    middleware = CompressionMiddleware(compressed_client.app, minimum_size=100)
+    if coding not in middleware.encoders:
+        pytest.skip(f"{coding} encoder not installed")
+
+    response = compressed_client.get("/text", headers={"Accept-Encoding": coding})
+
+    assert response.headers["content-encoding"] == coding
+    assert response.text == BODY
@@ -0,0 +1,87 @@
+"""Tests for the batch loader."""
+import threading
+from collections.abc import Sequence
+
+import pytest
+
+from app.core.dataloader import BatchLoader
+
+
+def run_concurrently(count: int, target) -> None:
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_loads_share_one_fetch():
+    """Test loads within the window are resolved by one fetch, duplicates once."""
+    loader: BatchLoader[int, str] = BatchLoader("test", window=0.2)
+    fetched: list[list[int]] = []
+    results: dict[int, str | None] = {}
+
+    def fetch(keys: Sequence[int]) -> dict[int, str]:
+        fetched.append(sorted(keys))
+        return {key: f"v{key}" for key in keys if key != 3}
+
+    run_concurrently(8, lambda i: results.update({i: loader.load(i % 4, fetch)}))
+
+    assert fetched == [[0, 1, 2, 3]]
+    assert results == {i: (None if i % 4 == 3 else f"v{i % 4}") for i in range(8)}
+
+
+def test_max_batch_size_splits_batches():
+    """Test a full batch is fetched without waiting for the window."""
+    loader: BatchLoader[int, int] = BatchLoader("test", window=5, max_batch_size=2)
+    fetched: list[int] = []
+
+    def fetch(keys: Sequence[int]) -> dict[int, int]:
+        fetched.append(len(keys))
+        return {key: key for key in keys}
+
+    run_concurrently(4, lambda i: loader.load(i, fetch))
+
+    assert fetched == [2, 2]
+
+
+def test_groups_are_batched_separately():
+    """Test loads of different groups (shards) never share a fetch."""
+    loader: BatchLoader[int, int] = BatchLoader("test", window=0.2)
+    fetched: list[list[int]] = []
+
+    def fetch(keys: Sequence[int]) -> dict[int, int]:
+        fetched.append(sorted(keys))
+        return {key: key for key in keys}
+
+    run_concurrently(6, lambda i: loader.load(i, fetch, group=i % 2))
+
+    assert sorted(fetched) == [[0, 2, 4], [1, 3, 5]]
+
+
+def test_fetch_error_raised_in_every_caller():
+    """Test a failed fetch fails all loads of its batch."""
+    loader: BatchLoader[int, int] = BatchLoader("test", window=0.2)
+    errors: list[Exception] = []
+
+    def fetch(keys: Sequence[int]) -> dict[int, int]:
+        raise RuntimeError("db down")
+
+    def call(i: int) -> None:
+        try:
+            loader.load(i, fetch)
+        except RuntimeError as err:
+            errors.append(err)
+
+    run_concurrently(3, call)
+
+    assert len(errors) == 3
+
+
+def test_disabled_loader_fetches_directly():
+    """Test a disabled loader fetches each key on its own."""
+    loader: BatchLoader[int, int] = BatchLoader("test", enabled=False)
+
+    assert loader.load(1, lambda keys: {key: key * 10 for key in keys}) == 10
+    with pytest.raises(KeyError):
+        loader.load(1, lambda keys: {}[keys[0]])
@@ -0,0 +1,158 @@
+"""Tests for group commit of concurrent item creates."""
+import threading
+import uuid
+from collections.abc import Callable, Generator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.group_commit import GroupCommitter
+from app.models.base import Base
+from app.models.item import Item, UserItemStats
+from app.models.user import User
+from app.repositories.item import ItemRepository, item_writer
+
+
+def run_concurrently[T](count: int, func: Callable[[int], T]) -> list[T | Exception]:
+    """Call func(0..count-1) from ``count`` threads started together."""
+    barrier = threading.Barrier(count)
+
+    def call(index: int) -> T | Exception:
+        barrier.wait()
+        try:
+            return func(index)
+        except Exception as err:
+            return err
+
+    with ThreadPoolExecutor(count) as pool:
+        return list(pool.map(call, range(count)))
+
+
+def test_concurrent_submits_share_one_write():
+    """Test values submitted together are written once, each caller getting its own result."""
+    writes: list[list[int]] = []
+    committer: GroupCommitter[int, int] = GroupCommitter("test", max_delay=1.0, max_batch_size=8)
+
+    def write(values: Sequence[int]) -> list[int | Exception]:
+        writes.append(list(values))
+        return [ValueError(value) if value == 3 else value * 10 for value in values]
+
+    results = run_concurrently(8, lambda i: committer.submit(i, write))
+
+    assert len(writes) == 1
+    assert sorted(writes[0]) == list(range(8))
+    assert [r for r in results if not isinstance(r, Exception)] == [0, 10, 20, 40, 50, 60, 70]
+    assert isinstance(results[3], ValueError)
+
+
+def test_failed_write_fails_the_batch_and_groups_are_separate():
+    """Test a write that raises fails every caller; groups never share a write."""
+    writes: list[list[int]] = []
+    committer: GroupCommitter[int, int] = GroupCommitter("test", max_delay=0.2, max_batch_size=4)
+
+    def write(values: Sequence[int]) -> list[int | Exception]:
+        writes.append(list(values))
+        if 0 in values:
+            raise RuntimeError("commit failed")
+        return list(values)
+
+    results = run_concurrently(4, lambda i: committer.submit(i, write, group=i % 2))
+
+    assert sorted(map(sorted, writes)) == [[0, 2], [1, 3]]
+    assert isinstance(results[0], RuntimeError) and isinstance(results[2], RuntimeError)
+    assert results[1::2] == [1, 3]
+
+
+def test_disabled_writes_each_value():
+    """Test a disabled committer writes every value on its own."""
+    writes: list[list[int]] = []
+    committer: GroupCommitter[int, int] = GroupCommitter("test", enabled=False)
+
+    def write(values: Sequence[int]) -> list[int]:
+        writes.append(list(values))
+        return list(values)
+
+    assert [committer.submit(i, write) for i in range(3)] == [0, 1, 2]
+    assert writes == [[0], [1], [2]]
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Generator[Engine]:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'writes.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def writer(monkeypatch: pytest.MonkeyPatch) -> GroupCommitter:
+    monkeypatch.setattr(item_writer, "enabled", True)
+    monkeypatch.setattr(item_writer, "max_delay", 1.0)
+    monkeypatch.setattr(item_writer, "max_batch_size", 10)
+    return item_writer
+
+
+def test_concurrent_creates_commit_once(engine: Engine, writer: GroupCommitter):
+    """Test ten concurrent creates for two users cost one commit and count correctly."""
+    make_session = sessionmaker(bind=engine)
+    users = [uuid.uuid4(), uuid.uuid4()]
+    with make_session() as session:
+        session.add_all(User(id=user_id, email=f"{user_id}@example.com", name="W") for user_id in users)
+        session.commit()
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+
+    def create(index: int) -> tuple[uuid.UUID, str, bool]:
+        with make_session() as session:
+            item = ItemRepository(session).create(users[index % 2], f"item {index}")
+            return item.user_id, item.title, item.created_at is not None
+
+    results = run_concurrently(10, create)
+
+    assert len(commits) == 1
+    assert results == [(users[i % 2], f"item {i}", True) for i in range(10)]
+    with make_session() as session:
+        assert session.execute(select(func.count()).select_from(Item)).scalar_one() == 10
+        stats = session.execute(select(UserItemStats.total, UserItemStats.active)).all()
+        assert sorted(stats) == [(5, 5), (5, 5)]
+
+
+def test_insert_rows_isolates_failing_rows(engine: Engine):
+    """Test a row that breaks the batch fails alone while the others are committed."""
+    with sessionmaker(bind=engine)() as session:
+        user = User(email="w@example.com", name="W")
+        session.add(user)
+        session.commit()
+        rows = [
+            {"id": item_id, "user_id": user.id, "title": "t", "description": None, "is_active": True}
+            for item_id in (uuid.uuid4(), uuid.uuid4())
+        ]
+
+        results = ItemRepository(session).insert_rows([rows[0], rows[1], rows[0]])
+
+        assert [result["id"] for result in results[:2]] == [rows[0]["id"], rows[1]["id"]]
+        assert isinstance(results[2], IntegrityError)
+        assert ItemRepository(session).get_stats_for_user(user.id) == (2, 2)
+
+
+def test_create_endpoint_with_group_commit(
+    client: TestClient, auth_headers: dict[str, str], writer: GroupCommitter
+):
+    """Test POST /items works the same through the group-commit path."""
+    writer.max_batch_size = 1
+
+    response = client.post("/items", headers=auth_headers, json={"title": "grouped"})
+    listed = client.get("/items", headers=auth_headers).json()
+
+    assert response.status_code == 201
+    assert response.json()["title"] == "grouped"
+    assert response.json()["created_at"] is not None
+    assert [item["id"] for item in listed] == [response.json()["id"]]
+    assert client.get("/items/stats", headers=auth_headers).json()["total"] == 1
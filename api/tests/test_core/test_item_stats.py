@@ -0,0 +1,83 @@
+"""Tests for the incrementally maintained per-user item counts."""
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.item_stats import FIRST, reconcile_batch
+from app.models.item import Item, UserItemStats
+from app.models.user import User
+
+
+def stats(client: TestClient, headers: dict[str, str]) -> dict[str, int]:
+    response = client.get("/items/stats", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_stats_follow_writes(client: TestClient, auth_headers: dict[str, str]):
+    """Test create, deactivate, repeat updates, import and delete keep the counts exact."""
+    assert stats(client, auth_headers) == {"total": 0, "active": 0, "inactive": 0}
+    ids = [
+        client.post("/items", headers=auth_headers, json={"title": f"{i}"}).json()["id"]
+        for i in range(3)
+    ]
+    for _ in range(2):  # the second update changes nothing
+        client.patch(f"/items/{ids[0]}", headers=auth_headers, json={"is_active": False})
+    client.patch(f"/items/{ids[1]}", headers=auth_headers, json={"title": "renamed"})
+    client.post(
+        "/items/import",
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+        content=b'{"title": "a"}\n{"title": "b"}\n',
+    )
+    client.delete(f"/items/{ids[0]}", headers=auth_headers)
+    client.delete(f"/items/{ids[2]}", headers=auth_headers)
+
+    assert stats(client, auth_headers) == {"total": 3, "active": 3, "inactive": 0}
+    client.patch(f"/items/{ids[1]}", headers=auth_headers, json={"is_active": False})
+    assert stats(client, auth_headers) == {"total": 3, "active": 2, "inactive": 1}
+
+
+def test_stats_per_user(
+    client: TestClient, auth_headers: dict[str, str], admin_headers: dict[str, str]
+):
+    """Test each user only sees their own counts."""
+    client.post("/items", headers=auth_headers, json={"title": "mine"})
+
+    assert stats(client, auth_headers)["total"] == 1
+    assert stats(client, admin_headers)["total"] == 0
+
+
+def test_reconcile_repairs_drift(
+    client: TestClient, auth_headers: dict[str, str], test_db: Session, test_user: User
+):
+    """Test drift from writes bypassing the repository is found and repaired in batches."""
+    for i in range(2):
+        client.post("/items", headers=auth_headers, json={"title": f"{i}"})
+    test_db.execute(update(Item).values(is_active=False))  # not counted
+    test_db.add(Item(user_id=test_user.id, title="sneaked in"))
+    test_db.commit()
+    user_id = test_user.id
+
+    last, drift = reconcile_batch(test_db.connection(), FIRST, 1, repair=False)
+    assert drift == {user_id: ((2, 2), (3, 1))}
+    assert reconcile_batch(test_db.connection(), FIRST, 10)[1] == drift
+    test_db.commit()
+
+    assert stats(client, auth_headers) == {"total": 3, "active": 1, "inactive": 2}
+    assert reconcile_batch(test_db.connection(), FIRST, 10)[1] == {}
+    assert reconcile_batch(test_db.connection(), last, 10) == (None, {})
+
+
+def test_reconcile_creates_missing_rows(
+    client: TestClient, auth_headers: dict[str, str], test_db: Session
+):
+    """Test users whose stats row is missing get one."""
+    client.post("/items", headers=auth_headers, json={"title": "A"})
+    test_db.query(UserItemStats).delete()
+    test_db.commit()
+
+    _, drift = reconcile_batch(test_db.connection(), FIRST, 10)
+    test_db.commit()
+
+    assert list(drift.values()) == [((0, 0), (1, 1))]
+    assert stats(client, auth_headers)["total"] == 1
@@ -0,0 +1,222 @@
+"""Tests for the background job queue and worker."""
+import threading
+from collections.abc import Generator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core import jobs
+from app.core.jobs import Worker, backoff, handlers
+from app.core.metrics import metrics
+from app.models import JobStatus
+from app.models.base import Base
+from app.repositories.job import JobRepository
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Generator[Engine]:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def make_session(engine: Engine) -> sessionmaker[Session]:
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def calls(monkeypatch: pytest.MonkeyPatch) -> list[dict[str, Any]]:
+    """Register a ``test`` handler recording its payloads; ``fail`` in a payload makes it raise."""
+    calls: list[dict[str, Any]] = []
+
+    def handler(payload: dict[str, Any]) -> None:
+        calls.append(payload)
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+
+    monkeypatch.setitem(handlers, "test", handler)
+    return calls
+
+
+def now() -> datetime:
+    return datetime.now(UTC)
+
+
+def test_claim_takes_due_jobs_once(make_session: sessionmaker[Session]):
+    """Test due jobs are claimed oldest first, once, and delayed jobs wait."""
+    with make_session() as db:
+        repository = JobRepository(db)
+        first = repository.enqueue("test", {"n": 1})
+        second = repository.enqueue("test", {"n": 2})
+        repository.enqueue("test", {"n": 3}, delay_seconds=60)
+
+        claimed = repository.claim("w1", 10, now())
+        again = repository.claim("w2", 10, now())
+
+        assert [job["id"] for job in claimed] == [first.id, second.id]
+        assert [job["payload"] for job in claimed] == [{"n": 1}, {"n": 2}]
+        assert all(job["attempts"] == 1 for job in claimed)
+        assert again == []
+        assert repository.claim("w2", 10, now() + timedelta(seconds=61))[0]["payload"] == {"n": 3}
+
+
+def test_claim_respects_limit(make_session: sessionmaker[Session]):
+    """Test consecutive claims split the queue without overlap."""
+    with make_session() as db:
+        repository = JobRepository(db)
+        for n in range(5):
+            repository.enqueue("test", {"n": n})
+
+        batches = [repository.claim(f"w{i}", 2, now()) for i in range(3)]
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert len({job["id"] for batch in batches for job in batch}) == 5
+
+
+def test_finish_retries_then_fails(make_session: sessionmaker[Session]):
+    """Test a failed attempt is queued again until the job is out of attempts."""
+    with make_session() as db:
+        repository = JobRepository(db)
+        job = repository.enqueue("test", max_attempts=2)
+
+        repository.claim("w", 1, now())
+        assert repository.finish(job.id, "w", now(), "boom", retry_at=now() - timedelta(seconds=1))
+        assert not repository.finish(job.id, "w", now())  # no longer running
+        db.refresh(job)
+        assert (job.status, job.last_error) == (JobStatus.QUEUED, "boom")
+
+        assert repository.claim("w", 1, now())[0]["attempts"] == 2
+        repository.finish(job.id, "w", now(), "boom again")
+        db.refresh(job)
+        assert (job.status, job.attempts, job.last_error) == (JobStatus.FAILED, 2, "boom again")
+
+
+def test_requeue_stale(make_session: sessionmaker[Session]):
+    """Test running jobs of a lost worker are queued again, or failed when out of attempts."""
+    with make_session() as db:
+        repository = JobRepository(db)
+        retried = repository.enqueue("test", max_attempts=2)
+        exhausted = repository.enqueue("test", max_attempts=1)
+        repository.claim("lost", 2, now())
+
+        assert repository.requeue_stale(now() - timedelta(minutes=1)) == 0
+        assert repository.requeue_stale(now() + timedelta(minutes=1)) == 2
+        assert not repository.finish(retried.id, "lost", now())
+
+        db.refresh(retried)
+        db.refresh(exhausted)
+        assert (retried.status, retried.locked_by) == (JobStatus.QUEUED, None)
+        assert (exhausted.status, exhausted.last_error) == (JobStatus.FAILED, "worker lost")
+
+
+def test_queue_stats_and_purge(make_session: sessionmaker[Session]):
+    """Test queue stats count jobs per status and purge removes finished jobs only."""
+    with make_session() as db:
+        repository = JobRepository(db)
+        done = repository.enqueue("test")
+        repository.enqueue("test")
+        repository.enqueue("test", delay_seconds=60)
+        repository.claim("w", 1, now())
+        repository.finish(done.id, "w", now())
+
+        stats = repository.queue_stats(now())
+
+        assert stats["queued"] == 2 and stats["succeeded"] == 1 and stats["due"] == 1
+        assert stats["oldest_due_seconds"] >= 0
+        assert repository.purge(now() + timedelta(seconds=1)) == 1
+        assert repository.queue_stats(now())["succeeded"] == 0
+
+
+def test_backoff_grows_and_is_capped():
+    """Test retry delays double per attempt, jittered down by at most half, up to the cap."""
+    assert 2.5 <= backoff(1, 5, 600) <= 5
+    assert 20 <= backoff(4, 5, 600) <= 40
+    assert 300 <= backoff(20, 5, 600) <= 600
+
+
+def test_worker_runs_jobs(make_session: sessionmaker[Session], calls: list[dict[str, Any]]):
+    """Test the worker runs due jobs, schedules retries of failures and fails unknown kinds."""
+    with make_session() as db:
+        repository = JobRepository(db)
+        ok = repository.enqueue("test", {"n": 1}).id
+        failing = repository.enqueue("test", {"fail": True}).id
+        unknown = repository.enqueue("no-such-kind").id
+    worker = Worker(make_session, concurrency=2, batch_size=10, worker_id="w", log=lambda _: None)
+    before = metrics.snapshot()["counters"].get("jobs.test.succeeded", 0)
+
+    assert worker.run_once() == 2  # only as many as free slots
+    worker.drain()
+
+    worker = Worker(make_session, concurrency=2, batch_size=10, worker_id="w", log=lambda _: None)
+    assert worker.run_once() == 1
+    worker.drain()
+
+    with make_session() as db:
+        repository = JobRepository(db)
+        done, retried, failed = (repository.get(job_id) for job_id in (ok, failing, unknown))
+        assert done.status == JobStatus.SUCCEEDED
+        assert retried.status == JobStatus.QUEUED
+        assert "RuntimeError: boom" in retried.last_error
+        assert retried.run_at.replace(tzinfo=UTC) > now()
+        assert (failed.status, failed.attempts) == (JobStatus.FAILED, 1)
+        assert "no-such-kind" in failed.last_error
+    assert calls == [{"n": 1}, {"fail": True}]
+    assert metrics.snapshot()["counters"]["jobs.test.succeeded"] == before + 1
+
+
+def test_worker_stops_and_drains(make_session: sessionmaker[Session], calls: list[dict[str, Any]]):
+    """Test run() works through the queue and returns once stopped."""
+    with make_session() as db:
+        for n in range(5):
+            JobRepository(db).enqueue("test", {"n": n})
+    stop = threading.Event()
+    worker = Worker(
+        make_session, concurrency=2, batch_size=2, poll_interval=0.01, worker_id="w", log=lambda _: None
+    )
+    thread = threading.Thread(target=worker.run, args=(stop,))
+    thread.start()
+    deadline = now() + timedelta(seconds=10)
+    while len(calls) < 5 and now() < deadline:
+        stop.wait(0.01)
+    stop.set()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert sorted(payload["n"] for payload in calls) == list(range(5))
+    assert worker.queue["due"] == 5  # sampled when the worker started
+    assert "archive_items" in jobs.handlers and "reconcile_item_stats" in jobs.handlers
+
+
+def test_worker_survives_database_errors(engine: Engine, calls: list[dict[str, Any]]):
+    """Test a worker started before the jobs table exists keeps polling, then runs jobs."""
+    Base.metadata.drop_all(engine)
+    make_session = sessionmaker(bind=engine)
+    logged: list[str] = []
+    stop = threading.Event()
+    worker = Worker(
+        make_session, poll_interval=0.01, lease_seconds=0.03, worker_id="w", log=logged.append
+    )
+    thread = threading.Thread(target=worker.run, args=(stop,))
+    thread.start()
+    deadline = now() + timedelta(seconds=10)
+    while not any("OperationalError" in line for line in logged) and now() < deadline:
+        stop.wait(0.01)
+
+    Base.metadata.create_all(engine)
+    with make_session() as db:
+        JobRepository(db).enqueue("test", {"n": 1})
+    while not calls and now() < deadline:
+        stop.wait(0.01)
+    stop.set()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert calls == [{"n": 1}]
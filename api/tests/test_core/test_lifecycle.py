@@ -0,0 +1,150 @@
+"""Tests for start-up warm-up and graceful draining."""
+import time
+from pathlib import Path
+from typing import Any
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.orm import Session
+
+from app.auth.security import create_access_token
+from app.core.config import settings
+from app.core.lifecycle import RequestDrain, warm_pool
+from app.main import create_app
+from app.models.base import Base
+from app.models.user import User
+
+
+def sqlite_engine(path: Path) -> Engine:
+    return create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=5
+    )
+
+
+class EngineCounter:
+    """Counts new DBAPI connections and statement compilations of an engine."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.connects = 0
+        self.compiles = 0
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "after_cursor_execute", self._on_execute)
+
+    def _on_connect(self, *_: Any) -> None:
+        self.connects += 1
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None and context.cache_hit is CacheStats.CACHE_MISS:
+            self.compiles += 1
+
+    def reset(self) -> None:
+        self.connects = self.compiles = 0
+
+
+def test_warm_pool_opens_distinct_connections(tmp_path: Path):
+    """Test warm-up leaves connections in the pool for the next checkouts."""
+    engine = sqlite_engine(tmp_path / "pool.db")
+    counter = EngineCounter(engine)
+
+    assert warm_pool(engine, 3) == 3
+    assert counter.connects == 3
+
+    conns = [engine.connect() for _ in range(3)]
+    for conn in conns:
+        conn.close()
+    assert counter.connects == 3
+
+
+@pytest.mark.parametrize("warm_up", [False, True])
+def test_first_request_latency(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, warm_up: bool):
+    """
+    Test the first authenticated request after start-up, without and with
+    warm-up: warmed, it neither opens a connection nor compiles a statement.
+    """
+    engine = sqlite_engine(tmp_path / "app.db")
+    monkeypatch.setattr("app.main.get_engine", lambda: engine)
+    monkeypatch.setattr("app.core.db.get_engine", lambda: engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        user = User(email="first@example.com", name="First")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    engine.dispose()
+    counter = EngineCounter(engine)
+
+    app = create_app(
+        settings.model_copy(
+            update={
+                "db_startup": "off",
+                "warmup_connections": 2 if warm_up else 0,
+                "warmup_statements": warm_up,
+            }
+        )
+    )
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    with TestClient(app) as client:
+        counter.reset()
+        start = time.perf_counter()
+        response = client.get("/auth/me", headers=headers)
+        latency_ms = (time.perf_counter() - start) * 1000
+
+    assert response.status_code == 200
+    print(f"first request ({'warm' if warm_up else 'cold'}): {latency_ms:.2f} ms")
+    if warm_up:
+        assert (counter.connects, counter.compiles) == (0, 0)
+    else:
+        assert counter.connects == 1
+        assert counter.compiles >= 1
+
+
+def test_drain_waits_for_in_flight_requests():
+    """Test drain returns once the last in-flight request finishes."""
+    drain = RequestDrain()
+    drain.enter()
+
+    async def scenario() -> tuple[int, float]:
+        async def finish() -> None:
+            await anyio.sleep(0.05)
+            drain.exit()
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(finish)
+            start = time.perf_counter()
+            remaining = await drain.drain(timeout=5)
+            return remaining, time.perf_counter() - start
+
+    remaining, elapsed = anyio.run(scenario)
+
+    assert remaining == 0
+    assert drain.draining
+    assert 0.04 < elapsed < 1
+
+
+def test_drain_deadline():
+    """Test drain gives up at the deadline and reports what is still running."""
+    drain = RequestDrain()
+    drain.enter()
+
+    assert anyio.run(drain.drain, 0.05) == 1
+
+
+def test_draining_app_rejects_new_requests():
+    """Test requests arriving while draining get a 503 asking to reconnect elsewhere."""
+    app = create_app(
+        settings.model_copy(
+            update={"db_startup": "off", "warmup_connections": 0, "warmup_statements": False}
+        )
+    )
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+        app.state.request_drain.draining = True
+
+        response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.headers["connection"] == "close"
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,95 @@
+"""Tests for the startup schema check and the app factory."""
+from pathlib import Path
+
+import pytest
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, inspect, text
+
+from alembic import command
+from app.core.config import settings
+from app.core.migrations import SchemaOutOfDateError, check_schema, head_revisions
+from app.main import create_app
+from app.models.base import Base
+
+ALEMBIC_DIR = Path(__file__).parents[2] / "alembic"
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def stamp(engine: Engine, revision: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        conn.execute(text("INSERT INTO alembic_version VALUES (:rev)"), {"rev": revision})
+
+
+def test_check_schema_at_head(engine: Engine):
+    """Test a database stamped with the head revision passes."""
+    (head,) = head_revisions()
+    stamp(engine, head)
+
+    check_schema(engine)
+
+
+def test_check_schema_not_migrated(engine: Engine):
+    """Test a database without an Alembic stamp is rejected."""
+    with pytest.raises(SchemaOutOfDateError, match="<none>.*alembic upgrade head"):
+        check_schema(engine)
+
+
+def test_check_schema_behind_head(engine: Engine):
+    """Test a database at an older revision is rejected."""
+    stamp(engine, "3a6d6189de1e")
+
+    with pytest.raises(SchemaOutOfDateError, match="3a6d6189de1e"):
+        check_schema(engine)
+
+
+def test_create_app_checks_schema_on_startup(monkeypatch: pytest.MonkeyPatch, engine: Engine):
+    """Test startup fails in "check" mode against an unmigrated database."""
+    monkeypatch.setattr("app.main.get_engine", lambda: engine)
+    app = create_app(settings.model_copy(update={"db_startup": "check"}))
+
+    with pytest.raises(SchemaOutOfDateError), TestClient(app):
+        pass
+
+
+def test_create_app_returns_fresh_apps():
+    """Test each factory call builds an independent app."""
+    first = create_app(settings.model_copy(update={"compression_enabled": False}))
+    second = create_app(settings)
+
+    assert first is not second
+    assert len(first.user_middleware) == len(second.user_middleware) - 1
+
+
+def migrate(monkeypatch: pytest.MonkeyPatch, url: str, revision: str) -> None:
+    """``alembic upgrade revision`` against ``url`` (no alembic.ini: logging stays as is)."""
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    monkeypatch.setattr(settings, "database_url", url)
+    command.upgrade(config, revision)
+
+
+def test_baseline_upgrade(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test a create_all-era database stamped at the initial revision upgrades to head."""
+    url = f"sqlite:///{tmp_path / 'old.db'}"
+    migrate(monkeypatch, url, "3a6d6189de1e")
+    engine = create_engine(url)
+    columns = {column["name"] for column in inspect(engine).get_columns("users")}
+    assert "is_superuser" not in columns
+    assert not inspect(engine).get_indexes("items")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, name, is_active) VALUES ('1', 'a@b.c', 'A', 1)"))
+
+    migrate(monkeypatch, url, "head")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT is_superuser FROM users")).scalar_one() == 0
+    assert "ix_items_user_id" in {index["name"] for index in inspect(engine).get_indexes("items")}
+    engine.dispose()
@@ -0,0 +1,113 @@
+"""Tests for the hash-partitioned items table and its migration tooling."""
+import importlib.util
+import uuid
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_mock_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.partitioning import SHADOW, copy_batch, mirror_ddl, shadow_ddl
+from app.models.base import Base
+from app.models.item import Item, partition_ddl
+from app.models.user import User
+
+MIGRATIONS = Path(__file__).parents[2] / "alembic" / "versions"
+
+
+def postgres_ddl() -> list[str]:
+    """Statements create_all would run on PostgreSQL."""
+    statements: list[str] = []
+
+    def executor(sql: Any, *args: Any, **kwargs: Any) -> None:
+        statements.append(" ".join(str(sql.compile(dialect=engine.dialect)).split()))
+
+    engine = create_mock_engine("postgresql+psycopg2://", executor)
+    Base.metadata.create_all(engine, checkfirst=False)
+    return statements
+
+
+def test_create_all_partitions_items_on_postgres():
+    """Test items is created hash-partitioned with every partition, before the FTS column."""
+    ddl = postgres_ddl()
+    create = next(s for s in ddl if s.startswith("CREATE TABLE items "))
+    partitions = [s for s in ddl if "PARTITION OF items " in s]
+
+    assert create.endswith("PARTITION BY HASH (user_id)")
+    assert "PRIMARY KEY (id, user_id)" in create
+    assert len(partitions) == settings.item_partitions
+    assert partitions[-1].endswith(
+        f"(MODULUS {settings.item_partitions}, REMAINDER {settings.item_partitions - 1})"
+    )
+    assert ddl.index(partitions[-1]) < next(
+        i for i, s in enumerate(ddl) if "ADD COLUMN search_vector" in s
+    )
+
+
+def test_partition_ddl():
+    """Test one partition per remainder, named after the table."""
+    assert partition_ddl("t", 2) == [
+        "CREATE TABLE t_p0 PARTITION OF t FOR VALUES WITH (MODULUS 2, REMAINDER 0)",
+        "CREATE TABLE t_p1 PARTITION OF t FOR VALUES WITH (MODULUS 2, REMAINDER 1)",
+    ]
+
+
+def test_items_identified_by_id(test_db: Session):
+    """Test the ORM still identifies items by id alone despite the composite key."""
+    user = User(email="p@example.com", name="P")
+    test_db.add(user)
+    test_db.commit()
+    item = Item(user_id=user.id, title="A")
+    test_db.add(item)
+    test_db.commit()
+    item_id = item.id
+    test_db.expunge_all()
+
+    assert Item.__mapper__.primary_key == (Item.__table__.c.id,)
+    loaded = test_db.get(Item, item_id)
+    assert loaded is not None and loaded.title == "A"
+    assert test_db.get(Item, uuid.uuid4()) is None
+
+
+def test_shadow_ddl_mirrors_the_given_columns():
+    """Test the shadow table gets partitions and the trigger copies the columns passed in."""
+    columns = ("id", "user_id", "title")
+    ddl = shadow_ddl(4, columns)
+    (function, trigger) = mirror_ddl(columns)
+
+    assert ddl[0].startswith(f"CREATE TABLE {SHADOW} (LIKE items")
+    assert sum(f"PARTITION OF {SHADOW} " in s for s in ddl) == 4
+    assert f"INSERT INTO {SHADOW} (id, user_id, title) VALUES (NEW.id, NEW.user_id, NEW.title)" in function
+    assert "NEW.description" not in function
+    assert "ON CONFLICT DO NOTHING" in function
+    assert "AFTER INSERT OR UPDATE OR DELETE ON items" in trigger
+
+
+def test_partition_migrations_freeze_their_columns():
+    """Test the migrations carry the items columns of their time, not the live model's."""
+    for revision in ("5d2f8a9c4e71", "b8e3c6d1f094"):
+        (path,) = MIGRATIONS.glob(f"{revision}_*.py")
+        spec = importlib.util.spec_from_file_location(revision, path)
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert module.ITEM_COLUMNS == (
+            "user_id", "title", "description", "is_active", "id", "created_at", "updated_at"
+        )
+
+
+def test_copy_batch_copies_only_the_given_columns():
+    """Test the backfill statement selects and inserts exactly the columns passed in."""
+    statements: list[str] = []
+
+    class Conn:
+        def execute(self, statement: Any, params: dict[str, Any]) -> Any:
+            statements.append(" ".join(str(statement).split()))
+            return self
+
+        def one(self) -> tuple[int, None]:
+            return 0, None
+
+    assert copy_batch(Conn(), ("id", "title"), str(uuid.UUID(int=0)), 10) == (0, None)
+    assert f"INSERT INTO {SHADOW} (id, title) SELECT id, title FROM batch" in statements[0]
@@ -0,0 +1,93 @@
+"""Tests for worker sizing and the per-worker connection pool budget."""
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.core.db import pool_limits
+from app.core.server import available_cpus, cgroup_cpu_quota, worker_count
+from app.core.tracing import BackgroundExporter, InMemoryExporter, Span
+
+
+def test_cgroup_v2_quota(tmp_path: Path):
+    """Test cpu.max is read as quota / period, "max" as unlimited."""
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cgroup_cpu_quota(tmp_path) == 1.5
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_quota(tmp_path) is None
+
+
+def test_cgroup_v1_quota(tmp_path: Path):
+    """Test the v1 CFS quota is used when there is no cpu.max; -1 is unlimited."""
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    assert cgroup_cpu_quota(tmp_path) == 2.0
+
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert cgroup_cpu_quota(tmp_path) is None
+
+
+def test_available_cpus_capped_by_quota(tmp_path: Path):
+    """Test the quota caps the CPUs the process may run on, never raises them."""
+    (tmp_path / "cpu.max").write_text("50000 100000\n")
+    assert available_cpus(tmp_path) == 0.5
+
+    (tmp_path / "cpu.max").write_text(f"{1000 * 100000} 100000\n")
+    assert available_cpus(tmp_path) == len(os.sched_getaffinity(0))
+
+
+@pytest.mark.parametrize(
+    ("cpus", "per_cpu", "expected"),
+    [(0.5, 1.0, 1), (1.5, 1.0, 2), (4, 1.0, 4), (4, 2.0, 8), (0.1, 0.5, 1)],
+)
+def test_worker_count(cpus: float, per_cpu: float, expected: int):
+    """Test workers round up to whole processes, at least one."""
+    assert worker_count(per_cpu, cpus) == expected
+
+
+@pytest.mark.parametrize(
+    ("budget", "workers", "expected"),
+    [(None, 8, (5, 10)), (100, 4, (5, 10)), (40, 4, (5, 5)), (12, 4, (3, 0)), (4, 4, (1, 0))],
+)
+def test_pool_limits(
+    monkeypatch: pytest.MonkeyPatch, budget: int | None, workers: int, expected: tuple[int, int]
+):
+    """Test pools shrink (overflow first) so all workers stay within the budget."""
+    monkeypatch.setattr(settings, "db_pool_size", 5)
+    monkeypatch.setattr(settings, "db_max_overflow", 10)
+    monkeypatch.setattr(settings, "db_max_connections", budget)
+    monkeypatch.setattr(settings, "web_concurrency", workers)
+
+    pool_size, max_overflow = pool_limits()
+
+    assert (pool_size, max_overflow) == expected
+    if budget is not None:
+        assert workers * (pool_size + max_overflow) <= budget
+
+
+def test_pool_limits_budget_too_small(monkeypatch: pytest.MonkeyPatch):
+    """Test a budget below one connection per worker is a configuration error."""
+    monkeypatch.setattr(settings, "db_max_connections", 3)
+    monkeypatch.setattr(settings, "web_concurrency", 4)
+
+    with pytest.raises(ValueError, match="4 workers"):
+        pool_limits()
+
+
+def test_background_exporter_starts_thread_on_first_export():
+    """Test no thread runs until spans are exported (so none is lost to fork)."""
+    target = InMemoryExporter()
+    exporter = BackgroundExporter(target)
+    assert exporter._thread is None
+
+    exporter.export([Span("t", "s", None, "n", "app", start_ns=0)])
+    deadline = time.monotonic() + 5
+    while not target.traces() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert exporter._thread is not None and exporter._thread.is_alive()
+    assert len(target.traces()) == 1
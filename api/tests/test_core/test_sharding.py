@@ -0,0 +1,165 @@
+"""Tests for sharding by user id over several SQLite databases."""
+import uuid
+from collections import Counter
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.db import SHARD_SLOTS, ShardRouter, engine_for, slot_for
+from app.core.resharding import move_slot, pin, rebalance, rebuild_directory, set_placement
+from app.main import create_app
+from app.models import DirectoryEntry, User
+from app.models.base import Base
+from app.models.item import Item
+
+SHARDS = 3
+
+
+@pytest.fixture
+def router(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Generator[ShardRouter]:
+    """Three shard files plus a primary file, all with the full schema."""
+    router = ShardRouter(
+        [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(SHARDS)],
+        f"sqlite:///{tmp_path / 'primary.db'}",
+        refresh_seconds=0,
+    )
+    for engine in [router.primary_engine(), *router.engines()]:
+        Base.metadata.create_all(engine)
+    monkeypatch.setattr("app.core.db.shard_router", router)
+    monkeypatch.setattr("app.main.shard_router", router)
+    yield router
+    for engine in [router.primary_engine(), *router.engines()]:
+        engine.dispose()
+
+
+@pytest.fixture
+def client(router: ShardRouter) -> Generator[TestClient]:
+    app = create_app(
+        settings.model_copy(
+            update={"db_startup": "off", "warmup_connections": 0, "warmup_statements": False}
+        )
+    )
+    with TestClient(app) as client:
+        yield client
+
+
+def register(client: TestClient, email: str) -> tuple[uuid.UUID, dict[str, str]]:
+    response = client.post(
+        "/auth/register", json={"email": email, "name": email, "password": "password123"}
+    )
+    assert response.status_code == 201
+    data = response.json()
+    return uuid.UUID(data["user"]["id"]), {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def count(url: str, model: type, **filters: object) -> int:
+    stmt = select(func.count()).select_from(model).filter_by(**filters)
+    with engine_for(url).connect() as conn:
+        return conn.execute(stmt).scalar_one()
+
+
+def test_slots_spread_evenly():
+    """Test user ids hash to slots uniformly enough for slot % shards placement."""
+    counts = Counter(slot_for(uuid.uuid4()) % SHARDS for _ in range(30_000))
+
+    assert all(0 <= slot_for(uuid.uuid4()) < SHARD_SLOTS for _ in range(100))
+    assert max(counts.values()) / min(counts.values()) < 1.1
+
+
+def test_users_and_items_live_on_their_shard(client: TestClient, router: ShardRouter):
+    """Test each user's rows go to one shard and the directory to the primary."""
+    users = [register(client, f"user{i}@example.com") for i in range(12)]
+    for user_id, headers in users:
+        assert client.post("/items", headers=headers, json={"title": str(user_id)}).status_code == 201
+
+    for user_id, headers in users:
+        shard = router.shard_for(user_id)
+        for other, url in enumerate(router.shard_urls):
+            expected = 1 if other == shard else 0
+            assert count(url, User, id=user_id) == expected
+            assert count(url, Item, user_id=user_id) == expected
+        items = client.get("/items", headers=headers).json()
+        assert [item["title"] for item in items] == [str(user_id)]
+    assert count(router.primary_url, DirectoryEntry) == 12
+    assert len({router.shard_for(user_id) for user_id, _ in users}) > 1
+
+
+def test_login_and_duplicate_email_use_directory(client: TestClient):
+    """Test login finds the user's shard by email, and emails stay globally unique."""
+    register(client, "dup@example.com")
+
+    login = client.post("/auth/login", json={"email": "dup@example.com", "password": "password123"})
+    duplicate = client.post(
+        "/auth/register", json={"email": "dup@example.com", "name": "x", "password": "password123"}
+    )
+
+    assert login.status_code == 200
+    assert duplicate.status_code == 409
+
+
+def test_frozen_slot_rejects_writes(client: TestClient, router: ShardRouter):
+    """Test writes to a slot being moved get a 503; reads still work."""
+    user_id, headers = register(client, "frozen@example.com")
+    set_placement(router, slot_for(user_id), router.shard_for(user_id), frozen=True)
+    write = client.post("/items", headers=headers, json={"title": "A"})
+    read = client.get("/items", headers=headers)
+
+    assert write.status_code == 503
+    assert "retry-after" in write.headers
+    assert read.status_code == 200
+
+
+def test_move_slot_online(client: TestClient, router: ShardRouter):
+    """Test a moved slot's users, with their items, are served from the new shard."""
+    user_id, headers = register(client, "mover@example.com")
+    client.post("/items", headers=headers, json={"title": "before"})
+    slot, source = slot_for(user_id), router.shard_for(user_id)
+    target = (source + 1) % SHARDS
+    writes = []
+
+    def sleep(seconds: float) -> None:
+        # Runs while the slot is frozen, then after the switch
+        writes.append(client.post("/items", headers=headers, json={"title": "during"}).status_code)
+
+    assert move_slot(router, slot, target, grace_seconds=0, sleep=sleep, log=lambda _: None) == 1
+
+    assert writes == [503, 201]
+    assert router.shard_for(user_id) == target
+    assert count(router.shard_urls[source], User, id=user_id) == 0
+    assert count(router.shard_urls[target], Item, user_id=user_id) == 2
+    login = client.post("/auth/login", json={"email": "mover@example.com", "password": "password123"})
+    assert login.status_code == 200
+    assert len(client.get("/items", headers=headers).json()) == 2
+
+
+def test_rebalance_after_adding_a_shard(router: ShardRouter):
+    """Test rebalancing onto a new, empty shard moves about a quarter of the slots."""
+    pin(router)
+    router.shard_urls.append(router.shard_urls[0].replace("shard0", "shard3"))
+    Base.metadata.create_all(router.engine(3))
+    moves = rebalance(router, grace_seconds=0, sleep=lambda _: None, log=lambda _: None)
+
+    placements = Counter(router.placement(slot)[0] for slot in range(SHARD_SLOTS))
+    assert len(moves) == SHARD_SLOTS // 4
+    assert all(target == 3 for _, _, target in moves)
+    assert set(placements.values()) == {SHARD_SLOTS // 4}
+
+
+def test_rebuild_directory(client: TestClient, router: ShardRouter):
+    """Test the directory is rebuilt from the shards, dropping stale keys."""
+    user_id, _ = register(client, "listed@example.com")
+    with router.primary_engine().begin() as conn:
+        conn.execute(DirectoryEntry.__table__.delete())
+        conn.execute(
+            DirectoryEntry.__table__.insert(),
+            {"key": "email:gone@example.com", "user_id": uuid.uuid4()},
+        )
+
+    assert rebuild_directory(router) == 1
+    with router.primary_engine().connect() as conn:
+        entries = conn.execute(select(DirectoryEntry.key, DirectoryEntry.user_id)).all()
+    assert entries == [("email:listed@example.com", user_id)]
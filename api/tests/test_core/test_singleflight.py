@@ -0,0 +1,84 @@
+"""Tests for single-flight call coalescing."""
+import threading
+import time
+from collections.abc import Callable
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def run_concurrently(count: int, target: Callable[[], None]) -> None:
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_calls_share_one_execution():
+    """Test identical concurrent calls run once and all get the result."""
+    flight = SingleFlight("test")
+    calls = 0
+    results: list[int] = []
+
+    def fn() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return 7
+
+    run_concurrently(10, lambda: results.append(flight.do("key", fn)))
+
+    assert results == [7] * 10
+    assert calls == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 9, "errors": 0, "in_flight": 0}
+    # Nothing is cached once the call has finished
+    assert flight.do("key", fn) == 7
+    assert calls == 2
+
+
+def test_errors_are_shared():
+    """Test waiting callers receive the leader's exception."""
+    flight = SingleFlight("test")
+    errors: list[Exception] = []
+
+    def fn() -> None:
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    def call() -> None:
+        try:
+            flight.do("key", fn)
+        except ValueError as err:
+            errors.append(err)
+
+    run_concurrently(5, call)
+
+    assert len(errors) == 5
+    assert flight.stats()["errors"] == 1
+
+
+def test_interrupted_leader_hands_over():
+    """Test a leader interrupted by a BaseException does not fail the waiters."""
+    flight = SingleFlight("test")
+    started = threading.Event()
+    results: list[str] = []
+
+    def interrupted() -> str:
+        started.set()
+        time.sleep(0.05)
+        raise KeyboardInterrupt
+
+    def leader() -> None:
+        with pytest.raises(KeyboardInterrupt):
+            flight.do("key", interrupted)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait()
+    results.append(flight.do("key", lambda: "retried"))
+    thread.join()
+
+    assert results == ["retried"]
+    assert flight.in_flight() == 0
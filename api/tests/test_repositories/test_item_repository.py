@@ -0,0 +1,193 @@
+"""Tests for ItemRepository."""
+import contextlib
+import io
+import uuid
+from collections.abc import Generator, Iterator, Sequence
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.db import CompiledCacheStats
+from app.models.user import User
+from app.repositories.item import ItemRepository, copy_rows, item_loader
+
+
+@pytest.fixture
+def item_repo(test_db: Session) -> ItemRepository:
+    """Create item repository."""
+    return ItemRepository(test_db)
+
+
+@pytest.fixture
+def statements(test_db: Session) -> Generator[list[str]]:
+    """Capture SQL statements issued through the test session."""
+    captured: list[str] = []
+    bind = test_db.get_bind()
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    event.listen(bind, "before_cursor_execute", capture)
+    yield captured
+    event.remove(bind, "before_cursor_execute", capture)
+
+
+def test_create_and_list_items(item_repo: ItemRepository, test_user: User):
+    """Test creating items and listing them newest first."""
+    item_repo.create(user_id=test_user.id, title="First")
+    item_repo.create(user_id=test_user.id, title="Second", description="More")
+
+    items = item_repo.get_all_for_user(test_user.id)
+
+    assert {item.title for item in items} == {"First", "Second"}
+
+
+def test_get_all_for_user_loads_only_requested_columns(
+    item_repo: ItemRepository, test_user: User, test_db: Session, statements: list[str]
+):
+    """Test sparse loading leaves large columns out of the SELECT."""
+    item_repo.create(user_id=test_user.id, title="Big", description="x" * 10_000)
+    test_db.expire_all()
+    statements.clear()
+
+    items = item_repo.get_all_for_user(test_user.id, fields=["title"])
+
+    assert items[0].title == "Big"
+    select = statements[-1]
+    assert "items.title" in select
+    assert "items.description" not in select
+
+
+def test_get_rows_for_user_selects_columns(
+    item_repo: ItemRepository, test_user: User, statements: list[str]
+):
+    """Test column rows come back as plain tuples in the requested order."""
+    item = item_repo.create(user_id=test_user.id, title="Row")
+    statements.clear()
+
+    rows = item_repo.get_rows_for_user(test_user.id, ["id", "title"])
+
+    assert [tuple(row) for row in rows] == [(item.id, "Row")]
+    assert "items.description" not in statements[-1]
+
+
+def test_get_by_id_batched(
+    item_repo: ItemRepository, test_user: User, test_db: Session, monkeypatch: pytest.MonkeyPatch
+):
+    """Test batch-loaded lookups return items attached to the caller's session."""
+    monkeypatch.setattr(item_loader, "enabled", True)
+    monkeypatch.setattr(item_loader, "window", 0)
+    item_id = item_repo.create(user_id=test_user.id, title="Batched").id
+    test_db.expunge_all()
+
+    item = item_repo.get_by_id(item_id)
+
+    assert item is not None
+    assert item in test_db
+    assert item.title == "Batched"
+    assert item_repo.get_by_id(uuid.uuid4()) is None
+
+
+def test_iter_rows_for_user_batches(item_repo: ItemRepository, test_user: User):
+    """Test streamed rows arrive in batches of the requested size."""
+    for i in range(5):
+        item_repo.create(user_id=test_user.id, title=f"Item {i}")
+
+    batches = list(item_repo.iter_rows_for_user(test_user.id, ("title",), batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_hot_lookups_reuse_compiled_statements(
+    item_repo: ItemRepository, test_user: User, test_db: Session
+):
+    """Test repeated lookups, with any ids or fields, hit the compiled cache."""
+    item_id, user_id = item_repo.create(user_id=test_user.id, title="Cached").id, test_user.id
+    stats = CompiledCacheStats()
+    bind = test_db.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        stats.record(context.cache_hit)
+
+    event.listen(bind, "after_cursor_execute", record)
+    try:
+        for lookup_id in (item_id, uuid.uuid4()):
+            test_db.expunge_all()
+            item_repo.get_by_id(lookup_id)
+            item_repo.get_by_id(lookup_id, ("title",))
+            item_repo.get_all_for_user(user_id)
+            item_repo.get_rows_for_user(user_id, ("id", "title"))
+            item_repo.get_watermark_for_user(user_id)
+    finally:
+        event.remove(bind, "after_cursor_execute", record)
+
+    summary = stats.summary()
+    assert summary["hits"] >= 5
+    assert summary["misses"] <= 5
+    assert item_repo.get_by_id(item_id, ("title",)).title == "Cached"
+
+
+class Psycopg3Cursor:
+    """The COPY part of a psycopg 3 cursor: ``copy()`` yields an object taking rows."""
+
+    def __init__(self) -> None:
+        self.statement = ""
+        self.rows: list[tuple[object, ...]] = []
+
+    @contextlib.contextmanager
+    def copy(self, statement: str) -> Iterator["Psycopg3Cursor"]:
+        self.statement = statement
+        yield self
+
+    def write_row(self, row: Sequence[object]) -> None:
+        self.rows.append(tuple(row))
+
+
+class Psycopg2Cursor:
+    """The COPY part of a psycopg2 cursor: ``copy_expert()`` reads a file."""
+
+    def __init__(self) -> None:
+        self.statement = ""
+        self.data = ""
+
+    def copy_expert(self, statement: str, file: io.StringIO) -> None:
+        self.statement = statement
+        self.data = file.read()
+
+
+COPY_COLUMNS = ("id", "title", "description", "is_active")
+COPY_ROW = (uuid.UUID(int=1), 'say "hi"', None, True)
+
+
+def test_copy_rows_psycopg3():
+    """Test psycopg 3 gets typed rows through cursor.copy()."""
+    cursor = Psycopg3Cursor()
+
+    assert copy_rows(cursor, "psycopg", "items", COPY_COLUMNS, [COPY_ROW])
+
+    assert cursor.statement == "COPY items (id, title, description, is_active) FROM STDIN"
+    assert cursor.rows == [COPY_ROW]
+
+
+def test_copy_rows_psycopg2():
+    """Test psycopg2 gets CSV through copy_expert(), with NULL unquoted and '' quoted."""
+    cursor = Psycopg2Cursor()
+
+    rows = [COPY_ROW, (uuid.UUID(int=2), "", "d", False)]
+
+    assert copy_rows(cursor, "psycopg2", "items", COPY_COLUMNS, rows)
+
+    assert cursor.statement.endswith("FROM STDIN WITH (FORMAT csv)")
+    assert cursor.data.splitlines() == [
+        f'"{uuid.UUID(int=1)}","say ""hi""",,"True"',
+        f'"{uuid.UUID(int=2)}","","d","False"',
+    ]
+
+
+def test_copy_rows_other_drivers_fall_back():
+    """Test drivers without COPY support are left to the INSERT path."""
+    cursor = Psycopg3Cursor()
+
+    assert not copy_rows(cursor, "pg8000", "items", COPY_COLUMNS, [COPY_ROW])
+    assert cursor.rows == []
@@ -1,4 +1,6 @@
 """Tests for UserRepository."""
+import uuid
+
 import pytest
 from sqlalchemy.orm import Session
 
@@ -57,3 +59,20 @@ def test_update_user(user_repo: UserRepository, test_user: User):
     assert updated is not None
     assert updated.name == "Updated Name"
     assert updated.id == test_user.id
+
+
+def test_get_by_id_coalesced_attaches_to_session(
+    user_repo: UserRepository, test_user: User, test_db: Session
+):
+    """Test coalesced lookups return a usable instance of the caller's session."""
+    user_id, email = test_user.id, test_user.email
+    test_db.expunge_all()
+
+    user = user_repo.get_by_id_coalesced(user_id)
+
+    assert user is not None
+    assert user in test_db
+    assert user.email == email
+    user_repo.update(user, name="Renamed")
+    assert user_repo.get_by_id(user_id).name == "Renamed"
+    assert user_repo.get_by_id_coalesced(uuid.uuid4()) is None
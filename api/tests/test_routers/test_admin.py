@@ -0,0 +1,178 @@
+"""Tests for admin diagnostics router."""
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.memory import memory_tracker
+from app.core.profiling import profiler
+from app.core.tracing import tracer
+
+
+@pytest.fixture
+def profiling() -> Generator[None]:
+    """Restore profiler state after the test."""
+    yield
+    profiler.sample_rate = 0.0
+    profiler.header_token = None
+    profiler.reset()
+
+
+@pytest.fixture
+def memory_tracing() -> Generator[None]:
+    """Stop tracemalloc after the test."""
+    yield
+    memory_tracker.stop()
+    memory_tracker.reset()
+
+
+@pytest.fixture
+def tracing() -> Generator[None]:
+    """Restore tracer state after the test."""
+    yield
+    tracer.sample_rate = 0.0
+    tracer.exporter.clear()  # type: ignore[attr-defined]
+
+
+def test_admin_requires_superuser(client: TestClient, auth_headers: dict[str, str]):
+    """Test admin routes reject regular users."""
+    response = client.get("/admin/profiling", headers=auth_headers)
+
+    assert response.status_code == 403
+
+
+def test_sampled_requests_are_aggregated(
+    client: TestClient, admin_headers: dict[str, str], profiling: None
+):
+    """Test enabling sampling collects stats per route."""
+    response = client.put("/admin/profiling", headers=admin_headers, json={"sample_rate": 1.0})
+    assert response.status_code == 200
+
+    client.get("/health")
+    client.get("/health")
+
+    response = client.get("/admin/profiling", headers=admin_headers)
+    data = response.json()
+    assert data["routes"]["/health"]["requests"] == 2
+    assert data["routes"]["/health"]["functions"]
+
+
+def test_header_profiled_request(
+    client: TestClient, admin_headers: dict[str, str], profiling: None
+):
+    """Test a single request can be profiled via the X-Profile header."""
+    profiler.header_token = "secret"
+
+    response = client.get("/health", headers={"X-Profile": "wrong"})
+    assert "x-profile-id" not in response.headers
+
+    response = client.get("/health", headers={"X-Profile": "secret"})
+    profile_id = response.headers["x-profile-id"]
+
+    response = client.get(f"/admin/profiling/requests/{profile_id}", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["route"] == "/health"
+
+
+def test_sample_worker_returns_collapsed_stacks(
+    client: TestClient, admin_headers: dict[str, str]
+):
+    """Test whole-process sampling returns flame graph input."""
+    response = client.get(
+        "/admin/profiling/sample",
+        headers=admin_headers,
+        params={"seconds": 0.05, "interval_ms": 5},
+    )
+
+    assert response.status_code == 200
+    line = response.text.splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert ";" in stack
+    assert int(count) >= 1
+
+
+def test_metrics_include_process_memory(client: TestClient, admin_headers: dict[str, str]):
+    """Test metrics report RSS and GC stats."""
+    response = client.get("/admin/metrics", headers=admin_headers)
+
+    assert response.status_code == 200
+    memory = response.json()["memory"]
+    assert "rss_bytes" in memory
+    assert len(memory["gc"]["generations"]) == 3
+
+
+def test_metrics_include_compiled_cache(client: TestClient, admin_headers: dict[str, str]):
+    """Test metrics report the compiled statement cache hit ratio."""
+    response = client.get("/admin/metrics", headers=admin_headers)
+
+    assert response.status_code == 200
+    cache = response.json()["db_compiled_cache"]
+    assert {"hits", "misses", "uncached", "hit_ratio", "cache_size"} <= cache.keys()
+
+
+def test_memory_snapshot_requires_tracing(client: TestClient, admin_headers: dict[str, str]):
+    """Test snapshots are refused while tracemalloc is off."""
+    response = client.post("/admin/memory/snapshots", headers=admin_headers)
+
+    assert response.status_code == 409
+
+
+def test_memory_tracing_and_snapshot_diff(
+    client: TestClient, admin_headers: dict[str, str], memory_tracing: None
+):
+    """Test per-route peaks are recorded and snapshots can be diffed."""
+    response = client.put(
+        "/admin/memory", headers=admin_headers, json={"tracing": True, "sample_rate": 1.0}
+    )
+    assert response.json()["tracing"] is True
+
+    first = client.post("/admin/memory/snapshots", headers=admin_headers).json()["id"]
+    client.get("/health")
+    second = client.post(
+        "/admin/memory/snapshots", headers=admin_headers, params={"group_by": "filename"}
+    ).json()["id"]
+
+    response = client.get(
+        f"/admin/memory/snapshots/{second}", headers=admin_headers, params={"against": first}
+    )
+    assert response.status_code == 200
+    assert "size_diff_bytes" in response.json()["stats"][0]
+
+    routes = client.get("/admin/memory", headers=admin_headers).json()["routes"]
+    assert routes["/health"]["requests"] == 1
+
+
+def test_traces_cover_every_layer(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    admin_headers: dict[str, str],
+    tracing: None,
+):
+    """Test a sampled request records dependency, service, repository and SQL spans."""
+    tracer.sample_rate = 1.0
+    client.get("/items", headers=auth_headers)
+    tracer.sample_rate = 0.0
+
+    traces = client.get("/admin/traces", headers=admin_headers).json()
+    spans = traces[0]
+    root = next(span for span in spans if span["parent_id"] is None)
+    assert root["name"] == "GET /items"
+    assert {"dependency", "service", "repository", "db"} <= {span["layer"] for span in spans}
+    assert {span["trace_id"] for span in spans} == {root["trace_id"]}
+
+    summary = client.get("/admin/traces/summary", headers=admin_headers).json()
+    assert summary["layers"]["db"]["spans"] >= 1
+
+
+def test_sampled_traceparent_is_continued(
+    client: TestClient, admin_headers: dict[str, str], tracing: None
+):
+    """Test an incoming sampled traceparent is honoured and its ids are reused."""
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    client.get("/health", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+    client.get("/health", headers={"traceparent": f"00-{'1' * 32}-00f067aa0ba902b7-00"})
+
+    traces = client.get("/admin/traces", headers=admin_headers).json()
+    assert len(traces) == 1
+    assert traces[0][0]["trace_id"] == trace_id
+    assert traces[0][0]["parent_id"] == "00f067aa0ba902b7"
@@ -77,6 +77,16 @@ def test_get_current_user(client: TestClient, auth_headers: dict[str, str]):
     assert "email" in data
 
 
+def test_get_current_user_conditional_get(client: TestClient, auth_headers: dict[str, str]):
+    """Test /auth/me answers 304 for a matching If-None-Match."""
+    etag = client.get("/auth/me", headers=auth_headers).headers["etag"]
+
+    response = client.get("/auth/me", headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
 def test_get_current_user_unauthorized(client: TestClient):
     """Test getting current user without auth."""
     response = client.get("/auth/me")
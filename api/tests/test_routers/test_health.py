@@ -1,5 +1,25 @@
 """Tests for health router."""
+from collections.abc import Generator
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, event, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.core.db import _count_db_error, pool_stats
+from app.core.health import readiness_probe
+
+
+@pytest.fixture
+def fresh_probe(monkeypatch: pytest.MonkeyPatch, test_db_engine: Engine) -> Generator[None]:
+    """Start each readiness test with no cached result or pool history, probing the test database."""
+    monkeypatch.setattr("app.core.health.get_engine", lambda: test_db_engine)
+    monkeypatch.setattr("app.core.db.get_engine", lambda: test_db_engine)
+    pool_stats.clear()
+    readiness_probe.invalidate()
+    yield
+    pool_stats.clear()
+    readiness_probe.invalidate()
 
 
 def test_health_check(client: TestClient):
@@ -8,3 +28,62 @@ def test_health_check(client: TestClient):
 
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_liveness_check(client: TestClient):
+    """Test liveness probe."""
+    response = client.get("/health/live")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_readiness_check(client: TestClient, fresh_probe: None):
+    """Test readiness probe reports a healthy database and pool."""
+    response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["database"] == "ok"
+    assert "saturation" in data["pool"]
+
+
+def test_readiness_result_is_cached(client: TestClient, fresh_probe: None):
+    """Test repeated probes reuse the cached result."""
+    first = client.get("/health/ready").json()
+    pool_stats.record_error()
+    second = client.get("/health/ready").json()
+
+    assert second == first
+
+
+def test_readiness_degraded_on_error_rate(client: TestClient, fresh_probe: None):
+    """Test readiness fails when the database error rate is over the threshold."""
+    pool_stats.record_checkout(0.001)
+    pool_stats.record_error()
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    data = response.json()
+    assert data["status"] == "degraded"
+    assert "database error rate high" in data["reasons"]
+
+
+def test_only_database_failures_count_as_errors(fresh_probe: None):
+    """Test client-caused errors such as constraint violations do not raise the error rate."""
+    engine = create_engine("sqlite://")
+    event.listen(engine, "handle_error", _count_db_error)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    with pytest.raises(IntegrityError), engine.begin() as conn:
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+    assert pool_stats.summary()["errors"] == 0
+
+    # SQLite reports errors of the database itself, e.g. locking, as OperationalError
+    with pytest.raises(OperationalError), engine.connect() as conn:
+        conn.execute(text("SELECT * FROM missing"))
+    assert pool_stats.summary()["errors"] == 1
@@ -1,5 +1,16 @@
 """Tests for items router."""
+import csv
+import io
+import json
+import uuid
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.item import Item
+from app.schemas.item import ITEM_RESPONSE_FIELDS
 
 
 def test_create_item(client: TestClient, auth_headers: dict[str, str]):
@@ -51,3 +62,295 @@ def test_create_item_unauthorized(client: TestClient):
     )
 
     assert response.status_code == 403
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_list_items_matches_single_item_serialization(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch, fast: bool
+):
+    """Test the fast list path renders items exactly like the validated path."""
+    monkeypatch.setattr(settings, "fast_list_responses", fast)
+    created = client.post(
+        "/items",
+        headers=auth_headers,
+        json={"title": "Test Item", "description": None},
+    ).json()
+
+    listed = client.get("/items", headers=auth_headers)
+    single = client.get(f"/items/{created['id']}", headers=auth_headers)
+
+    assert listed.headers["content-type"] == "application/json"
+    assert listed.json() == [single.json()]
+    assert listed.json()[0] == created
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_list_items_sparse_fields(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch, fast: bool
+):
+    """Test ?fields= restricts the serialized list items."""
+    monkeypatch.setattr(settings, "fast_list_responses", fast)
+    client.post("/items", headers=auth_headers, json={"title": "A", "description": "x" * 500})
+
+    response = client.get("/items", headers=auth_headers, params={"fields": "id,title"})
+
+    assert response.status_code == 200
+    assert [set(item) for item in response.json()] == [{"id", "title"}]
+
+
+def test_get_item_sparse_fields(client: TestClient, auth_headers: dict[str, str]):
+    """Test ?fields= on a single item still enforces ownership and trims output."""
+    created = client.post("/items", headers=auth_headers, json={"title": "A"}).json()
+
+    response = client.get(
+        f"/items/{created['id']}", headers=auth_headers, params={"fields": "title,is_active"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"title": "A", "is_active": True}
+
+
+@pytest.mark.parametrize("fields", ["id,secret", "", " , "])
+def test_sparse_fields_rejects_unknown(
+    client: TestClient, auth_headers: dict[str, str], fields: str
+):
+    """Test fields outside the allow-list are rejected."""
+    response = client.get("/items", headers=auth_headers, params={"fields": fields})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_list_items_conditional_get(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch, fast: bool
+):
+    """Test the list ETag yields 304 until the list changes."""
+    monkeypatch.setattr(settings, "fast_list_responses", fast)
+    client.post("/items", headers=auth_headers, json={"title": "A"})
+    etag = client.get("/items", headers=auth_headers).headers["etag"]
+
+    cached = client.get("/items", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    client.post("/items", headers=auth_headers, json={"title": "B"})
+    fresh = client.get("/items", headers={**auth_headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert len(fresh.json()) == 2
+
+
+def test_etag_differs_per_representation(client: TestClient, auth_headers: dict[str, str]):
+    """Test sparse and MessagePack representations get their own ETags."""
+    created = client.post("/items", headers=auth_headers, json={"title": "A"})
+    url = f"/items/{created.json()['id']}"
+
+    full = client.get(url, headers=auth_headers).headers["etag"]
+    sparse = client.get(url, headers=auth_headers, params={"fields": "title"}).headers["etag"]
+    packed = client.get(url, headers={**auth_headers, "Accept": "application/msgpack"})
+
+    assert full == created.headers["etag"]
+    assert len({full, sparse, packed.headers["etag"]}) == 3
+    assert packed.headers["content-type"] == "application/msgpack"
+    not_modified = client.get(
+        url, headers={**auth_headers, "If-None-Match": f'"other", W/{sparse}'}, params={"fields": "title"}
+    )
+    assert not_modified.status_code == 304
+
+
+def test_update_item_if_match(client: TestClient, auth_headers: dict[str, str]):
+    """Test If-Match guards PATCH and DELETE against concurrent changes."""
+    created = client.post("/items", headers=auth_headers, json={"title": "A"})
+    url = f"/items/{created.json()['id']}"
+
+    stale = client.patch(
+        url, headers={**auth_headers, "If-Match": '"0123456789abcdef01234567"'}, json={"title": "B"}
+    )
+    assert stale.status_code == 412
+    assert client.get(url, headers=auth_headers).json()["title"] == "A"
+
+    updated = client.patch(
+        url, headers={**auth_headers, "If-Match": created.headers["etag"]}, json={"title": "B"}
+    )
+    assert updated.status_code == 200
+    assert "etag" in updated.headers
+
+    assert client.delete(url, headers={**auth_headers, "If-Match": '"stale"'}).status_code == 412
+    assert client.delete(url, headers={**auth_headers, "If-Match": "*"}).status_code == 204
+
+
+def test_list_cache_invalidated_on_writes(client: TestClient, auth_headers: dict[str, str]):
+    """Test cached lists reflect creates, updates and deletes immediately."""
+    created = client.post("/items", headers=auth_headers, json={"title": "A"}).json()
+    assert [item["title"] for item in client.get("/items", headers=auth_headers).json()] == ["A"]
+
+    client.patch(f"/items/{created['id']}", headers=auth_headers, json={"title": "B"})
+    assert [item["title"] for item in client.get("/items", headers=auth_headers).json()] == ["B"]
+
+    client.delete(f"/items/{created['id']}", headers=auth_headers)
+    assert client.get("/items", headers=auth_headers).json() == []
+
+
+def test_export_ndjson(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+    """Test NDJSON export streams every item, matching the list representation."""
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+    for i in range(5):
+        client.post("/items", headers=auth_headers, json={"title": f"Item {i}"})
+
+    response = client.get("/items/export", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "items.ndjson" in response.headers["content-disposition"]
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == client.get("/items", headers=auth_headers).json()
+
+
+def test_export_csv(client: TestClient, auth_headers: dict[str, str]):
+    """Test CSV export with a field subset, and gzip when accepted."""
+    client.post("/items", headers=auth_headers, json={"title": "A, with comma"})
+    client.post("/items", headers=auth_headers, json={"title": "B", "description": "x"})
+
+    response = client.get(
+        "/items/export",
+        headers={**auth_headers, "Accept-Encoding": "gzip"},
+        params={"format": "csv", "fields": "title,description"},
+    )
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-encoding"] == "gzip"
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["title", "description"]
+    assert sorted(rows[1:]) == [["A, with comma", ""], ["B", "x"]]
+
+
+def test_export_empty(client: TestClient, auth_headers: dict[str, str]):
+    """Test exports of a user without items."""
+    assert client.get("/items/export", headers=auth_headers).content == b""
+    csv_export = client.get("/items/export", headers=auth_headers, params={"format": "csv"})
+    assert csv_export.text.splitlines() == [",".join(ITEM_RESPONSE_FIELDS)]
+
+
+def test_import_ndjson(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+    """Test NDJSON import inserts valid rows in chunks and reports bad ones."""
+    monkeypatch.setattr(settings, "import_chunk_size", 2)
+    body = "\n".join(
+        [
+            json.dumps({"title": "A", "description": "line\u2028separator"}, ensure_ascii=False),
+            json.dumps({"title": "B"}),
+            "{not json",
+            json.dumps({"title": ""}),
+            "",
+            json.dumps({"title": "C"}),
+            "[1]",
+        ]
+    )
+
+    response = client.post(
+        "/items/import",
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+        content=body.encode(),
+    )
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["imported"] == 3
+    assert summary["failed"] == 3
+    assert [error["row"] for error in summary["errors"]] == [3, 4, 7]
+    assert summary["errors"][1]["errors"][0].startswith("title:")
+    titles = sorted(item["title"] for item in client.get("/items", headers=auth_headers).json())
+    assert titles == ["A", "B", "C"]
+
+
+def test_import_csv_round_trips_export(client: TestClient, auth_headers: dict[str, str]):
+    """Test a CSV export imports back unchanged (quoted newlines, empty cells)."""
+    client.post("/items", headers=auth_headers, json={"title": "Multi", "description": "a\nb"})
+    client.post("/items", headers=auth_headers, json={"title": "Bare"})
+    exported = client.get(
+        "/items/export", headers=auth_headers, params={"format": "csv", "fields": "title,description"}
+    ).content
+
+    response = client.post(
+        "/items/import", headers=auth_headers, params={"format": "csv"}, content=exported
+    )
+
+    assert response.json() == {"imported": 2, "failed": 0, "errors": [], "errors_truncated": False}
+    items = client.get("/items", headers=auth_headers).json()
+    assert sorted((item["title"], item["description"]) for item in items) == [
+        ("Bare", None),
+        ("Bare", None),
+        ("Multi", "a\nb"),
+        ("Multi", "a\nb"),
+    ]
+
+
+def test_import_requires_known_format(client: TestClient, auth_headers: dict[str, str]):
+    """Test bodies of unknown type are rejected."""
+    response = client.post(
+        "/items/import", headers={**auth_headers, "Content-Type": "text/plain"}, content=b"x"
+    )
+
+    assert response.status_code == 415
+
+
+def test_search_items(client: TestClient, auth_headers: dict[str, str]):
+    """Test search matches words and stems, ranks titles first and stays current."""
+    client.post("/items", headers=auth_headers, json={"title": "Grocery list", "description": "apples"})
+    by_title = client.post("/items", headers=auth_headers, json={"title": "Apple pie"}).json()
+    client.post("/items", headers=auth_headers, json={"title": "Other", "description": "pears"})
+
+    results = client.get("/items/search", headers=auth_headers, params={"q": "apple"}).json()
+    assert [item["title"] for item in results] == ["Apple pie", "Grocery list"]
+
+    page = client.get(
+        "/items/search", headers=auth_headers, params={"q": "apple", "limit": 1, "offset": 1}
+    ).json()
+    assert [item["title"] for item in page] == ["Grocery list"]
+
+    client.patch(f"/items/{by_title['id']}", headers=auth_headers, json={"title": "Cherry pie"})
+    client.post("/items", headers=auth_headers, json={"title": "apple's"})
+    results = client.get("/items/search", headers=auth_headers, params={"q": "apple"}).json()
+    assert sorted(item["title"] for item in results) == ["Grocery list", "apple's"]
+    assert client.get("/items/search", headers=auth_headers, params={"q": "*"}).json() == []
+
+
+def test_search_items_scoped_to_user(
+    client: TestClient, auth_headers: dict[str, str], admin_headers: dict[str, str]
+):
+    """Test users only find their own items."""
+    client.post("/items", headers=admin_headers, json={"title": "Secret apple"})
+
+    response = client.get("/items/search", headers=auth_headers, params={"q": "apple"})
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_list_cache_follows_writes_made_elsewhere(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    test_db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test writes that bypass the service (another worker, a job, SQL) are not hidden by the cache."""
+    monkeypatch.setattr(settings, "fast_list_responses", True)
+    created = client.post("/items", headers=auth_headers, json={"title": "A"}).json()
+    first = client.get("/items", headers=auth_headers)
+    assert [item["title"] for item in first.json()] == ["A"]
+
+    item = test_db.get(Item, uuid.UUID(created["id"]))
+    item.title = "changed elsewhere"
+    test_db.add(Item(user_id=item.user_id, title="added elsewhere"))
+    test_db.commit()
+
+    second = client.get("/items", headers={**auth_headers, "If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert sorted(item["title"] for item in second.json()) == ["added elsewhere", "changed elsewhere"]
+    again = client.get("/items", headers={**auth_headers, "If-None-Match": second.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,82 @@
+"""Tests for MessagePack content negotiation on the items and auth routers."""
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.msgpack_codec import packb, unpackb
+
+MSGPACK = "application/msgpack"
+
+
+def test_create_and_get_item_with_msgpack(client: TestClient, auth_headers: dict[str, str]):
+    """Test MessagePack request bodies are validated and responses are packed."""
+    response = client.post(
+        "/items",
+        headers={**auth_headers, "Content-Type": MSGPACK, "Accept": MSGPACK},
+        content=packb({"title": "Packed", "description": "via msgpack"}),
+    )
+
+    assert response.status_code == 201
+    assert response.headers["content-type"] == MSGPACK
+    item = unpackb(response.content)
+    assert isinstance(item["id"], uuid.UUID)
+    assert isinstance(item["created_at"], datetime)
+    assert item["title"] == "Packed"
+
+    json_item = client.get(f"/items/{item['id']}", headers=auth_headers).json()
+    assert json_item["title"] == "Packed"
+    assert json_item["id"] == str(item["id"])
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_list_items_with_msgpack(
+    client: TestClient,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+    fast: bool,
+):
+    """Test both list paths honour Accept: application/msgpack."""
+    monkeypatch.setattr(settings, "fast_list_responses", fast)
+    client.post("/items", headers=auth_headers, json={"title": "One"})
+
+    response = client.get("/items", headers={**auth_headers, "Accept": MSGPACK})
+
+    assert response.headers["content-type"] == MSGPACK
+    assert "Accept" in response.headers["vary"]
+    items = unpackb(response.content)
+    assert [item["title"] for item in items] == ["One"]
+    assert isinstance(items[0]["user_id"], uuid.UUID)
+
+
+def test_msgpack_validation_errors(client: TestClient, auth_headers: dict[str, str]):
+    """Test schema validation and malformed bodies are rejected."""
+    invalid = client.post(
+        "/items",
+        headers={**auth_headers, "Content-Type": MSGPACK},
+        content=packb({"title": ""}),
+    )
+    malformed = client.post(
+        "/items",
+        headers={**auth_headers, "Content-Type": MSGPACK},
+        content=b"\xc1",
+    )
+
+    assert invalid.status_code == 422
+    assert malformed.status_code == 400
+
+
+def test_login_with_msgpack(client: TestClient, test_user):
+    """Test the auth router speaks MessagePack too."""
+    response = client.post(
+        "/auth/login",
+        headers={"Content-Type": MSGPACK, "Accept": MSGPACK},
+        content=packb({"email": test_user.email, "password": "testpassword123"}),
+    )
+
+    assert response.status_code == 200
+    data = unpackb(response.content)
+    assert data["token_type"] == "bearer"
+    assert data["user"]["id"] == test_user.id